@@ -0,0 +1,363 @@
+import asyncio
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from portafolio_system import PortfolioAdvisorSystem
+
+# Largest request body accepted, profiles are a few hundred bytes
+MAX_BODY_BYTES = 1024 * 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class AdvisorService:
+    """
+        Long-lived HTTP service in front of one warm PortfolioAdvisorSystem.
+
+        The price cache, run store, agents, LLM client and loaded model are
+        shared by all requests, so only the first request pays for imports
+        and model loading. Requests for a profile that is already being
+        computed wait for that computation instead of starting another one,
+        overlapping ticker sets download each ticker once through the
+        per-ticker locks of the price cache, and every request writes to its
+        own run, so concurrent requests never overwrite each other's results.
+
+        Endpoints:
+            POST /recommendations  profile (or a list of profiles) as JSON
+            GET  /runs/<run_id>    stored recommendation of a run
+            GET  /health           request counters
+            GET  /metrics          Prometheus metrics (with instrumentation enabled)
+    """
+
+    def __init__(self, advisor, max_workers=4):
+        """
+            Args:
+                advisor (PortfolioAdvisorSystem): System shared by all requests
+                max_workers (int): Recommendations computed at the same time
+        """
+        self.advisor = advisor
+        self.max_workers = max_workers
+        self.requests = 0
+        self.coalesced = 0
+        self.started_at = None
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._in_flight = {}
+        self._server = None
+
+    def warm_up(self, load_model=True):
+        """
+        Create the shared components before the first request arrives
+
+        Args:
+            load_model (bool): Also ask Ollama to load the model into memory
+        """
+        # The components are cached properties, creating them up front also keeps
+        # concurrent first requests from each building their own
+        advisor = self.advisor
+        advisor.llm, advisor.price_cache, advisor.run_store
+        advisor.data_agent, advisor.risk_agent, advisor.portfolio_agent, advisor.chart_renderer
+        if load_model:
+            advisor.llm.warm_up()
+
+    async def start(self, host="127.0.0.1", port=8000):
+        """
+        Start listening, port 0 picks a free port
+
+        Returns:
+            int: The port the service listens on
+        """
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        self.started_at = time.time()
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, host="127.0.0.1", port=8000):
+        """Start listening and serve until cancelled"""
+        port = await self.start(host, port)
+        print(f"Portfolio advisor service listening on http://{host}:{port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stop listening and wait for running recommendations"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=True)
+        if self.advisor.chart_renderer is not None:
+            self.advisor.chart_renderer.close()
+
+    async def recommend(self, profile):
+        """
+        Create a recommendation, joining an identical one that is already running
+
+        Args:
+            profile (dict): risk_tolerance, time_horizon and optional
+                focus_sectors and investment_amount
+
+        Returns:
+            dict: The recommendation
+        """
+        profile = _normalize_profile(profile)
+        key = json.dumps(profile, sort_keys=True)
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, self._create_recommendation, profile)
+            self._in_flight[key] = future
+            # Forget the profile once it is done, later requests compute it again
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # A client that disconnects must not cancel the work other requests wait for
+        return await asyncio.shield(future)
+
+    def health(self):
+        """Service counters"""
+        return {
+            "status": "ok",
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+            "max_workers": self.max_workers,
+            "uptime": round(time.time() - self.started_at, 3) if self.started_at else 0.0
+        }
+
+    def _create_recommendation(self, profile):
+        return self.advisor.create_portfolio_recommendation(
+            profile["risk_tolerance"],
+            profile["time_horizon"],
+            profile["focus_sectors"],
+            profile["investment_amount"]
+        )
+
+    async def _handle_connection(self, reader, writer):
+        """Serve the requests of one connection, HTTP/1.1 keep-alive included"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request line"}, False)
+                    break
+
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Invalid Content-Length"}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "Request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                self.requests += 1
+                status, payload = await self._route(method, target.split("?", 1)[0], body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _route(self, method, path, body):
+        """Dispatch a request, returns (status, JSON payload)"""
+        if path == "/health":
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+            return 200, self.health()
+
+        if path == "/metrics":
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+            from portfolio_advisor.utils import instrumentation
+            return 200, instrumentation.REGISTRY.to_prometheus()
+
+        if path.startswith("/runs/"):
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+            recommendation = await asyncio.to_thread(self.advisor.run_store.load, path[len("/runs/"):], "recommendation")
+            if recommendation is None:
+                return 404, {"error": "Unknown run"}
+            return 200, recommendation
+
+        if path != "/recommendations":
+            return 404, {"error": f"Unknown path: {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST"}
+
+        try:
+            profiles = json.loads(body)
+            if isinstance(profiles, list):
+                for profile in profiles:
+                    _normalize_profile(profile)
+            else:
+                _normalize_profile(profiles)
+        except ValueError as e:
+            return 400, {"error": f"Invalid profile: {e}"}
+
+        try:
+            if isinstance(profiles, list):
+                results = await asyncio.gather(*(self.recommend(profile) for profile in profiles))
+                return (500 if any("error" in result for result in results) else 200), results
+            result = await self.recommend(profiles)
+        except Exception as e:
+            print(f"Error creating recommendation: {e}")
+            return 500, {"error": str(e)}
+
+        return (500 if "error" in result else 200), result
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        # Text payloads (the Prometheus metrics) are sent as they are
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload, default=str).encode("utf-8"), "application/json"
+        head = (
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+def _normalize_profile(profile):
+    """
+    Validate a profile and bring it into a canonical form
+
+    Sectors are sorted and deduplicated, so profiles that only differ in
+    sector order share one computation.
+
+    Raises:
+        ValueError: If a required field is missing or out of range
+    """
+    if not isinstance(profile, dict):
+        raise ValueError("profile must be a JSON object")
+
+    for key in ("risk_tolerance", "time_horizon"):
+        if key not in profile:
+            raise ValueError(f"missing {key}")
+    risk_tolerance = _number(profile["risk_tolerance"], "risk_tolerance")
+    time_horizon = _number(profile["time_horizon"], "time_horizon")
+
+    if not float(risk_tolerance).is_integer() or not 1 <= risk_tolerance <= 10:
+        raise ValueError("risk_tolerance must be a whole number between 1 and 10")
+    risk_tolerance = int(risk_tolerance)
+    time_horizon = float(time_horizon)
+    if time_horizon <= 0:
+        raise ValueError("time_horizon must be positive")
+
+    sectors = profile.get("focus_sectors")
+    if isinstance(sectors, str):
+        sectors = [sectors]
+    if sectors is not None:
+        if not isinstance(sectors, list) or not all(isinstance(sector, str) for sector in sectors):
+            raise ValueError("focus_sectors must be a string or a list of strings")
+        sectors = sorted({sector.strip() for sector in sectors if sector.strip()}) or None
+
+    amount = profile.get("investment_amount")
+    if amount is not None:
+        amount = float(_number(amount, "investment_amount"))
+        if amount < 0:
+            raise ValueError("investment_amount must not be negative")
+    amount = amount or None
+
+    return {
+        "risk_tolerance": risk_tolerance,
+        "time_horizon": int(time_horizon) if time_horizon.is_integer() else time_horizon,
+        "focus_sectors": sectors,
+        "investment_amount": amount
+    }
+
+
+def _number(value, name):
+    """A finite JSON number, bool and non-numeric values raise ValueError"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{name} must be a number")
+    try:
+        finite = math.isfinite(value)
+    except OverflowError:
+        # Integers too large for a float
+        finite = False
+    if not finite:
+        raise ValueError(f"{name} must be a finite number")
+    return value
+
+
+def main(argv=None):
+    """
+    Run the service until interrupted
+
+    Returns:
+        int: Exit code
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AI Portfolio Advisor HTTP service")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--data-dir", default="./data", help="Data directory")
+    parser.add_argument("--replay", help="Replay recorded market data from this CSV/Parquet file instead of Yahoo Finance")
+    parser.add_argument("--allocation-method", default="equal",
+                        choices=["equal", "min_variance", "mean_variance", "frontier"])
+    parser.add_argument("--workers", type=int, default=4, help="Recommendations computed at the same time")
+    parser.add_argument("--llm-cache-size", type=int, default=256, help="Cached LLM responses, 0 to disable")
+    parser.add_argument("--keep-alive", default="30m", help="How long Ollama keeps the model loaded between requests")
+    parser.add_argument("--no-warm-up", action="store_true", help="Do not load the model at startup")
+    parser.add_argument("--no-persist", action="store_true", help="Do not store run results")
+    parser.add_argument("--instrument", action="store_true", help="Trace every run and serve /metrics")
+    args = parser.parse_args(argv)
+
+    provider = None
+    if args.replay:
+        from portfolio_advisor.utils.market_data import ReplayProvider
+        provider = ReplayProvider(args.replay)
+
+    advisor = PortfolioAdvisorSystem(
+        data_dir=args.data_dir,
+        provider=provider,
+        llm_cache_size=args.llm_cache_size,
+        allocation_method=args.allocation_method,
+        persist=not args.no_persist,
+        llm_keep_alive=args.keep_alive,
+        instrument=args.instrument
+    )
+    service = AdvisorService(advisor, max_workers=args.workers)
+    service.warm_up(load_model=not args.no_warm_up)
+
+    try:
+        asyncio.run(service.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nService stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
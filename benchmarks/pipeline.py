@@ -0,0 +1,256 @@
+"""
+Offline benchmark of the pipeline stages on synthetic market data.
+
+Prices come from a correlated factor model (SyntheticProvider) and the LLM
+is a stub that answers instantly, so only the advisor's own code is timed.
+Every stage is measured for each universe size and history length, wall
+time over repeated runs plus the peak memory of one traced run, and the
+results can be written to JSON and compared against an earlier run.
+
+    python benchmarks/pipeline.py --json results.json
+    python benchmarks/pipeline.py --sizes 10 100 --periods 1y --compare results.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from portafolio_system import PortfolioAdvisorSystem
+from portfolio_advisor.agents.portofolio_constructor import PortfolioConstructorAgent
+from portfolio_advisor.agents.risk_assesment import RiskAssessmentAgent
+from portfolio_advisor.models.base_model import FinancialAdvisorLLM
+from portfolio_advisor.utils.market_data import SyntheticProvider
+from portfolio_advisor.utils.price_cache import PriceCache
+from portfolio_advisor.utils.run_store import RunStore
+
+SIZES = (10, 100, 1000, 5000)
+PERIODS = ("30d", "1y", "5y", "20y")
+
+
+class StubLLM(FinancialAdvisorLLM):
+    """
+        LLM stand-in that answers instantly.
+
+        Asset recommendations name the whole synthetic universe (every fifth
+        ticker an ETF), so the downstream stages see the benchmark size.
+        Risk analyses return a fixed, valid answer.
+    """
+
+    def __init__(self, tickers):
+        super().__init__(model_name="stub")
+        self.tickers = tickers
+        self.calls = 0
+
+    def ask(self, question, system_prompt=None, temperature=0.0, format=None):
+        self.calls += 1
+        if "Recommend investment assets" in question:
+            return json.dumps([
+                {
+                    "ticker": ticker,
+                    "name": f"Synthetic {ticker}",
+                    "type": "ETF" if i % 5 == 0 else "stock",
+                    "justification": "Synthetic benchmark asset"
+                }
+                for i, ticker in enumerate(self.tickers)
+            ])
+        return json.dumps({
+            "appropriate_assets": self.tickers[:5],
+            "too_risky_assets": [],
+            "too_conservative_assets": [],
+            "portfolio_strategy": "Synthetic benchmark strategy",
+            "reasoning": "Stub response"
+        })
+
+    def ask_stream(self, question, system_prompt=None, temperature=0.0, format=None):
+        response = self.ask(question, system_prompt, temperature)
+        for start in range(0, len(response), 256):
+            yield response[start:start + 256]
+
+
+def measure(function, repeat):
+    """
+    Time a callable and trace its peak memory
+
+    Returns:
+        tuple: (timings in seconds, peak traced memory in MB, last result)
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+
+    # One extra run under tracemalloc, which slows Python code down
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return timings, peak / 1024 ** 2, result
+
+
+def benchmark_size(size, periods, repeat, data_dir, allocation_method="equal", risk_factors=None):
+    """All stages for one universe size, returns a list of result rows"""
+    provider = SyntheticProvider(n_tickers=size, years=max(21, *(_years(p) for p in periods)))
+    tickers = provider.tickers
+    llm = StubLLM(tickers)
+    price_cache = PriceCache(data_dir, provider=provider)
+    run_store = RunStore(data_dir, persist=False)
+    risk_agent = RiskAssessmentAgent(llm=llm, data_dir=data_dir, price_cache=price_cache, provider=provider,
+                                     run_store=run_store)
+    portfolio_agent = PortfolioConstructorAgent(llm=llm, data_dir=data_dir)
+    asset_info = {
+        ticker: {"name": ticker, "type": "ETF" if i % 5 == 0 else "stock"} for i, ticker in enumerate(tickers)
+    }
+
+    rows = []
+
+    def record(stage, period, function):
+        timings, peak_mb, result = measure(function, repeat)
+        row = {
+            "stage": stage,
+            "tickers": size,
+            "period": period,
+            "repeat": repeat,
+            "min_s": round(min(timings), 6),
+            "median_s": round(statistics.median(timings), 6),
+            "peak_mb": round(peak_mb, 2)
+        }
+        rows.append(row)
+        print(f"{stage:>22} {size:>6} {period:>5}: median {row['median_s']:9.4f}s   peak {row['peak_mb']:9.1f} MB",
+              file=sys.stderr)
+        return result
+
+    # Fill the price cache once (not timed), every stage reads warm bars from disk
+    price_cache.get_history(tickers, period=max(periods, key=_years))
+
+    for period in periods:
+        record("price_history", period, lambda: price_cache.get_history(tickers, period=period))
+        risk_metrics = record("risk_metrics", period, lambda: risk_agent.calculate_risk_metrics(tickers, period=period))
+        correlation_matrix = record(
+            "correlation_matrix", period,
+            lambda: risk_agent.calculate_correlation_matrix(tickers, period=period, factors=risk_factors)
+        )
+        allocations = record(
+            "allocation", period,
+            lambda: portfolio_agent.generate_allocation(
+                tickers, asset_info, risk_metrics, risk_level=5, time_horizon=10,
+                method=allocation_method, correlation_matrix=correlation_matrix
+            )
+        )
+        record(
+            "portfolio_risk", period,
+            lambda: risk_agent.assess_portfolio_risk(risk_metrics, correlation_matrix, allocations)
+        )
+
+    # The full recommendation always analyzes one year of history
+    advisor = PortfolioAdvisorSystem(data_dir=data_dir, provider=provider, persist=False, chart_format=None,
+                                     allocation_method=allocation_method, risk_factors=risk_factors)
+    advisor.llm = llm
+    advisor.price_cache = price_cache
+    record("recommendation", "1y", lambda: advisor.create_portfolio_recommendation(5, 10, investment_amount=10000))
+
+    return rows
+
+
+def compare(results, baseline_path, tolerance, allocation_method="equal"):
+    """
+    Print the change of every stage against an earlier results file
+
+    Returns:
+        list: Rows that got slower than tolerance times the baseline
+    """
+    with open(baseline_path) as f:
+        saved = json.load(f)
+    baseline = {(row["stage"], row["tickers"], row["period"]): row for row in saved["results"]}
+    if saved.get("allocation_method", "equal") != allocation_method:
+        print(f"Note: the baseline used the {saved.get('allocation_method')} allocation method")
+
+    regressions = []
+    print(f"\nMedian wall time compared to {baseline_path}:")
+    for row in results:
+        old = baseline.get((row["stage"], row["tickers"], row["period"]))
+        if old is None or not old["median_s"]:
+            continue
+        ratio = row["median_s"] / old["median_s"]
+        flag = "  SLOWER" if ratio > tolerance else ""
+        print(f"{row['stage']:>22} {row['tickers']:>6} {row['period']:>5}: {ratio:6.2f}x{flag}")
+        if ratio > tolerance:
+            regressions.append(row)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="Universe sizes (tickers)")
+    parser.add_argument("--periods", nargs="+", default=list(PERIODS), help="History lengths, e.g. 30d 1y 20y")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--allocation-method", default="equal",
+                        choices=["equal", "min_variance", "mean_variance", "frontier"])
+    parser.add_argument("--risk-factors", type=int, help="Model correlations with this many factors instead of densely")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--compare", help="Results file of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="Exit with 1 if a stage is this many times slower than in --compare")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as data_dir, contextlib.redirect_stdout(open(os.devnull, "w")):
+            results.extend(benchmark_size(
+                size, args.periods, args.repeat, data_dir, args.allocation_method, args.risk_factors
+            ))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "commit": _commit(),
+                "created_at": datetime.now().isoformat(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "allocation_method": args.allocation_method,
+                "risk_factors": args.risk_factors,
+                "results": results
+            }, f, indent=2)
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.tolerance, args.allocation_method) else 0
+    return 0
+
+
+def _years(period):
+    """Years of history a period needs, rounded up"""
+    number, unit = int(period[:-2] if period.endswith(("mo", "wk")) else period[:-1]), period[-1]
+    if period.endswith("mo"):
+        return -(-number // 12)
+    if period.endswith("wk"):
+        return -(-number // 52)
+    return number if unit == "y" else -(-number // 252)
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,65 @@
+"""
+Startup time of the portfolio advisor in fresh processes.
+
+Every scenario runs in a new interpreter, like a short-lived batch job,
+and the wall-clock time of the whole process is reported.
+
+    python benchmarks/startup.py --runs 10 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    # Interpreter start only, the baseline every other scenario pays
+    "python": "pass",
+    "import": "import portafolio_system",
+    "construct": "import portafolio_system; portafolio_system.PortfolioAdvisorSystem(data_dir={data_dir!r}, persist=False)",
+    "cli_help": "import sys, portafolio_system; sys.argv = ['portafolio_system', '--help']\n"
+                "try:\n    portafolio_system.main()\nexcept SystemExit:\n    pass",
+    # What a stage pays once it needs the agents (pandas, numpy, LLM client)
+    "agents": "import portafolio_system; a = portafolio_system.PortfolioAdvisorSystem(data_dir={data_dir!r}, persist=False); "
+              "a.data_agent; a.risk_agent; a.portfolio_agent",
+}
+
+
+def time_scenario(code, runs):
+    """Wall-clock seconds of each fresh-process run"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per scenario")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        for name, code in SCENARIOS.items():
+            timings = time_scenario(code.format(data_dir=data_dir), args.runs)
+            results[name] = {
+                "min_ms": round(min(timings) * 1000, 1),
+                "median_ms": round(statistics.median(timings) * 1000, 1)
+            }
+            print(f"{name:>10}: median {results[name]['median_ms']:8.1f} ms   min {results[name]['min_ms']:8.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"python": sys.version.split()[0], "runs": args.runs, "scenarios": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
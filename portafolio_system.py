@@ -1,29 +1,115 @@
 import os
-import json
-import pandas as pd
-import matplotlib.pyplot as plt
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from portfolio_advisor.models.base_model import FinancialAdvisorLLM
-from portfolio_advisor.agents.data_collection import DataCollectorAgent
-from portfolio_advisor.agents.risk_assesment import RiskAssessmentAgent
-from portfolio_advisor.agents.portofolio_constructor import PortfolioConstructorAgent
+from functools import cached_property
+
+# Charts are rendered off-screen, also when pyplot gets imported later on
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from portfolio_advisor.utils import instrumentation
+from portfolio_advisor.utils.pipeline import Pipeline
+
+# pandas, matplotlib, the LLM client and the agents are imported on first use,
+# so starting the process (e.g. for --help or a batch job) stays cheap
 
 class PortfolioAdvisorSystem:
     """Main system that coordinates all the specialized agents"""
     
-    def __init__(self, data_dir="./data"):
+    def __init__(self, data_dir="./data", provider=None, llm_cache_size=None, stream_llm=True,
+                 allocation_method="equal", simulation_mode="parametric", simulation_paths=10000, persist=True,
+                 llm_keep_alive=None, chart_format="png", instrument=False, risk_factors=None):
         self.data_dir = data_dir
+
+        # "equal" splits template buckets equally, "min_variance" / "mean_variance" optimize them,
+        # "frontier" picks the efficient frontier point for the risk level
+        self.allocation_method = allocation_method
+
+        # Model correlations with this many statistical factors instead of a
+        # dense N x N matrix, for large universes
+        self.risk_factors = risk_factors
+
+        # Monte Carlo wealth projection, run when an investment amount is given
+        self.simulation_mode = simulation_mode
+        self.simulation_paths = simulation_paths
+
+        # Stream asset recommendations so price downloads overlap generation
+        self.stream_llm = stream_llm
         os.makedirs(self.data_dir, exist_ok=True)
-        
-        # Initialize shared LLM
-        self.llm = FinancialAdvisorLLM()
-        
-        # Initialize agents
-        self.data_agent = DataCollectorAgent(llm=self.llm, data_dir=self.data_dir)
-        self.risk_agent = RiskAssessmentAgent(llm=self.llm, data_dir=self.data_dir)
-        self.portfolio_agent = PortfolioConstructorAgent(llm=self.llm, data_dir=self.data_dir)
+
+        # The LLM, market data and agents are created when a stage first needs them
+        self._provider = provider
+        self._llm_cache_size = llm_cache_size
+        self._llm_keep_alive = llm_keep_alive
+
+        # Allocation charts are rendered in the background as "png" or "svg", None skips them
+        self.chart_format = chart_format
+
+        # Record spans and counters: a JSON trace per run and data_dir/metrics.prom
+        self.instrument = instrument
+        if instrument:
+            instrumentation.enable()
+        self._persist = persist
         
         print("Portfolio Advisor System initialized!")
+
+    @cached_property
+    def llm(self):
+        """Shared LLM, optionally reusing responses for repeated profiles"""
+        from portfolio_advisor.models.base_model import FinancialAdvisorLLM
+        from portfolio_advisor.models.response_cache import ResponseCache
+
+        llm_cache = None
+        if self._llm_cache_size:
+            llm_cache = ResponseCache(os.path.join(self.data_dir, "llm_cache.json"), max_entries=self._llm_cache_size)
+        return FinancialAdvisorLLM(cache=llm_cache, keep_alive=self._llm_keep_alive)
+
+    @cached_property
+    def provider(self):
+        """Market data source, Yahoo Finance unless a replay was given"""
+        if self._provider:
+            return self._provider
+        from portfolio_advisor.utils.market_data import YahooFinanceProvider
+        return YahooFinanceProvider()
+
+    @cached_property
+    def price_cache(self):
+        """Price history cache shared by all agents"""
+        from portfolio_advisor.utils.price_cache import PriceCache
+        return PriceCache(self.data_dir, provider=self.provider)
+
+    @cached_property
+    def run_store(self):
+        """Run results go to one store, persist=False keeps everything in memory"""
+        from portfolio_advisor.utils.run_store import RunStore
+        return RunStore(self.data_dir, persist=self._persist)
+
+    @cached_property
+    def chart_renderer(self):
+        """Background chart renderer, None if charts are skipped or nothing is persisted"""
+        if not self.chart_format or not self._persist:
+            return None
+        from portfolio_advisor.utils.charts import ChartRenderer
+        return ChartRenderer(os.path.join(self.data_dir, "charts"), chart_format=self.chart_format)
+
+    @cached_property
+    def data_agent(self):
+        from portfolio_advisor.agents.data_collection import DataCollectorAgent
+        return DataCollectorAgent(
+            llm=self.llm, data_dir=self.data_dir, price_cache=self.price_cache, provider=self.provider, run_store=self.run_store
+        )
+
+    @cached_property
+    def risk_agent(self):
+        from portfolio_advisor.agents.risk_assesment import RiskAssessmentAgent
+        return RiskAssessmentAgent(
+            llm=self.llm, data_dir=self.data_dir, price_cache=self.price_cache, provider=self.provider, run_store=self.run_store
+        )
+
+    @cached_property
+    def portfolio_agent(self):
+        from portfolio_advisor.agents.portofolio_constructor import PortfolioConstructorAgent
+        return PortfolioConstructorAgent(llm=self.llm, data_dir=self.data_dir)
     
     def create_portfolio_recommendation(self, risk_tolerance, time_horizon, focus_sectors=None, investment_amount=None):
         """
@@ -39,21 +125,278 @@ class PortfolioAdvisorSystem:
             dict: Complete portfolio recommendation
         """
         print("\n--- Starting Portfolio Recommendation Process ---")
-        
+        run_id = self.run_store.new_run("recommendation", {
+            "risk_tolerance": risk_tolerance,
+            "time_horizon": time_horizon,
+            "focus_sectors": focus_sectors,
+            "investment_amount": investment_amount
+        })
+
+        with instrumentation.start_trace("recommendation", run_id=run_id) as trace:
+            recommendation = self._run_recommendation(
+                run_id, risk_tolerance, time_horizon, focus_sectors, investment_amount
+            )
+        if trace is not None:
+            self._save_trace(trace, run_id)
+
+        return recommendation
+
+    def _run_recommendation(self, run_id, risk_tolerance, time_horizon, focus_sectors, investment_amount):
+        """Steps 1-7 of a recommendation, stored with run_id"""
         # Step 1: Get recommended assets from the Data Agent
         print("\nStep 1: Finding suitable assets based on your profile...")
-        recommended_assets = self.data_agent.get_recommended_assets(
-            risk_tolerance, 
-            time_horizon, 
-            focus_sectors
-        )
+        step_start = time.perf_counter()
+        if self.stream_llm:
+            # Start downloading prices for each asset as soon as the LLM names it
+            from portfolio_advisor.utils.price_cache import PricePrefetcher
+            prefetcher = PricePrefetcher(self.price_cache)
+
+            def prefetch(asset):
+                if asset.get("ticker"):
+                    prefetcher.add(asset["ticker"])
+
+            try:
+                recommended_assets = self.data_agent.get_recommended_assets(
+                    risk_tolerance,
+                    time_horizon,
+                    focus_sectors,
+                    on_asset=prefetch,
+                    run_id=run_id
+                )
+            finally:
+                prefetcher.close()
+        else:
+            recommended_assets = self.data_agent.get_recommended_assets(
+                risk_tolerance, 
+                time_horizon, 
+                focus_sectors,
+                run_id=run_id
+            )
+        asset_selection_time = time.perf_counter() - step_start
         
         if not recommended_assets:
             return {"error": "Could not generate asset recommendations"}
         
         # Extract ticker list and create asset info dict
         asset_tickers = [asset["ticker"] for asset in recommended_assets]
-        asset_info = {
+        asset_info = self._build_asset_info(recommended_assets)
+        
+        print(f"Found {len(asset_tickers)} suitable assets:")
+        for asset in recommended_assets:
+            print(f"  {asset['ticker']} ({asset['name']}) - {asset['type']}")
+        
+        # Steps 2-7 run as a dependency graph: independent stages (risk metrics
+        # and correlations, LLM risk analysis and allocation, chart and JSON)
+        # overlap, so the total time is the critical path instead of the sum
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        pipeline = Pipeline(max_workers=4)
+        pipeline.add_stage("risk_metrics", lambda: self._risk_metrics_stage(asset_tickers, run_id))
+        pipeline.add_stage("correlation_matrix", lambda: self._correlation_stage(asset_tickers, run_id))
+        pipeline.add_stage(
+            "risk_analysis",
+            lambda risk_metrics: self._risk_analysis_stage(risk_metrics, risk_tolerance, run_id),
+            depends_on=("risk_metrics",)
+        )
+        pipeline.add_stage(
+            "allocations",
+            lambda risk_metrics, correlation_matrix: self._allocation_stage(
+                asset_tickers, asset_info, risk_metrics, correlation_matrix, risk_tolerance, time_horizon
+            ),
+            depends_on=("risk_metrics", "correlation_matrix")
+        )
+        pipeline.add_stage(
+            "portfolio_risk",
+            lambda risk_metrics, correlation_matrix, allocations: self._portfolio_risk_stage(
+                risk_metrics, correlation_matrix, allocations, risk_tolerance
+            ),
+            depends_on=("risk_metrics", "correlation_matrix", "allocations")
+        )
+        recommendation_inputs = ("allocations", "portfolio_risk", "risk_analysis")
+        if investment_amount:
+            pipeline.add_stage(
+                "projection",
+                lambda allocations: self._projection_stage(allocations, investment_amount, time_horizon),
+                depends_on=("allocations",)
+            )
+            recommendation_inputs += ("projection",)
+        pipeline.add_stage(
+            "recommendation",
+            lambda allocations, portfolio_risk, risk_analysis, projection=None: self._compile_recommendation(
+                timestamp, risk_tolerance, time_horizon, focus_sectors, investment_amount,
+                recommended_assets, allocations, portfolio_risk, risk_analysis, projection
+            ),
+            depends_on=recommendation_inputs
+        )
+        pipeline.add_stage(
+            "save_recommendation",
+            lambda recommendation: self._save_recommendation(recommendation, run_id),
+            depends_on=("recommendation",)
+        )
+        if self.chart_renderer is not None:
+            # Only queues the chart, the recommendation does not wait for the image
+            pipeline.add_stage(
+                "allocation_chart",
+                lambda allocations: self._chart_stage(allocations, asset_info, risk_tolerance, time_horizon),
+                depends_on=("allocations",)
+            )
+
+        results = pipeline.run()
+        recommendation = results["recommendation"]
+        recommendation["run_id"] = run_id
+        recommendation["chart_path"] = results.get("allocation_chart")
+
+        # Report wall-clock time per stage
+        stage_timings = {"recommended_assets": asset_selection_time, **pipeline.timings}
+        stage_timings["total"] += asset_selection_time
+        recommendation["stage_timings"] = {stage: round(seconds, 4) for stage, seconds in stage_timings.items()}
+
+        print("\nStage timings:")
+        for stage, seconds in stage_timings.items():
+            print(f"  {stage}: {seconds:.2f}s")
+        
+        print(f"\nPortfolio recommendation completed (run {run_id})")
+        return recommendation
+
+    def create_batch_recommendations(self, profiles, max_workers=None, generate_charts=False):
+        """
+        Create recommendations for many profiles, sharing data and LLM work
+
+        Asset selection runs once per distinct (risk tolerance, time horizon,
+        sectors) profile, market data, risk metrics and correlations are
+        computed once for the union of recommended tickers, and the LLM risk
+        analysis runs once per distinct (risk tolerance, tickers) pair.
+        Allocation and portfolio risk are then fanned out over a process pool.
+
+        Args:
+            profiles (list): Dicts with risk_tolerance, time_horizon and optional
+                focus_sectors and investment_amount
+            max_workers (int): Worker processes for allocation, 1 runs in-process
+            generate_charts (bool): Also save an allocation chart per profile
+
+        Returns:
+            list: Recommendation (or error dict) for each profile, in order
+        """
+        print(f"\n--- Starting Batch Recommendation Process ({len(profiles)} profiles) ---")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        # Shared results belong to the batch run, each profile gets its own run
+        batch_run_id = self.run_store.new_run("batch", {"profiles": profiles})
+
+        # Step 1: Asset selection once per distinct profile
+        print("\nStep 1: Finding suitable assets for each distinct profile...")
+        selections = {}
+        for profile in profiles:
+            key = _selection_key(profile)
+            if key not in selections:
+                selections[key] = self.data_agent.get_recommended_assets(
+                    profile["risk_tolerance"],
+                    profile["time_horizon"],
+                    profile.get("focus_sectors"),
+                    run_id=batch_run_id
+                )
+
+        all_tickers = list(dict.fromkeys(
+            asset["ticker"] for assets in selections.values() for asset in (assets or [])
+        ))
+        print(f"{len(selections)} distinct profiles, {len(all_tickers)} distinct assets")
+        if not all_tickers:
+            return [{"error": "Could not generate asset recommendations"} for _ in profiles]
+
+        # Steps 2-3: Market data, risk metrics and correlations once for the union
+        print("\nSteps 2-3: Analyzing risk and diversification for all assets...")
+        risk_metrics = self.risk_agent.calculate_risk_metrics(all_tickers, run_id=batch_run_id)
+        correlation_matrix = self.risk_agent.calculate_correlation_matrix(
+            all_tickers, factors=self.risk_factors, run_id=batch_run_id
+        )
+
+        # Step 4: LLM risk analysis once per distinct (risk tolerance, tickers) pair
+        print("\nStep 4: Evaluating asset suitability for each risk tolerance...")
+        analyses = {}
+        for profile in profiles:
+            assets = selections[_selection_key(profile)]
+            if not assets:
+                continue
+            tickers = tuple(asset["ticker"] for asset in assets)
+            key = (profile["risk_tolerance"], tickers)
+            if key not in analyses:
+                analyses[key] = self.risk_agent.get_risk_analysis(
+                    risk_metrics.loc[list(tickers)], profile["risk_tolerance"], run_id=batch_run_id
+                )
+
+        # Steps 5-6: Allocation and portfolio risk for every profile in parallel
+        print("\nSteps 5-6: Generating allocations and assessing portfolio risk...")
+        tasks = []
+        for profile in profiles:
+            assets = selections[_selection_key(profile)]
+            if assets:
+                tasks.append((
+                    [asset["ticker"] for asset in assets],
+                    self._build_asset_info(assets),
+                    profile["risk_tolerance"],
+                    profile["time_horizon"]
+                ))
+
+        if max_workers == 1 or len(tasks) < 2:
+            _init_batch_worker(self.data_dir, risk_metrics, correlation_matrix, self.allocation_method, self._persist)
+            evaluations = [_evaluate_profile(*task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_batch_worker,
+                initargs=(self.data_dir, risk_metrics, correlation_matrix, self.allocation_method, self._persist)
+            ) as executor:
+                evaluations = list(executor.map(_evaluate_profile, *zip(*tasks)))
+
+        # Step 7: Compile and save each recommendation
+        recommendations = []
+        evaluations = iter(evaluations)
+        for i, profile in enumerate(profiles):
+            assets = selections[_selection_key(profile)]
+            if not assets:
+                recommendations.append({"error": "Could not generate asset recommendations"})
+                continue
+
+            allocations, portfolio_risk = next(evaluations)
+            run_timestamp = f"{timestamp}_{i:03d}"
+            run_id = self.run_store.new_run("recommendation", dict(profile, batch_run_id=batch_run_id))
+            tickers = tuple(asset["ticker"] for asset in assets)
+
+            # Prices are already cached, so the projection needs no downloads
+            projection = None
+            if profile.get("investment_amount"):
+                projection = self._projection_stage(allocations, profile["investment_amount"], profile["time_horizon"])
+
+            recommendation = self._compile_recommendation(
+                run_timestamp,
+                profile["risk_tolerance"],
+                profile["time_horizon"],
+                profile.get("focus_sectors"),
+                profile.get("investment_amount"),
+                assets,
+                allocations,
+                portfolio_risk,
+                analyses[(profile["risk_tolerance"], tickers)],
+                projection
+            )
+            self._save_recommendation(recommendation, run_id)
+            recommendation["run_id"] = run_id
+
+            if generate_charts and self.chart_renderer is not None:
+                recommendation["chart_path"] = self._chart_stage(
+                    allocations,
+                    self._build_asset_info(assets),
+                    profile["risk_tolerance"],
+                    profile["time_horizon"]
+                )
+            recommendations.append(recommendation)
+
+        print(f"\nBatch completed: {len(recommendations)} recommendations (batch run {batch_run_id})")
+        return recommendations
+
+    def _build_asset_info(self, recommended_assets):
+        """Create the asset info dict used for allocation and charts"""
+        return {
             asset["ticker"]: {
                 "name": asset["name"], 
                 "type": asset["type"].lower(),
@@ -61,14 +404,11 @@ class PortfolioAdvisorSystem:
             } 
             for asset in recommended_assets
         }
-        
-        print(f"Found {len(asset_tickers)} suitable assets:")
-        for asset in recommended_assets:
-            print(f"  {asset['ticker']} ({asset['name']}) - {asset['type']}")
-        
-        # Step 2: Calculate risk metrics using the Risk Agent
+
+    def _risk_metrics_stage(self, asset_tickers, run_id=None):
+        """Step 2: Calculate risk metrics using the Risk Agent"""
         print("\nStep 2: Analyzing risk characteristics...")
-        risk_metrics = self.risk_agent.calculate_risk_metrics(asset_tickers)
+        risk_metrics = self.risk_agent.calculate_risk_metrics(asset_tickers, run_id=run_id)
         
         print("Risk analysis completed. Key metrics (volatility, max drawdown, returns):")
         for ticker in asset_tickers[:3]:  # Show first 3 for brevity
@@ -76,10 +416,15 @@ class PortfolioAdvisorSystem:
             print(f"  {ticker}: Vol={risk_row['volatility']:.2f}, MaxDD={risk_row['max_drawdown']:.2f}, Return={risk_row['avg_return']:.2f}")
         if len(asset_tickers) > 3:
             print(f"  ... and {len(asset_tickers) - 3} more assets")
-        
-        # Step 3: Calculate correlations
+
+        return risk_metrics
+
+    def _correlation_stage(self, asset_tickers, run_id=None):
+        """Step 3: Calculate correlations"""
         print("\nStep 3: Analyzing diversification potential...")
-        correlation_matrix = self.risk_agent.calculate_correlation_matrix(asset_tickers)
+        correlation_matrix = self.risk_agent.calculate_correlation_matrix(
+            asset_tickers, factors=self.risk_factors, run_id=run_id
+        )
         
         # Calculate average correlation for each asset
         avg_correlations = correlation_matrix.mean().sort_values()
@@ -87,27 +432,36 @@ class PortfolioAdvisorSystem:
         print("Diversification analysis completed. Assets with lowest correlations:")
         for ticker, corr in avg_correlations.iloc[:3].items():
             print(f"  {ticker}: Avg correlation = {corr:.2f}")
-        
-        # Step 4: Get risk analysis from the Risk Agent
+
+        return correlation_matrix
+
+    def _risk_analysis_stage(self, risk_metrics, risk_tolerance, run_id=None):
+        """Step 4: Get risk analysis from the Risk Agent"""
         print("\nStep 4: Evaluating asset suitability based on risk tolerance...")
-        risk_analysis = self.risk_agent.get_risk_analysis(risk_metrics, risk_tolerance)
+        risk_analysis = self.risk_agent.get_risk_analysis(risk_metrics, risk_tolerance, run_id=run_id)
         
         print("Risk suitability analysis completed:")
         print(f"  Appropriate assets: {', '.join(risk_analysis.get('appropriate_assets', []))}")
         print(f"  Too risky assets: {', '.join(risk_analysis.get('too_risky_assets', []))}")
         print(f"  Too conservative assets: {', '.join(risk_analysis.get('too_conservative_assets', []))}")
-        
-        # Step 5: Generate portfolio allocations
+
+        return risk_analysis
+
+    def _allocation_stage(self, asset_tickers, asset_info, risk_metrics, correlation_matrix, risk_tolerance, time_horizon):
+        """Step 5: Generate portfolio allocations"""
         print("\nStep 5: Generating optimal portfolio allocations...")
-        allocations = self.portfolio_agent.generate_allocation(
+        return self.portfolio_agent.generate_allocation(
             asset_tickers,
             asset_info,
             risk_metrics,
             risk_level=risk_tolerance,
-            time_horizon=time_horizon
+            time_horizon=time_horizon,
+            method=self.allocation_method,
+            correlation_matrix=correlation_matrix
         )
-        
-        # Step 6: Assess portfolio risk
+
+    def _portfolio_risk_stage(self, risk_metrics, correlation_matrix, allocations, risk_tolerance):
+        """Step 6: Assess portfolio risk"""
         print("\nStep 6: Assessing overall portfolio risk...")
         portfolio_metrics = self.risk_agent.assess_portfolio_risk(
             risk_metrics,
@@ -125,9 +479,24 @@ class PortfolioAdvisorSystem:
         print(f"Expected return: {portfolio_metrics['expected_return']:.2f}")
         print(f"Sharpe ratio: {portfolio_metrics['sharpe_ratio']:.2f}")
         print(f"Diversification score: {portfolio_metrics['diversification_score']:.2f}")
-        
-        # Step 7: Create final recommendation object
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        return portfolio_metrics, risk_match
+
+    def _projection_stage(self, allocations, investment_amount, time_horizon):
+        """Step 6b: Simulate the portfolio's wealth over the time horizon"""
+        print(f"\nStep 6b: Simulating {self.simulation_paths} wealth paths over {time_horizon} years...")
+        return self.risk_agent.simulate_portfolio(
+            allocations,
+            investment_amount,
+            time_horizon,
+            mode=self.simulation_mode,
+            n_paths=self.simulation_paths
+        )
+
+    def _compile_recommendation(self, timestamp, risk_tolerance, time_horizon, focus_sectors, investment_amount,
+                                recommended_assets, allocations, portfolio_risk, risk_analysis, projection=None):
+        """Step 7: Create final recommendation object"""
+        portfolio_metrics, risk_match = portfolio_risk
         
         # Calculate dollar amounts if investment amount provided
         dollar_allocations = None
@@ -138,7 +507,7 @@ class PortfolioAdvisorSystem:
             }
         
         # Compile final recommendation
-        recommendation = {
+        return {
             "timestamp": timestamp,
             "user_profile": {
                 "risk_tolerance": risk_tolerance,
@@ -161,71 +530,84 @@ class PortfolioAdvisorSystem:
                 "risk_match": risk_match["risk_match"],
                 "recommendation": risk_match["recommendation"]
             },
+            "wealth_projection": projection,
             "strategy": risk_analysis.get("portfolio_strategy", ""),
             "reasoning": risk_analysis.get("reasoning", "")
         }
-        
-        # Save recommendation to file
-        filename = os.path.join(self.data_dir, f"portfolio_recommendation_{timestamp}.json")
-        with open(filename, 'w') as f:
-            json.dump(recommendation, f, indent=4)
-        
-        # Generate visualization
+
+    def _save_trace(self, trace, run_id):
+        """Store the run's trace and refresh the process-wide Prometheus metrics"""
+        self.run_store.save(run_id, "trace", trace.to_dict())
+        if self._persist:
+            instrumentation.REGISTRY.write_prometheus(os.path.join(self.data_dir, "metrics.prom"))
+
+    def _save_recommendation(self, recommendation, run_id):
+        """Store the recommendation with its run"""
+        self.run_store.save(run_id, "recommendation", recommendation)
+        return run_id
+
+    def _chart_stage(self, allocations, asset_info, risk_tolerance, time_horizon):
+        """Queue the allocation chart, returns the path it is written to"""
         try:
-            self._generate_allocation_chart(
-                allocations, 
-                asset_info, 
-                risk_tolerance, 
-                time_horizon,
-                filename=os.path.join(self.data_dir, f"portfolio_allocation_{timestamp}.png")
-            )
+            path, _ = self.chart_renderer.submit(allocations, asset_info, risk_tolerance, time_horizon)
         except Exception as e:
             print(f"Error generating chart: {e}")
-        
-        print(f"\nPortfolio recommendation completed and saved to {filename}")
-        return recommendation
-    
-    def _generate_allocation_chart(self, allocations, asset_info, risk_tolerance, time_horizon, filename=None):
-        """Generate a pie chart of portfolio allocations"""
-        # Group allocations by asset type
-        asset_types = {}
-        for ticker, allocation in allocations.items():
-            asset_type = asset_info[ticker]["type"]
-            if asset_type in asset_types:
-                asset_types[asset_type] += allocation
-            else:
-                asset_types[asset_type] = allocation
-        
-        # Create figure with two subplots
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 7))
-        
-        # Plot 1: Overall asset type allocation
-        ax1.pie(
-            asset_types.values(),
-            labels=[f"{k.capitalize()}: {v*100:.1f}%" for k, v in asset_types.items()],
-            autopct='%1.1f%%',
-            startangle=90
-        )
-        ax1.set_title(f'Asset Type Allocation\nRisk Level: {risk_tolerance}/10, Time Horizon: {time_horizon} years')
-        
-        # Plot 2: Individual asset allocation
-        sorted_allocations = dict(sorted(allocations.items(), key=lambda x: x[1], reverse=True))
-        ax2.pie(
-            sorted_allocations.values(),
-            labels=[f"{k}: {v*100:.1f}%" for k, v in sorted_allocations.items()],
-            autopct='%1.1f%%',
-            startangle=90
-        )
-        ax2.set_title('Individual Asset Allocation')
-        
-        plt.tight_layout()
-        
-        # Save if filename provided
-        if filename:
-            plt.savefig(filename)
-            print(f"Portfolio allocation chart saved to {filename}")
-        
-        plt.close()
+            return None
+        return path
+
+def _selection_key(profile):
+    """Profile fields that determine the recommended assets"""
+    sectors = profile.get("focus_sectors")
+    return (profile["risk_tolerance"], profile["time_horizon"], tuple(sectors) if sectors else None)
+
+
+# Per-process state for batch workers, set once by the pool initializer so the
+# shared risk metrics and correlation matrix are not pickled for every task
+_batch_worker = {}
+
+
+def _init_batch_worker(data_dir, risk_metrics, correlation_matrix, allocation_method="equal", persist=True):
+    """Create the agents and shared inputs used by _evaluate_profile"""
+    from portfolio_advisor.agents.portofolio_constructor import PortfolioConstructorAgent
+    from portfolio_advisor.agents.risk_assesment import RiskAssessmentAgent
+    from portfolio_advisor.models.base_model import FinancialAdvisorLLM
+    from portfolio_advisor.utils.run_store import RunStore
+
+    llm = FinancialAdvisorLLM()
+    _batch_worker["portfolio_agent"] = PortfolioConstructorAgent(llm=llm, data_dir=data_dir)
+    # Workers follow the advisor's persist flag, with persist=False nothing is written
+    _batch_worker["risk_agent"] = RiskAssessmentAgent(
+        llm=llm, data_dir=data_dir, run_store=RunStore(data_dir, persist=persist)
+    )
+    _batch_worker["risk_metrics"] = risk_metrics
+    _batch_worker["correlation_matrix"] = correlation_matrix
+    _batch_worker["allocation_method"] = allocation_method
+
+
+def _evaluate_profile(tickers, asset_info, risk_tolerance, time_horizon):
+    """Allocation and portfolio risk for one profile, run in a batch worker"""
+    portfolio_agent = _batch_worker["portfolio_agent"]
+    risk_agent = _batch_worker["risk_agent"]
+    risk_metrics = _batch_worker["risk_metrics"]
+
+    allocations = portfolio_agent.generate_allocation(
+        tickers,
+        asset_info,
+        risk_metrics,
+        risk_level=risk_tolerance,
+        time_horizon=time_horizon,
+        method=_batch_worker["allocation_method"],
+        correlation_matrix=_batch_worker["correlation_matrix"]
+    )
+    portfolio_metrics = risk_agent.assess_portfolio_risk(
+        risk_metrics,
+        _batch_worker["correlation_matrix"],
+        allocations
+    )
+    risk_match = risk_agent.assess_risk_tolerance_match(portfolio_metrics, risk_tolerance)
+
+    return allocations, (portfolio_metrics, risk_match)
+
 
 def interactive_portfolio_advisor():
     """Run an interactive portfolio advisor session"""
@@ -339,8 +721,10 @@ def interactive_portfolio_advisor():
                 print(f"  {recommendation['strategy']}")
             
             # Chart location
-            print(f"\nA visual representation of your portfolio has been saved to:")
-            print(f"  {os.path.join(os.path.abspath(advisor.data_dir), 'portfolio_allocation_' + recommendation['timestamp'] + '.png')}")
+            if recommendation.get("chart_path"):
+                advisor.chart_renderer.wait()
+                print(f"\nA visual representation of your portfolio has been saved to:")
+                print(f"  {os.path.abspath(recommendation['chart_path'])}")
         
         # Ask if user wants another recommendation
         another = input("\nWould you like to create another portfolio recommendation? (y/n): ")
@@ -349,5 +733,109 @@ def interactive_portfolio_advisor():
     
     print("\nThank you for using the AI Portfolio Advisor System!")
 
+def _load_profiles(value):
+    """Profile(s) from a JSON string or a path to a JSON file"""
+    import json
+
+    if os.path.exists(value):
+        with open(value) as f:
+            return json.load(f)
+    return json.loads(value)
+
+
+def main(argv=None):
+    """
+    Command line entry point
+
+    Without profile arguments the interactive session starts. With
+    --risk-tolerance/--time-horizon or --profile the recommendation is
+    created without prompts and written as JSON (progress goes to stderr
+    when the JSON goes to stdout).
+
+    Returns:
+        int: Exit code
+    """
+    import argparse
+    import contextlib
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(description="AI Portfolio Advisor")
+    parser.add_argument("--risk-tolerance", type=int, help="Risk tolerance from 1 (very conservative) to 10 (very aggressive)")
+    parser.add_argument("--time-horizon", type=int, help="Investment time horizon in years")
+    parser.add_argument("--sectors", help="Comma-separated focus sectors")
+    parser.add_argument("--amount", type=float, help="Investment amount")
+    parser.add_argument("--profile", help="Profile as JSON (or path to a JSON file), a list runs a batch")
+    parser.add_argument("--data-dir", default="./data", help="Data directory")
+    parser.add_argument("--replay", help="Replay recorded market data from this CSV/Parquet file instead of Yahoo Finance")
+    parser.add_argument("--allocation-method", default="equal",
+                        choices=["equal", "min_variance", "mean_variance", "frontier"])
+    parser.add_argument("--workers", type=int, help="Worker processes for batch profiles")
+    parser.add_argument("--risk-factors", type=int, help="Model correlations with this many statistical factors")
+    parser.add_argument("--no-persist", action="store_true", help="Do not store run results")
+    parser.add_argument("--chart-format", default="png", choices=["png", "svg", "none"],
+                        help="Allocation chart format, none skips the chart")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Store a timing trace with the run and write data_dir/metrics.prom")
+    parser.add_argument("--output", default="-", help="Write the JSON result to this file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        profiles = _load_profiles(args.profile)
+    elif args.risk_tolerance is not None or args.time_horizon is not None:
+        if args.risk_tolerance is None or args.time_horizon is None:
+            parser.error("--risk-tolerance and --time-horizon are both required")
+        profiles = {
+            "risk_tolerance": args.risk_tolerance,
+            "time_horizon": args.time_horizon,
+            "focus_sectors": [s.strip() for s in args.sectors.split(",")] if args.sectors else None,
+            "investment_amount": args.amount
+        }
+    else:
+        interactive_portfolio_advisor()
+        return 0
+
+    provider = None
+    if args.replay:
+        from portfolio_advisor.utils.market_data import ReplayProvider
+        provider = ReplayProvider(args.replay)
+
+    # Keep stdout clean for the JSON result
+    progress = sys.stderr if args.output == "-" else sys.stdout
+    with contextlib.redirect_stdout(progress):
+        advisor = PortfolioAdvisorSystem(
+            data_dir=args.data_dir,
+            provider=provider,
+            allocation_method=args.allocation_method,
+            persist=not args.no_persist,
+            chart_format=None if args.chart_format == "none" else args.chart_format,
+            instrument=args.instrument,
+            risk_factors=args.risk_factors
+        )
+        if isinstance(profiles, list):
+            result = advisor.create_batch_recommendations(profiles, max_workers=args.workers)
+            failed = any("error" in recommendation for recommendation in result)
+        else:
+            result = advisor.create_portfolio_recommendation(
+                profiles["risk_tolerance"],
+                profiles["time_horizon"],
+                profiles.get("focus_sectors"),
+                profiles.get("investment_amount")
+            )
+            failed = "error" in result
+
+        # The JSON is ready, let the background chart finish before exiting
+        if advisor.chart_renderer is not None:
+            advisor.chart_renderer.close()
+
+    output = json.dumps(result, indent=2, default=str)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+    return 1 if failed else 0
+
 if __name__ == "__main__":
-    interactive_portfolio_advisor()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file
@@ -1,23 +1,63 @@
 import pandas as pd
-import yfinance as yf
 import os
-from datetime import datetime
 import json
+import uuid
+from portfolio_advisor.utils import instrumentation
+from portfolio_advisor.utils import json_schema
+from portfolio_advisor.utils.json_schema import SchemaError
+from portfolio_advisor.utils.fundamentals import FundamentalsFetcher
+from portfolio_advisor.utils.json_stream import JSONArrayStreamParser
+from portfolio_advisor.utils.market_data import YahooFinanceProvider
+from portfolio_advisor.utils.price_cache import PriceCache
+from portfolio_advisor.utils.run_store import RunStore
+from portfolio_advisor.utils.symbols import DEFAULT_SYMBOLS_FILE, SymbolTable, SymbolVerifier
+from portfolio_advisor.utils.universe import UniverseIndex
+
+# Shape of get_recommended_assets replies, enforced by Ollama's constrained decoding
+RECOMMENDED_ASSETS_SCHEMA = {
+    "type": "array",
+    "minItems": 1,
+    "items": {
+        "type": "object",
+        "properties": {
+            "ticker": {"type": "string", "minLength": 1},
+            "name": {"type": "string"},
+            "type": {"type": "string", "enum": ["stock", "ETF"]},
+            "justification": {"type": "string"}
+        },
+        "required": ["ticker", "name", "type", "justification"]
+    }
+}
 
 
 
 
 class DataCollectorAgent:
     """
-        Agent responsible for collecting stock data from Yahoo Finance
+        Agent responsible for collecting stock data from a market data provider
+        (Yahoo Finance by default)
     """
 
-    def __init__(self, llm:None, data_dir="./data"):
+    def __init__(self, llm:None, data_dir="./data", price_cache=None, provider=None, fundamentals=None, run_store=None, symbols=None):
         # Initializing the agent
 
         self.data_dir = data_dir
         self.llm = llm if llm else FinancialAdvisorLLM()
 
+        # Market data source and shared price history cache
+        self.provider = provider if provider else YahooFinanceProvider()
+        self.price_cache = price_cache if price_cache else PriceCache(data_dir, provider=self.provider)
+
+        # Concurrent, cached fundamentals lookups
+        self.fundamentals = fundamentals if fundamentals else FundamentalsFetcher(self.provider, data_dir)
+
+        # Results are stored per run instead of timestamped files
+        self.run_store = run_store if run_store else RunStore(data_dir)
+
+        # Columnar index of the screening universe, loaded on first use
+        self.universe_file = os.path.join(data_dir, "universe.npz")
+        self._universe = None
+
         # Pre-defined ETF and index categories
         self.market_segments = {
             "us_broad_market": ["SPY", "VTI", "IVV"],  # S&P 500, Total Market, S&P 500
@@ -145,7 +185,21 @@ class DataCollectorAgent:
             ]
         }
 
+        # Known tickers, LLM proposals are checked against them before any download.
+        # A symbols.txt in the data directory replaces the shipped list
+        if symbols is None:
+            symbols_file = os.path.join(data_dir, "symbols.txt")
+            symbols = SymbolTable.load(symbols_file if os.path.exists(symbols_file) else DEFAULT_SYMBOLS_FILE)
+            for tickers in list(self.market_segments.values()) + list(self.individual_stocks.values()):
+                symbols.add(tickers)
+            symbols.add(self.provider.symbols())
+        self.symbols = symbols
+
+        # Tickers outside the table get one provider lookup instead of being dropped
+        self.symbol_verifier = SymbolVerifier(self.symbols, self.fundamentals, data_dir)
+
 
+    @instrumentation.traced()
     def get_market_data(self, tickers=None, period="1y", interval="1d"):
         """
         Retrive historical market data for specified tickers
@@ -173,18 +227,27 @@ class DataCollectorAgent:
                 tickers.extend(stocks[:2])
 
             
-        # Download historical data
-        data = yf.download(tickers, period=period, interval=interval, group_by="ticker")
+        # Get historical data, only missing bars are downloaded
+        data = self.price_cache.get_history(tickers, period=period, interval=interval)
 
-        # Save to CSV
+        # A failed download must not replace an earlier recording
+        if data.empty:
+            print(f"No market data for {len(tickers)} tickers: {', '.join(tickers)}")
+            return data
+
+        # Save to CSV, through a temporary file so concurrent runs never
+        # leave a half-written file behind
         file_name = os.path.join(self.data_dir, f"market_data_{interval}_{period}.csv")
-        data.to_csv(file_name)
+        temp_file = f"{file_name}.{uuid.uuid4().hex[:8]}.tmp"
+        data.to_csv(temp_file)
+        os.replace(temp_file, file_name)
 
         print(f"Downloaded data for {len(tickers)} tickers: {', '.join(tickers)}")
 
         return data 
     
 
+    @instrumentation.traced()
     def get_sector_stocks(self, sectors=None, count=5):
         """
         Get a selection of individual stocks from specified sectors.
@@ -210,6 +273,7 @@ class DataCollectorAgent:
 
         return stocks
     
+    @instrumentation.traced()
     def get_etf_info(self, etfs=None):
         """
         Get detailed information about ETFs
@@ -227,10 +291,14 @@ class DataCollectorAgent:
         
         etf_data = {}
 
+        # Fetch all ETFs concurrently, cached entries are reused
+        infos = self.fundamentals.get_info(etfs)
+
         for etf in etfs:
             try:
-                ticker = yf.Ticker(etf)
-                info = ticker.info
+                info = infos[etf]
+                if isinstance(info, Exception):
+                    raise info
 
                 etf_data[etf] = {
                     "name": info.get("shortName", "N/A"),
@@ -261,6 +329,7 @@ class DataCollectorAgent:
         return etf_data            
 
 
+    @instrumentation.traced()
     def get_stock_info(self, tickers=None):
         """
         Get detailed information about individual stocks
@@ -272,10 +341,14 @@ class DataCollectorAgent:
         
         stock_data = {}
 
+        # Fetch all stocks concurrently, cached entries are reused
+        infos = self.fundamentals.get_info(tickers)
+
         for ticker_symbol in tickers:
             try:
-                ticker = yf.Ticker(ticker_symbol)
-                info = ticker.info
+                info = infos[ticker_symbol]
+                if isinstance(info, Exception):
+                    raise info
 
                 stock_data[ticker_symbol] = {
                     "name": info.get("shortName", "N/A"),
@@ -286,6 +359,7 @@ class DataCollectorAgent:
                     "forward_pe": info.get("forwardPE", "N/A"),
                     "dividend_yield": info.get("dividendYield", "N/A"),
                     "beta": info.get("beta", "N/A"),
+                    "average_volume": info.get("averageVolume", "N/A"),
                     "52wk_high": info.get("fiftyTwoWeekHigh", "N/A"),
                     "52wk_low": info.get("fiftyTwoWeekLow", "N/A"),
                     "description": info.get("longBusinessSummary", "N/A")
@@ -303,9 +377,62 @@ class DataCollectorAgent:
 
 
 
-    def get_recommended_assets(self, risk_tolerance, time_horizon, focus_sectors=None):
+    @instrumentation.traced()
+    def refresh_universe(self, tickers=None):
+        """
+        Load the universe index and bring it up to date with the fundamentals
+
+        Only tickers with missing or expired fundamentals are fetched, the
+        index file is rewritten when a row changed.
+
+        Args:
+            tickers (list): Tickers to add or refresh, the indexed ones (or all
+                pre-defined stocks for a new index) by default
+
+        Returns:
+            UniverseIndex: The refreshed index
+        """
+        universe = self._universe if self._universe is not None else UniverseIndex.load(self.universe_file)
+
+        if tickers is None and not len(universe):
+            tickers = [ticker for stocks in self.individual_stocks.values() for ticker in stocks]
+
+        if universe.refresh(self.fundamentals, tickers):
+            universe.save(self.universe_file)
+
+        self._universe = universe
+        return universe
+
+    @instrumentation.traced()
+    def screen_stocks(self, sectors=None, count=10, by="market_cap", ascending=False, **bounds):
+        """
+        Screen the universe index by sector and fundamentals
+
+            agent.screen_stocks(["Technology"], count=5, min_market_cap=1e11, max_beta=1.5)
+
+        Args:
+            sectors (list): Sector names as reported by the provider, case-insensitive
+            count (int): Number of stocks to return
+            by (str): Attribute to rank by (market_cap, beta, pe_ratio, dividend_yield, average_volume)
+            ascending (bool): Rank the smallest values first
+            **bounds: min_<attribute> / max_<attribute> filters, inclusive
+
+        Returns:
+            list: Up to count ticker symbols, best first
+        """
+        universe = self._universe if self._universe is not None else self.refresh_universe()
+        return universe.top_k(count, by=by, ascending=ascending, sectors=sectors, **bounds)
+
+
+    @instrumentation.traced()
+    def get_recommended_assets(self, risk_tolerance, time_horizon, focus_sectors=None, on_asset=None, run_id=None):
         """
             Ask the LLM for recommended assets based on user preferences.
+
+            If on_asset is given the reply is streamed and on_asset(asset) is
+            called for every asset as soon as its JSON object is complete, so
+            callers can start fetching market data while the LLM is still
+            generating. The result is stored with run_id.
         
         """
 
@@ -334,59 +461,89 @@ class DataCollectorAgent:
 
         """
 
-        # Format instructions
-        format_instruction = """
-         Format your response as valid JSON like this:
-        ```json
-        [
-          {
-            "ticker": "AAPL",
-            "name": "Apple Inc.",
-            "type": "stock",
-            "justification": "Strong balance sheet and consistent returns."
-          },
-          ...
-        ]
-        ```
-        """
-
-        response = self.llm.get_structured_response(
-            prompt, 
-            system_prompt=system_prompt,
-            format_instructions=format_instruction
-        )
-
-        # Extract JSON from response
+        checked_assets = []
+        rejected = {}
+        streamed = None
+        if on_asset is not None:
+            parser = JSONArrayStreamParser()
+            chunks = []
+            for chunk in self.llm.get_structured_response_stream(
+                prompt,
+                system_prompt=system_prompt,
+                schema=RECOMMENDED_ASSETS_SCHEMA
+            ):
+                chunks.append(chunk)
+                for asset in parser.feed(chunk):
+                    # Incomplete assets and unknown tickers never reach the prefetcher
+                    known = self._known_asset(asset, rejected)
+                    checked_assets.append(known)
+                    if known:
+                        on_asset(known)
+            streamed = "".join(chunks)
+
+        # The reply is constrained to the schema, a bad one is repaired once.
+        # Streamed assets are already parsed and checked, if none of them was
+        # usable the streamed text goes through the repair path
         try:
-            json_start = response.find('[')
-            json_end = response.rfind(']') + 1
-            if json_start >= 0 and json_end > json_start:
-                json_str = response[json_start:json_end]
-                recommended_assets = json.loads(json_str)
+            if any(checked_assets):
+                recommended_assets = [asset for asset in checked_assets if asset]
             else:
-                # Try to find JSON if it's wrapped in code blocks
-                if "```json" in response:
-                    json_start = response.find("```json") + 7
-                    json_end = response.find("```", json_start)
-                    json_str = response[json_start:json_end].strip()
-                    recommended_assets = json.loads(json_str)
-                elif "```" in response:
-                    json_start = response.find("```") + 3
-                    json_end = response.find("```", json_start)
-                    json_str = response[json_start:json_end].strip()
-                    recommended_assets = json.loads(json_str)
-                else:
-                    raise ValueError("Could not find JSON in response")
-            
-            # Save to JSON
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = os.path.join(self.data_dir, f"recommended_assets_{timestamp}.json")
-            with open(filename, 'w') as f:
-                json.dump(recommended_assets, f, indent=4)
+                recommended_assets = self.llm.get_structured_response(
+                    prompt,
+                    system_prompt=system_prompt,
+                    schema=RECOMMENDED_ASSETS_SCHEMA,
+                    max_retries=1,
+                    response=streamed
+                )
+                recommended_assets = [
+                    asset for asset in (self._known_asset(a, rejected) for a in recommended_assets) if asset
+                ]
+
+            # Store with the run, a call outside of a run becomes its own run
+            if run_id is None:
+                run_id = self.run_store.new_run("recommended_assets")
+            self.run_store.save(run_id, "recommended_assets", recommended_assets)
+            if rejected:
+                self.run_store.save(run_id, "rejected_tickers", rejected)
             
             return recommended_assets
 
-        except Exception as e:
+        except SchemaError as e:
                 print(f"Error parsing LLM response: {e}")
-                print(f"Raw response: {response}")
-                return []
\ No newline at end of file
+                print(f"Raw response: {e.response}")
+                return []
+
+    def _known_asset(self, asset, rejected):
+        """
+        Check a recommended asset against the schema and its ticker against the symbol table
+
+        Args:
+            asset (dict): Asset as proposed by the LLM
+            rejected (dict): Collects unlisted tickers and their suggested replacements
+
+        Returns:
+            dict: The asset with the known ticker spelling, None if the ticker is unknown
+        """
+        # Streamed objects are not validated as a whole reply, check each one
+        errors = json_schema.validate(asset, RECOMMENDED_ASSETS_SCHEMA["items"], path="asset")
+        if errors:
+            print(f"Skipping invalid asset {asset}: {'; '.join(errors)}")
+            return None
+
+        # Without a symbol list nothing can be checked
+        if not len(self.symbols):
+            return asset
+
+        ticker = asset["ticker"]
+        symbol = self.symbols.resolve(ticker)
+        if symbol is None:
+            symbol = self.symbol_verifier.verify(ticker)
+        if symbol is None:
+            suggestions = self.symbols.suggest(ticker)
+            rejected[ticker] = suggestions
+            instrumentation.count("rejected_tickers")
+            hint = f", did you mean {', '.join(suggestions)}?" if suggestions else ""
+            print(f"Skipping ticker {ticker}, neither in the symbol table nor listed by the provider{hint}")
+            return None
+
+        return asset if symbol == ticker else {**asset, "ticker": symbol}
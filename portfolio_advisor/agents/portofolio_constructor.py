@@ -4,6 +4,12 @@ import numpy as np
 import pandas as pd
 from datetime import datetime
 from portfolio_advisor.models.base_model import FinancialAdvisorLLM
+from portfolio_advisor.agents.risk_assesment import VOLATILITY_RANGES
+from portfolio_advisor.utils import instrumentation
+from portfolio_advisor.utils.factor_model import FactorCovariance
+from portfolio_advisor.utils.frontier import EfficientFrontier
+from portfolio_advisor.utils.optimizer import PortfolioOptimizer
+from portfolio_advisor.utils.risk_metrics import annualize_factor
 
 class PortfolioConstructorAgent:
     """Agent responsible for creating the final portfolio recommendations"""
@@ -14,7 +20,14 @@ class PortfolioConstructorAgent:
         
         # Initialize LLM
         self.llm = llm if llm else FinancialAdvisorLLM()
+
+        # Optimizer keeps the last solution per asset set for warm starts
+        self.optimizer = PortfolioOptimizer()
+
+        # Frontiers are cached per covariance snapshot and shared by all risk levels
+        self.frontier = EfficientFrontier()
     
+    @instrumentation.traced()
     def create_allocation_template(self, assets, risk_level, time_horizon):
         """
         Create a template for asset allocation based on risk level
@@ -60,7 +73,10 @@ class PortfolioConstructorAgent:
             
         return allocation_template
     
-    def generate_allocation(self, assets, asset_info, risk_metrics, risk_level, time_horizon):
+    @instrumentation.traced()
+    def generate_allocation(self, assets, asset_info, risk_metrics, risk_level, time_horizon,
+                            method="equal", correlation_matrix=None, risk_aversion=None, max_weight=None,
+                            interval="1d"):
         """
         Generate specific allocation percentages for the given assets
         
@@ -70,10 +86,23 @@ class PortfolioConstructorAgent:
             risk_metrics (pd.DataFrame): Risk metrics for assets
             risk_level (int): Risk tolerance (1-10)
             time_horizon (int): Investment time horizon in years
+            method (str): "equal" splits each template bucket equally,
+                "min_variance" or "mean_variance" optimize the weights inside
+                each bucket using the volatilities and correlations, "frontier"
+                picks the efficient frontier point matching the risk level
+            correlation_matrix (pd.DataFrame): Correlations, required by the optimizer methods
+            risk_aversion (float, optional): Variance penalty for "mean_variance", against
+                annual expected returns and the annualized covariance. Derived from the
+                risk level by default (20 at level 1, 2 at level 10)
+            max_weight (float, optional): Upper bound for a single asset's weight
+            interval (str): Data interval the risk metrics were computed from
             
         Returns:
             dict: Allocation percentages for each asset
         """
+        if method == "frontier":
+            return self.frontier_allocation(assets, risk_metrics, correlation_matrix, risk_level, max_weight, interval)
+
         # Get allocation template
         template = self.create_allocation_template(assets, risk_level, time_horizon)
         
@@ -153,5 +182,120 @@ class PortfolioConstructorAgent:
         if total > 0:
             for ticker in allocations:
                 allocations[ticker] = allocations[ticker] / total
+
+        # Optimize the weights inside each bucket, keeping the bucket totals
+        if method != "equal":
+            allocations = self._optimize_allocation(
+                allocations, [stocks, bonds, others], risk_metrics, correlation_matrix,
+                method, risk_level, risk_aversion, max_weight, interval
+            )
         
-        return allocations
\ No newline at end of file
+        return allocations
+
+    @instrumentation.traced()
+    def frontier_allocation(self, assets, risk_metrics, correlation_matrix, risk_level, max_weight=None, interval="1d"):
+        """
+        Allocate along the efficient frontier of the assets
+
+        The frontier is solved once per covariance snapshot, every risk level
+        then only selects the point closest to its volatility band.
+
+        Args:
+            assets (list): List of asset tickers
+            risk_metrics (pd.DataFrame): Risk metrics for assets
+            correlation_matrix (pd.DataFrame): Correlations between the assets
+            risk_level (int): Risk tolerance (1-10)
+            max_weight (float, optional): Upper bound for a single asset's weight
+            interval (str): Data interval the risk metrics were computed from
+
+        Returns:
+            dict: Allocation percentages for each asset
+        """
+        if correlation_matrix is None:
+            raise ValueError("Allocation method frontier requires a correlation matrix")
+
+        tickers = [
+            t for t in assets
+            if t in correlation_matrix.index and t in risk_metrics.index
+            and np.isfinite(risk_metrics.at[t, "volatility"])
+        ]
+        if not tickers:
+            return {}
+
+        covariance = self._covariance(tickers, risk_metrics, correlation_matrix)
+        expected_returns = self._expected_returns(tickers, risk_metrics, interval)
+        frontier = self.frontier.compute(tickers, covariance, expected_returns, max_weight)
+
+        min_vol, max_vol = VOLATILITY_RANGES.get(risk_level, VOLATILITY_RANGES[5])
+        return frontier.allocation(frontier.select(min_vol, max_vol))
+
+    def _expected_returns(self, tickers, risk_metrics, interval):
+        """
+        Annual expected returns, on the same scale as the annualized covariance
+
+        avg_return is the mean return per bar times the square root of the
+        bars per year, one more factor of it turns it into an annual return.
+        """
+        avg_returns = risk_metrics.loc[tickers, "avg_return"].fillna(0).values
+        return avg_returns * annualize_factor(interval)
+
+    def _covariance(self, tickers, risk_metrics, correlation_matrix):
+        """Covariance matrix from the correlations and annualized volatilities"""
+        volatilities = risk_metrics.loc[tickers, "volatility"].values
+        if isinstance(correlation_matrix, FactorCovariance):
+            # The optimizers need the dense matrix, but only of the selected assets
+            correlation_matrix = correlation_matrix.subset(tickers).to_dense()
+        correlations = correlation_matrix.loc[tickers, tickers].fillna(0).values.copy()
+        np.fill_diagonal(correlations, 1.0)
+        return correlations * np.outer(volatilities, volatilities)
+
+    def _optimize_allocation(self, allocations, groups, risk_metrics, correlation_matrix,
+                             method, risk_level, risk_aversion, max_weight, interval):
+        """Replace the equal split of each bucket with optimized weights"""
+        if method not in ("min_variance", "mean_variance"):
+            raise ValueError(f"Unknown allocation method: {method}")
+        if correlation_matrix is None:
+            raise ValueError(f"Allocation method {method} requires a correlation matrix")
+
+        # Only assets with usable risk data take part, the others keep their weight
+        tickers = []
+        buckets = []
+        for bucket, group in enumerate(groups):
+            for ticker in group:
+                if ticker in correlation_matrix.index and ticker in risk_metrics.index \
+                        and np.isfinite(risk_metrics.at[ticker, "volatility"]):
+                    tickers.append(ticker)
+                    buckets.append(bucket)
+
+        if len(tickers) < 2:
+            return allocations
+
+        buckets = np.array(buckets)
+        budgets = np.bincount(buckets, [allocations[t] for t in tickers], minlength=len(groups))
+
+        covariance = self._covariance(tickers, risk_metrics, correlation_matrix)
+
+        expected_returns = None
+        if method == "mean_variance":
+            # Annual returns, the same scale as the covariance the variance penalty applies to
+            expected_returns = self._expected_returns(tickers, risk_metrics, interval)
+            if risk_aversion is None:
+                risk_aversion = 2.0 * (11 - risk_level)
+        else:
+            risk_aversion = 1.0
+
+        weights = self.optimizer.solve(
+            covariance,
+            buckets,
+            budgets,
+            expected_returns=expected_returns,
+            risk_aversion=risk_aversion,
+            max_weight=max_weight,
+            key=(method, tuple(tickers))
+        )
+
+        optimized = dict(allocations)
+        for ticker, weight in zip(tickers, weights):
+            optimized[ticker] = float(weight)
+
+        return optimized
\ No newline at end of file
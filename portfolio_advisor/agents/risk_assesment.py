@@ -1,22 +1,67 @@
-import pandas as pd
 import numpy as np
 import json
+import hashlib
 import os
-from datetime import datetime
-import yfinance as yf
 from portfolio_advisor.models.base_model import FinancialAdvisorLLM
+from portfolio_advisor.utils import instrumentation
+from portfolio_advisor.utils.backtest import run_backtest
+from portfolio_advisor.utils.factor_model import FactorCovariance
+from portfolio_advisor.utils.json_schema import SchemaError
+from portfolio_advisor.utils.market_data import YahooFinanceProvider
+from portfolio_advisor.utils.online_covariance import OnlineCovariance
+from portfolio_advisor.utils.price_cache import PriceCache
+from portfolio_advisor.utils.risk_metrics import compute_risk_metrics, price_matrix
+from portfolio_advisor.utils.run_store import RunStore
+from portfolio_advisor.utils.rolling import rolling_correlation, rolling_drawdown, rolling_returns, rolling_volatility
+from portfolio_advisor.utils.simulation import simulate_wealth
+
+# Acceptable annualized portfolio volatility per risk tolerance
+# Higher risk tolerance = higher acceptable volatility
+VOLATILITY_RANGES = {
+    1: (0.00, 0.05),  # Very conservative
+    2: (0.03, 0.07),
+    3: (0.05, 0.09),
+    4: (0.07, 0.11),
+    5: (0.09, 0.13),  # Moderate
+    6: (0.11, 0.15),
+    7: (0.13, 0.17),
+    8: (0.15, 0.20),
+    9: (0.18, 0.25),
+    10: (0.22, 0.35)  # Very aggressive
+}
+
+# Shape of get_risk_analysis replies, enforced by Ollama's constrained decoding
+RISK_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "appropriate_assets": {"type": "array", "items": {"type": "string"}},
+        "too_risky_assets": {"type": "array", "items": {"type": "string"}},
+        "too_conservative_assets": {"type": "array", "items": {"type": "string"}},
+        "portfolio_strategy": {"type": "string"},
+        "reasoning": {"type": "string"}
+    },
+    "required": ["appropriate_assets", "too_risky_assets", "too_conservative_assets", "portfolio_strategy", "reasoning"]
+}
 
 class RiskAssessmentAgent:
     """Agent responsible for assessing risk of recommended assets"""
     
-    def __init__(self, llm=None, data_dir="./data"):
+    def __init__(self, llm=None, data_dir="./data", price_cache=None, provider=None, run_store=None):
         self.data_dir = data_dir
         os.makedirs(self.data_dir, exist_ok=True)
         
         # Initialize LLM
         self.llm = llm if llm else FinancialAdvisorLLM()
+
+        # Market data source and shared price history cache
+        self.provider = provider if provider else YahooFinanceProvider()
+        self.price_cache = price_cache if price_cache else PriceCache(data_dir, provider=self.provider)
+
+        # Results are stored per run instead of timestamped files
+        self.run_store = run_store if run_store else RunStore(data_dir)
     
-    def calculate_risk_metrics(self, tickers, period="1y", interval="1d"):
+    @instrumentation.traced()
+    def calculate_risk_metrics(self, tickers, period="1y", interval="1d", metrics=None, benchmark="SPY", run_id=None):
         """
         Calculate key risk metrics for a list of tickers
         
@@ -24,72 +69,40 @@ class RiskAssessmentAgent:
             tickers (list): List of ticker symbols
             period (str): Time period for historical data
             interval (str): Data interval
+            metrics (list, optional): Metric names from ALL_RISK_METRICS,
+                defaults to volatility, max_drawdown, avg_return, sharpe_ratio
+                and downside_deviation
+            benchmark (str): Benchmark ticker for the beta metric
+            run_id (str, optional): Run the result is stored with
             
         Returns:
             pd.DataFrame: Risk metrics for each asset
         """
-        # Download historical data
-        data = yf.download(tickers, period=period, interval=interval, group_by="ticker")
-        
-        # Initialize results DataFrame
-        risk_metrics = pd.DataFrame(index=tickers)
-        
-        # Calculate metrics for each ticker
-        for ticker in tickers:
-            try:
-                # Get price data for this ticker
-                if len(tickers) > 1:
-                    # For multiple tickers, data is structured with tickers as the first level
-                    if 'Adj Close' in data[ticker].columns:
-                        prices = data[ticker]['Adj Close']
-                    else:
-                        # If Adj Close is not available, use Close
-                        prices = data[ticker]['Close']
-                else:
-                    # For a single ticker, data doesn't have ticker as the first level
-                    if 'Adj Close' in data.columns:
-                        prices = data['Adj Close']
-                    else:
-                        prices = data['Close']
-                
-                # Calculate returns
-                returns = prices.pct_change().dropna()
-                
-                # Annualization factor
-                if interval == "1d":
-                    annualize_factor = np.sqrt(252)  # Trading days in a year
-                elif interval == "1wk":
-                    annualize_factor = np.sqrt(52)   # Weeks in a year
-                elif interval == "1mo":
-                    annualize_factor = np.sqrt(12)   # Months in a year
-                else:
-                    annualize_factor = 1
-                
-                # Calculate metrics
-                risk_metrics.at[ticker, "volatility"] = returns.std() * annualize_factor
-                risk_metrics.at[ticker, "max_drawdown"] = (prices / prices.cummax() - 1).min()
-                risk_metrics.at[ticker, "avg_return"] = returns.mean() * annualize_factor
-                risk_metrics.at[ticker, "sharpe_ratio"] = (returns.mean() / returns.std()) * annualize_factor if returns.std() > 0 else 0
-                
-                # Calculate downside deviation (only negative returns)
-                negative_returns = returns[returns < 0]
-                if len(negative_returns) > 0:
-                    risk_metrics.at[ticker, "downside_deviation"] = negative_returns.std() * annualize_factor
-                else:
-                    risk_metrics.at[ticker, "downside_deviation"] = 0
-                
-            except Exception as e:
-                print(f"Error calculating metrics for {ticker}: {e}")
-                risk_metrics.loc[ticker] = np.nan
+        # The benchmark is only fetched when beta is requested
+        fetch = list(tickers)
+        if metrics and "beta" in metrics and benchmark not in fetch:
+            fetch.append(benchmark)
+
+        # Get historical data from the shared cache
+        data = self.price_cache.get_history(fetch, period=period, interval=interval)
+        
+        # Calculate metrics for all tickers at once on the aligned price matrix
+        prices = price_matrix(data, fetch)
+        benchmark_prices = prices[benchmark] if benchmark in prices.columns else None
+        risk_metrics = compute_risk_metrics(
+            prices[list(tickers)], interval=interval, metrics=metrics, benchmark=benchmark_prices
+        )
+
+        for ticker in risk_metrics.index[risk_metrics.isna().all(axis=1)]:
+            print(f"Error calculating metrics for {ticker}: no price data")
         
-        # Save to CSV
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = os.path.join(self.data_dir, f"risk_metrics_{timestamp}.csv")
-        risk_metrics.to_csv(filename)
+        self._store_result(run_id, "risk_metrics", risk_metrics)
         
         return risk_metrics
     
-    def calculate_correlation_matrix(self, tickers, period="1y", interval="1d"):
+    @instrumentation.traced()
+    def calculate_correlation_matrix(self, tickers, period="1y", interval="1d", incremental=False, decay=None,
+                                     factors=None, run_id=None):
         """
         Calculate correlation matrix between assets
         
@@ -97,50 +110,119 @@ class RiskAssessmentAgent:
             tickers (list): List of ticker symbols
             period (str): Time period for historical data
             interval (str): Data interval
+            incremental (bool): Update a persisted online estimator with the new
+                return rows only, instead of recomputing from the whole period.
+                The estimate then covers all rows seen since its first run.
+            decay (float, optional): EWMA decay per row for the incremental estimator
+            factors (int, optional): Return a FactorCovariance with this many
+                statistical factors instead of the dense N x N matrix, for
+                large universes
+            run_id (str, optional): Run the result is stored with
             
         Returns:
-            pd.DataFrame: Correlation matrix
+            pd.DataFrame | FactorCovariance: Correlation matrix
         """
-        # Download historical data
-        data = yf.download(tickers, period=period, interval=interval, group_by="ticker")
-        
-        # Initialize returns DataFrame
-        returns = pd.DataFrame(index=data.index)
-        
-        # Extract returns for each ticker
-        for ticker in tickers:
-            try:
-                # Get price data for this ticker
-                if 'Adj Close' in data[ticker].columns:
-                    price_series = data[ticker]['Adj Close']
-                else:
-                    price_series = data[ticker]['Close']
-                    
-                # Calculate returns and add to the DataFrame
-                returns[ticker] = price_series.pct_change()
-            except Exception as e:
-                print(f"Error processing {ticker} for correlation: {e}")
+        # Get historical data from the shared cache
+        data = self.price_cache.get_history(tickers, period=period, interval=interval)
+        
+        # Calculate returns for all tickers that have price data
+        prices = price_matrix(data, tickers)
+        for ticker in prices.columns[prices.isna().all()]:
+            print(f"Error processing {ticker} for correlation: no price data")
+        prices = prices.dropna(axis=1, how="all")
+        returns = prices / prices.shift(1) - 1
+
+        if factors:
+            # O(N x K) model, assets with gaps keep the rows they have
+            factor_model = FactorCovariance.fit(returns.iloc[1:], n_factors=factors)
+            self._store_result(run_id, "factor_model", factor_model.to_frame())
+            return factor_model
         
         # Drop NA values (first row will have NaN due to pct_change)
         returns = returns.dropna()
         
         # Calculate correlation matrix
-        correlation_matrix = returns.corr()
+        if incremental:
+            correlation_matrix = self._incremental_correlation(returns, interval, decay)
+        else:
+            correlation_matrix = returns.corr()
         
-        # Save to CSV
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = os.path.join(self.data_dir, f"correlation_matrix_{timestamp}.csv")
-        correlation_matrix.to_csv(filename)
+        self._store_result(run_id, "correlation_matrix", correlation_matrix)
         
         return correlation_matrix
     
+    @instrumentation.traced()
+    def calculate_rolling_risk(self, tickers, windows=(30, 90, 252), period="2y", interval="1d", correlation=True):
+        """
+        Calculate rolling volatility, drawdown and correlation for every window length
+
+        Args:
+            tickers (list): List of ticker symbols
+            windows (tuple): Window lengths in bars
+            period (str): Time period for historical data
+            interval (str): Data interval
+            correlation (bool): Also compute the T x N x N rolling correlations
+
+        Returns:
+            dict: For each window a dict with "volatility" and "drawdown"
+                (date x ticker DataFrames) and "correlation" (RollingCorrelation)
+        """
+        # Get historical data from the shared cache
+        data = self.price_cache.get_history(tickers, period=period, interval=interval)
+
+        prices = price_matrix(data, tickers)
+        for ticker in prices.columns[prices.isna().all()]:
+            print(f"Error processing {ticker} for rolling risk: no price data")
+        prices = prices.dropna(axis=1, how="all")
+        returns = rolling_returns(prices)
+
+        rolling_risk = {}
+        for window in windows:
+            rolling_risk[window] = {
+                "volatility": rolling_volatility(returns, window, interval=interval),
+                "drawdown": rolling_drawdown(prices, window),
+                "correlation": rolling_correlation(returns, window) if correlation else None
+            }
+
+        return rolling_risk
+
+    def _incremental_correlation(self, returns, interval, decay):
+        """Feed only the rows newer than the persisted estimator state into it"""
+        tickers = sorted(returns.columns)
+        key = hashlib.sha1(json.dumps([tickers, decay]).encode("utf-8")).hexdigest()[:16]
+        state_dir = os.path.join(self.price_cache.cache_dir, interval)
+        state_file = os.path.join(state_dir, f"correlation_state_{key}.npz")
+
+        if os.path.exists(state_file):
+            estimator = OnlineCovariance.load(state_file)
+        else:
+            estimator = OnlineCovariance(tickers, decay=decay)
+
+        new_returns = returns[tickers]
+        if estimator.last_timestamp is not None:
+            new_returns = new_returns[new_returns.index > estimator.last_timestamp]
+
+        estimator.update(new_returns.values, new_returns.index)
+        os.makedirs(state_dir, exist_ok=True)
+        estimator.save(state_file)
+
+        columns = list(returns.columns)
+        return estimator.correlation().loc[columns, columns]
+    
+    def _store_result(self, run_id, name, value):
+        """Append a result to the run, a call outside of a run becomes its own run"""
+        if run_id is None:
+            run_id = self.run_store.new_run(name)
+        self.run_store.save(run_id, name, value)
+
+    @instrumentation.traced()
     def assess_portfolio_risk(self, risk_metrics, correlation_matrix, asset_allocations):
         """
         Assess risk of the entire portfolio
         
         Args:
             risk_metrics (pd.DataFrame): Risk metrics for individual assets
-            correlation_matrix (pd.DataFrame): Correlation matrix between assets
+            correlation_matrix (pd.DataFrame | FactorCovariance): Correlations between assets
             asset_allocations (dict): Allocation percentages for each asset
             
         Returns:
@@ -165,18 +247,19 @@ class RiskAssessmentAgent:
         # Ensure weights sum to 1
         weights = weights / weights.sum()
         
-        # Filter metrics and correlation for our tickers
+        # Filter metrics for our tickers, replace NaN with 0 for calculations
         filtered_metrics = risk_metrics.loc[tickers].copy()
-        filtered_corr = correlation_matrix.loc[tickers, tickers].copy()
-        
-        # Replace NaN with 0 for calculations
         filtered_metrics = filtered_metrics.fillna(0)
-        filtered_corr = filtered_corr.fillna(0)
         
         # Calculate portfolio volatility
         try:
             asset_vols = filtered_metrics["volatility"].values
-            port_variance = np.dot(weights.T, np.dot(filtered_corr.values * np.outer(asset_vols, asset_vols), weights))
+            if isinstance(correlation_matrix, FactorCovariance):
+                # O(N x K), the N x N matrix is never built
+                port_variance = correlation_matrix.subset(tickers).portfolio_variance(weights * asset_vols)
+            else:
+                filtered_corr = correlation_matrix.loc[tickers, tickers].fillna(0)
+                port_variance = np.dot(weights.T, np.dot(filtered_corr.values * np.outer(asset_vols, asset_vols), weights))
             port_volatility = np.sqrt(port_variance)
         except Exception as e:
             print(f"Error calculating portfolio volatility: {e}")
@@ -213,6 +296,85 @@ class RiskAssessmentAgent:
         
         return portfolio_metrics
     
+    @instrumentation.traced()
+    def backtest_allocations(self, allocations, period="1y", interval="1d", rebalance="monthly",
+                             threshold=0.05, benchmark="SPY"):
+        """
+        Backtest one or many allocations against a benchmark
+
+        Args:
+            allocations (dict | pd.DataFrame): One allocation (ticker -> weight)
+                or one row per candidate portfolio
+            period (str): Time period for historical data
+            interval (str): Data interval
+            rebalance (str): "none", "monthly", "quarterly" or "threshold"
+            threshold (float): Weight drift that triggers a threshold rebalance
+            benchmark (str, optional): Benchmark ticker, None to skip the comparison
+
+        Returns:
+            BacktestResult: NAV, drawdowns, turnover and metrics per portfolio
+        """
+        if isinstance(allocations, dict):
+            tickers = [t for t, w in allocations.items() if w]
+        else:
+            tickers = list(allocations.columns[(allocations.fillna(0) != 0).any()])
+        fetch = tickers + [benchmark] if benchmark and benchmark not in tickers else tickers
+
+        data = self.price_cache.get_history(fetch, period=period, interval=interval)
+        prices = price_matrix(data, fetch)
+
+        benchmark_prices = None
+        if benchmark:
+            if prices[benchmark].notna().any():
+                benchmark_prices = prices[benchmark]
+            else:
+                print(f"Error loading benchmark {benchmark}: no price data")
+
+        return run_backtest(
+            prices[tickers],
+            allocations,
+            rebalance=rebalance,
+            threshold=threshold,
+            benchmark=benchmark_prices,
+            interval=interval
+        )
+
+    @instrumentation.traced()
+    def simulate_portfolio(self, allocations, investment_amount, time_horizon, period="1y", interval="1d",
+                           mode="parametric", n_paths=10000, seed=None):
+        """
+        Project the portfolio's wealth over the investment horizon
+
+        Args:
+            allocations (dict): Portfolio weight per ticker
+            investment_amount (float): Starting wealth
+            time_horizon (float): Investment horizon in years
+            period (str): Time period of the historical returns
+            interval (str): Data interval
+            mode (str): "parametric" (GBM) or "bootstrap" (historical blocks)
+            n_paths (int): Number of simulated paths
+            seed (int, optional): Seed for reproducible results
+
+        Returns:
+            dict: Wealth percentiles and shortfall probabilities
+        """
+        tickers = [t for t, w in allocations.items() if w]
+        data = self.price_cache.get_history(tickers, period=period, interval=interval)
+        prices = price_matrix(data, tickers).dropna(axis=1, how="all")
+        returns = prices / prices.shift(1) - 1
+
+        return simulate_wealth(
+            returns,
+            allocations,
+            investment_amount,
+            time_horizon,
+            mode=mode,
+            n_paths=n_paths,
+            interval=interval,
+            seed=seed
+        )
+
+    @instrumentation.traced()
     def assess_risk_tolerance_match(self, portfolio_metrics, user_risk_tolerance):
         """
         Assess whether portfolio risk matches user's risk tolerance
@@ -224,23 +386,8 @@ class RiskAssessmentAgent:
         Returns:
             dict: Risk assessment
         """
-        # Convert risk tolerance to expected volatility range
-        # Higher risk tolerance = higher acceptable volatility
-        volatility_ranges = {
-            1: (0.00, 0.05),  # Very conservative
-            2: (0.03, 0.07),
-            3: (0.05, 0.09),
-            4: (0.07, 0.11),
-            5: (0.09, 0.13),  # Moderate
-            6: (0.11, 0.15),
-            7: (0.13, 0.17),
-            8: (0.15, 0.20),
-            9: (0.18, 0.25),
-            10: (0.22, 0.35)  # Very aggressive
-        }
-        
         # Get volatility range for user's risk tolerance
-        min_vol, max_vol = volatility_ranges.get(user_risk_tolerance, (0.09, 0.13))
+        min_vol, max_vol = VOLATILITY_RANGES.get(user_risk_tolerance, VOLATILITY_RANGES[5])
         portfolio_vol = portfolio_metrics["volatility"]
         
         # Check if portfolio volatility is within acceptable range
@@ -263,13 +410,15 @@ class RiskAssessmentAgent:
         
         return assessment
     
-    def get_risk_analysis(self, risk_metrics, user_risk_tolerance):
+    @instrumentation.traced()
+    def get_risk_analysis(self, risk_metrics, user_risk_tolerance, run_id=None):
         """
         Get LLM-generated risk analysis of assets
         
         Args:
             risk_metrics (pd.DataFrame): Risk metrics for assets
             user_risk_tolerance (int): User's risk tolerance (1-10)
+            run_id (str, optional): Run the result is stored with
             
         Returns:
             dict: Risk analysis
@@ -305,39 +454,22 @@ class RiskAssessmentAgent:
         ```
         """
         
-        response = self.llm.get_structured_response(prompt, system_prompt=system_prompt)
-        
-        # Parse JSON from response
+        # Parse and validate the constrained reply, a bad one is repaired once
         try:
-            if "```json" in response:
-                json_start = response.find("```json") + 8
-                json_end = response.find("```", json_start)
-                json_str = response[json_start:json_end].strip()
-            elif "```" in response:
-                json_start = response.find("```") + 3
-                json_end = response.find("```", json_start)
-                json_str = response[json_start:json_end].strip()
-            else:
-                json_start = response.find('{')
-                json_end = response.rfind('}') + 1
-                json_str = response[json_start:json_end]
-                
-            risk_analysis = json.loads(json_str)
+            risk_analysis = self.llm.get_structured_response(
+                prompt, system_prompt=system_prompt, schema=RISK_ANALYSIS_SCHEMA, max_retries=1
+            )
             
-            # Save to JSON
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = os.path.join(self.data_dir, f"risk_analysis_{timestamp}.json")
-            with open(filename, 'w') as f:
-                json.dump(risk_analysis, f, indent=4)
+            self._store_result(run_id, "risk_analysis", risk_analysis)
                 
             return risk_analysis
-        except Exception as e:
+        except SchemaError as e:
             print(f"Error parsing LLM response: {e}")
-            print(f"Raw response: {response}")
+            print(f"Raw response: {e.response}")
             return {
                 "appropriate_assets": [],
                 "too_risky_assets": [],
                 "too_conservative_assets": [],
                 "portfolio_strategy": "Error in processing response",
                 "reasoning": "Could not parse structured data from the LLM response."
-            }
\ No newline at end of file
+            }
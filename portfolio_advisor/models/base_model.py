@@ -1,4 +1,20 @@
-import ollama
+from portfolio_advisor.utils import instrumentation
+from portfolio_advisor.utils import json_schema
+from portfolio_advisor.utils.lazy_import import lazy_import
+
+# The ollama client is imported on the first request
+ollama = lazy_import("ollama")
+
+# Ollama response fields recorded when instrumentation is enabled:
+# field -> (counter name, scale), durations are reported in nanoseconds
+OLLAMA_METRICS = {
+    "eval_count": ("ollama_eval_tokens", 1),
+    "prompt_eval_count": ("ollama_prompt_eval_tokens", 1),
+    "eval_duration": ("ollama_eval_seconds", 1e-9),
+    "prompt_eval_duration": ("ollama_prompt_eval_seconds", 1e-9),
+    "load_duration": ("ollama_load_seconds", 1e-9),
+    "total_duration": ("ollama_total_seconds", 1e-9)
+}
 
 class FinancialAdvisorLLM:
     """
@@ -6,21 +22,97 @@ class FinancialAdvisorLLM:
         Uses the Ollama API to send messages and receive responses.
     """
 
-    def __init__(self, model_name="llama3:latest"):
+    def __init__(self, model_name="llama3:latest", cache=None, keep_alive=None):
         """
             Initializes the FinancialAdvisorLLM with a specified model name.
+            An optional ResponseCache reuses responses of deterministic
+            (temperature 0) calls. keep_alive (e.g. "30m", or -1 for ever)
+            tells Ollama how long to keep the model loaded after a request,
+            None uses the server default.
         """
         self.model_name = model_name
+        self.cache = cache
+        self.keep_alive = keep_alive
 
 
-    def ask(self, question, system_prompt=None, temperature=0.0):
+    @instrumentation.traced()
+    def ask(self, question, system_prompt=None, temperature=0.0, format=None):
 
         """
             Asks the financial advisor LLM for an answer to the given question.
+            format ("json" or a JSON schema) constrains the answer to valid
+            JSON of that shape.
             Returns:
                 str: The response from the LLM.
         """
 
+        messages, options, cache_key, cached = self._prepare(question, system_prompt, temperature, format)
+        if cached is not None:
+            return cached
+
+        # Call the Ollama API
+        with instrumentation.span("ollama.chat", model=self.model_name) as chat_span:
+            response = ollama.chat(
+                self.model_name,
+                messages=messages,
+                options=options,
+                **self._chat_kwargs(format)
+            )
+            if instrumentation.is_enabled():
+                self._record_metrics(response, chat_span)
+
+        content = response['message']['content']
+        if cache_key is not None:
+            self.cache.put(cache_key, content)
+
+        return content
+    
+
+    @instrumentation.traced()
+    def ask_stream(self, question, system_prompt=None, temperature=0.0, format=None):
+        """
+            Asks the financial advisor LLM and yields the answer as it is generated.
+            Cached responses are yielded in a single chunk. format constrains
+            the answer like in ask().
+            Yields:
+                str: The next part of the response from the LLM.
+        """
+
+        messages, options, cache_key, cached = self._prepare(question, system_prompt, temperature, format)
+        if cached is not None:
+            yield cached
+            return
+
+        # Call the Ollama API in streaming mode
+        chunks = []
+        with instrumentation.span("ollama.chat", model=self.model_name, stream=True) as chat_span:
+            chunk = None
+            for chunk in ollama.chat(
+                self.model_name,
+                messages=messages,
+                options=options,
+                stream=True,
+                **self._chat_kwargs(format)
+            ):
+                content = chunk['message']['content']
+                chunks.append(content)
+                yield content
+
+            # The final chunk carries the token counts and durations
+            if chunk is not None and instrumentation.is_enabled():
+                self._record_metrics(chunk, chat_span)
+
+        # Only complete responses are cached
+        if cache_key is not None:
+            self.cache.put(cache_key, "".join(chunks))
+
+    def _prepare(self, question, system_prompt, temperature, format=None):
+        """
+            Build the chat request shared by ask and ask_stream
+
+            Returns:
+                tuple: (messages, options, cache key or None, cached response or None)
+        """
         messages = []
 
         # Add system prompt if provided
@@ -29,23 +121,67 @@ class FinancialAdvisorLLM:
                 'role': 'system',
                 'content': system_prompt
             })
-        
+
         # Add user question
         messages.append({
             'role': 'user',
             'content': question
         })
 
-        # Call the Ollama API
-        response = ollama.chat(
-            self.model_name,
-            messages=messages,
-            options={"temperature": temperature}
-        )
+        options = {"temperature": temperature}
 
+        # Only deterministic calls can be answered from the cache
+        cache_key = None
+        cached = None
+        if self.cache is not None and temperature == 0:
+            cache_key = self._cache_key(system_prompt, question, options, format)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                instrumentation.count("llm_cache_hits", model=self.model_name)
 
-        return response['message']['content']
-    
+        return messages, options, cache_key, cached
+
+    def warm_up(self):
+        """
+            Load the model into memory ahead of the first request
+
+            Returns:
+                bool: True if the model was loaded
+        """
+        try:
+            # A chat without messages only loads the model
+            ollama.chat(self.model_name, messages=[], **self._chat_kwargs())
+            return True
+        except Exception as e:
+            print(f"Could not load {self.model_name}: {e}")
+            return False
+
+    def _record_metrics(self, response, chat_span):
+        """Count the tokens and durations Ollama reports for a response"""
+        instrumentation.count("ollama_requests", model=self.model_name)
+        for field, (counter, scale) in OLLAMA_METRICS.items():
+            try:
+                value = response.get(field)
+            except AttributeError:
+                value = None
+            if value:
+                chat_span.set(**{field: value})
+                instrumentation.count(counter, value * scale, model=self.model_name)
+
+    def _chat_kwargs(self, format=None):
+        """Extra arguments for ollama.chat, only set ones are passed"""
+        kwargs = {}
+        if self.keep_alive is not None:
+            kwargs["keep_alive"] = self.keep_alive
+        if format is not None:
+            kwargs["format"] = format
+        return kwargs
+
+    def _cache_key(self, system_prompt, question, options, format=None):
+        """Cache key of a request, constrained and free-form answers are kept apart"""
+        if format is not None:
+            options = {**options, "format": format}
+        return self.cache.make_key(self.model_name, system_prompt, question, options)
 
     def test_connection(self):
         """Test connection to the Ollama model"""
@@ -64,17 +200,30 @@ class FinancialAdvisorLLM:
             print(f"Ollama connection test failed: {e}")
             raise e
             
-    def get_structured_response(self, question, system_prompt=None, format_instructions=None):
+    def get_structured_response(self, question, system_prompt=None, format_instructions=None, schema=None, max_retries=1,
+                                response=None):
         """
             Get a response that follows specific formatting rules
+
+            With a JSON schema the answer is generated with Ollama's
+            constrained decoding, parsed and validated. An invalid answer is
+            sent back to the model with the validation errors, up to
+            max_retries times, and never cached.
         
             Args:
                 question (str): The question to ask
                 system_prompt (str, optional): System prompt for the model
                 format_instructions (str, optional): Instructions on how to format the response
+                schema (dict, optional): JSON schema the response must match
+                max_retries (int): Repair attempts after an invalid response
+                response (str, optional): Answer already generated for the question, e.g. a
+                    streamed one. It is validated and repaired instead of generating a new one
                 
             Returns:
-                str: The formatted response    
+                str: The formatted response, or the parsed JSON value if a schema is given
+
+            Raises:
+                SchemaError: If the response still does not match the schema after all retries
         """
 
 
@@ -82,6 +231,49 @@ class FinancialAdvisorLLM:
         if format_instructions:
             question = f"{question}\n\n{format_instructions}"
 
-        return self.ask(question, system_prompt=system_prompt, temperature=0.0)
-    
-    
\ No newline at end of file
+        if schema is None:
+            return self.ask(question, system_prompt=system_prompt, temperature=0.0)
+
+        prompt = question
+        for attempt in range(max_retries + 1):
+            if attempt > 0 or response is None:
+                response = self.ask(prompt, system_prompt=system_prompt, temperature=0.0, format=schema)
+            try:
+                return json_schema.parse(response, schema)
+            except json_schema.SchemaError as e:
+                error = e
+                instrumentation.count("llm_schema_failures", model=self.model_name)
+                if self.cache is not None:
+                    self.cache.discard(self._cache_key(system_prompt, prompt, {"temperature": 0.0}, schema))
+
+            # Show the model its answer and what is wrong with it
+            problems = "\n".join(f"- {message}" for message in error.errors[:10])
+            prompt = (
+                f"{question}\n\nYour previous answer was invalid:\n{response}\n\n"
+                f"Problems:\n{problems}\n\nAnswer again with JSON that fixes these problems."
+            )
+
+        raise error
+
+    def get_structured_response_stream(self, question, system_prompt=None, format_instructions=None, schema=None):
+        """
+            Streaming variant of get_structured_response
+
+            The schema constrains the generated text, the caller parses and
+            validates it.
+
+            Args:
+                question (str): The question to ask
+                system_prompt (str, optional): System prompt for the model
+                format_instructions (str, optional): Instructions on how to format the response
+                schema (dict, optional): JSON schema the response must match
+
+            Returns:
+                generator: Parts of the formatted response as they are generated
+        """
+
+        # Added formating instructions if needed
+        if format_instructions:
+            question = f"{question}\n\n{format_instructions}"
+
+        return self.ask_stream(question, system_prompt=system_prompt, temperature=0.0, format=schema)
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from portfolio_advisor.utils.instrumentation import _write_atomic
+
+
+class ResponseCache:
+    """
+        Persistent LRU cache of LLM responses.
+
+        Responses are keyed by model name, system prompt, user message and
+        options, so it must only be used for deterministic calls
+        (temperature 0). The least recently used entry is evicted once the
+        cache holds max_entries responses.
+    """
+
+    def __init__(self, path=None, max_entries=256):
+        """
+            Args:
+                path (str, optional): JSON file the cache is persisted to, in memory only if None
+                max_entries (int): Maximum number of cached responses
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._load()
+
+    @staticmethod
+    def make_key(model_name, system_prompt, question, options):
+        """Build the cache key for a request"""
+        payload = json.dumps([model_name, system_prompt, question, options], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Get a cached response
+
+        Returns:
+            str: The cached response, or None on a miss
+        """
+        with self._lock:
+            response = self._entries.get(key)
+            if response is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key, response):
+        """Store a response, evicting the least recently used ones if needed"""
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def discard(self, key):
+        """Remove a response, e.g. one that turned out to be invalid"""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def clear(self):
+        """Remove all cached responses and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self._save()
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries
+            }
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable LLM response cache: {e}")
+            return
+
+        # Entries are stored from least to most recently used
+        for key, response in entries[-self.max_entries:]:
+            self._entries[key] = response
+
+    def _save(self):
+        if not self.path:
+            return
+
+        # Through a unique temporary file, so a crash never leaves a truncated cache
+        # and caches of concurrent agents sharing the path do not collide
+        _write_atomic(self.path, json.dumps(list(self._entries.items())))
@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+
+from portfolio_advisor.utils.risk_metrics import PERIODS_PER_YEAR, annualize_factor
+
+REBALANCE_RULES = ("none", "monthly", "quarterly", "threshold")
+
+
+class BacktestResult:
+    """
+        Outcome of a backtest of K portfolios over T bars.
+
+        nav and drawdown are T x K DataFrames (NAV starts at 1), turnover is
+        the total one-way turnover of each portfolio and metrics has one row
+        per portfolio.
+    """
+
+    def __init__(self, nav, drawdown, turnover, metrics, benchmark_nav=None):
+        self.nav = nav
+        self.drawdown = drawdown
+        self.turnover = turnover
+        self.metrics = metrics
+        self.benchmark_nav = benchmark_nav
+
+
+def run_backtest(prices, weights, rebalance="none", threshold=0.05, benchmark=None, interval="1d"):
+    """
+    Simulate holding one or many target allocations over a price history
+
+    All portfolios are simulated together with array operations. Buy-and-hold
+    and calendar rebalancing need one matrix product over the whole history,
+    threshold rebalancing steps through time once for all portfolios.
+
+    Args:
+        prices (pd.DataFrame): Aligned T x N price matrix, one column per ticker
+        weights (dict | pd.Series | pd.DataFrame | np.ndarray): One allocation
+            (ticker -> weight) or K allocations (rows of a DataFrame indexed
+            by portfolio name, or a K x N array ordered like prices.columns)
+        rebalance (str): "none" (buy and hold), "monthly", "quarterly" or
+            "threshold" (whenever a weight drifts more than threshold away)
+        threshold (float): Absolute weight drift that triggers a rebalance
+        benchmark (pd.Series, optional): Benchmark prices, e.g. SPY
+        interval (str): Data interval used for annualization
+
+    Returns:
+        BacktestResult: NAV, drawdowns, turnover and metrics per portfolio
+    """
+    if rebalance not in REBALANCE_RULES:
+        raise ValueError(f"Unknown rebalance rule: {rebalance}")
+
+    labels, tickers, targets = _weight_matrix(weights, prices.columns)
+
+    # Start once every held asset has a price, carry prices over gaps
+    held = prices[tickers].ffill().dropna()
+    if len(held) < 2:
+        raise ValueError("Backtest needs at least two bars with prices for every held asset")
+    values = held.to_numpy(dtype=float)
+
+    if rebalance == "threshold":
+        nav, turnover = _threshold_nav(values, targets, threshold)
+    else:
+        starts = _rebalance_starts(held.index, rebalance)
+        nav, turnover = _calendar_nav(values, targets, starts)
+
+    nav = pd.DataFrame(nav, index=held.index, columns=labels)
+    drawdown = nav / nav.cummax() - 1
+    turnover = pd.Series(turnover, index=labels, name="turnover")
+
+    benchmark_nav = None
+    if benchmark is not None:
+        benchmark_nav = benchmark.reindex(held.index).ffill().bfill()
+        benchmark_nav = benchmark_nav / benchmark_nav.iloc[0]
+
+    metrics = _performance_metrics(nav, drawdown, turnover, benchmark_nav, interval)
+
+    return BacktestResult(nav, drawdown, turnover, metrics, benchmark_nav)
+
+
+def _weight_matrix(weights, columns):
+    """Normalize the allocations to labels, used tickers and a K x N target matrix"""
+    if isinstance(weights, dict):
+        weights = pd.Series(weights, dtype=float)
+    if isinstance(weights, pd.Series):
+        weights = weights.to_frame("portfolio").T
+    if isinstance(weights, np.ndarray):
+        weights = pd.DataFrame(np.atleast_2d(weights), columns=columns)
+
+    weights = weights.fillna(0.0).astype(float)
+    missing = [t for t in weights.columns if t not in columns and weights[t].any()]
+    if missing:
+        print(f"No prices for {', '.join(missing)}, backtesting the remaining weights")
+
+    tickers = [t for t in columns if t in weights.columns and weights[t].any()]
+    if not tickers:
+        raise ValueError("None of the weighted tickers have prices")
+
+    targets = weights[tickers].to_numpy()
+    totals = targets.sum(axis=1, keepdims=True)
+    targets = np.divide(targets, totals, out=np.zeros_like(targets), where=totals > 0)
+
+    return list(weights.index), tickers, targets
+
+
+def _rebalance_starts(index, rebalance):
+    """Row positions where a new holding period starts, always including 0"""
+    if rebalance == "none":
+        return np.array([0])
+
+    months = index.year * 12 + index.month - 1
+    periods = months // 3 if rebalance == "quarterly" else months
+    changes = np.flatnonzero(np.diff(np.asarray(periods)) != 0) + 1
+    return np.concatenate([[0], changes])
+
+
+def _calendar_nav(values, targets, starts):
+    """
+    NAV for rebalancing to the targets at the close of every start row
+
+    Inside a holding period NAV_t = NAV_start * (P_t / P_start) @ w, so the
+    whole history is one T x N by N x K product once every row knows its
+    period start. Only the rebalance dates are visited in Python.
+    """
+    period = np.searchsorted(starts, np.arange(len(values)), side="right") - 1
+    growth = (values / values[starts[period]]) @ targets.T
+
+    # NAV at each start is the compounded growth of the periods before it
+    start_nav = np.ones((len(starts), len(targets)))
+    turnover = np.zeros(len(targets))
+    for i in range(1, len(starts)):
+        relative = values[starts[i]] / values[starts[i - 1]]
+        gross = targets @ relative
+        start_nav[i] = start_nav[i - 1] * gross
+
+        drifted = targets * relative / gross[:, None]
+        turnover += np.abs(targets - drifted).sum(axis=1) / 2
+
+    return start_nav[period] * growth, turnover
+
+
+def _threshold_nav(values, targets, threshold):
+    """NAV for rebalancing whenever a weight drifts more than threshold, all portfolios at once"""
+    units = targets / values[0]
+    nav = np.empty((len(values), len(targets)))
+    nav[0] = 1.0
+    turnover = np.zeros(len(targets))
+
+    for t in range(1, len(values)):
+        holdings = units * values[t]
+        total = holdings.sum(axis=1)
+        nav[t] = total
+
+        drift = holdings / total[:, None] - targets
+        trigger = np.abs(drift).max(axis=1) > threshold
+        if trigger.any():
+            turnover[trigger] += np.abs(drift[trigger]).sum(axis=1) / 2
+            units[trigger] = targets[trigger] * total[trigger, None] / values[t]
+
+    return nav, turnover
+
+
+def _performance_metrics(nav, drawdown, turnover, benchmark_nav, interval):
+    """Annualized performance metrics per portfolio, relative to the benchmark if given"""
+    periods_per_year = PERIODS_PER_YEAR.get(interval, 252)
+    factor = annualize_factor(interval)
+    years = (len(nav) - 1) / periods_per_year
+
+    returns = nav.pct_change().iloc[1:]
+    mean = returns.mean()
+    std = returns.std()
+
+    metrics = pd.DataFrame({
+        "total_return": nav.iloc[-1] - 1,
+        "annual_return": nav.iloc[-1] ** (1 / years) - 1,
+        "volatility": std * factor,
+        "sharpe_ratio": (mean / std * factor).where(std > 0, 0.0),
+        "max_drawdown": drawdown.min(),
+        "turnover": turnover
+    })
+
+    if benchmark_nav is not None:
+        benchmark_returns = benchmark_nav.pct_change().iloc[1:]
+        benchmark_centered = (benchmark_returns - benchmark_returns.mean()).to_numpy()
+        covariance = (returns - mean).to_numpy().T @ benchmark_centered / (len(returns) - 1)
+        active = returns.sub(benchmark_returns, axis=0)
+        tracking_error = active.std() * factor
+
+        metrics["excess_return"] = metrics["annual_return"] - (benchmark_nav.iloc[-1] ** (1 / years) - 1)
+        metrics["beta"] = covariance / benchmark_returns.var()
+        metrics["tracking_error"] = tracking_error
+        metrics["information_ratio"] = (active.mean() * periods_per_year / tracking_error).where(tracking_error > 0, 0.0)
+
+    return metrics
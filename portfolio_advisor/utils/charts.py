@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+CHART_FORMATS = ("png", "svg")
+
+
+class ChartRenderer:
+    """
+        Renders allocation charts on a background worker and caches them on disk.
+
+        Charts are keyed by a hash of the allocations, asset types and profile,
+        so an identical portfolio is rendered once and every later request gets
+        the cached file. submit() returns the chart path right away, the file
+        appears there once the worker is done (it is written to a temporary
+        file first, so a reader never sees a partial image).
+    """
+
+    def __init__(self, cache_dir, chart_format="png", max_workers=1, processes=False):
+        """
+            Args:
+                cache_dir (str): Directory the rendered charts are kept in
+                chart_format (str): "png" or "svg"
+                max_workers (int): Charts rendered at the same time
+                processes (bool): Render in worker processes instead of threads
+        """
+        if chart_format not in CHART_FORMATS:
+            raise ValueError(f"Unknown chart format: {chart_format}")
+
+        self.cache_dir = cache_dir
+        self.chart_format = chart_format
+        self.max_workers = max_workers
+        self.processes = processes
+        self.rendered = 0
+
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def submit(self, allocations, asset_info, risk_tolerance, time_horizon):
+        """
+        Queue a chart of the allocations unless it is cached already
+
+        Args:
+            allocations (dict): Ticker -> weight
+            asset_info (dict): Ticker -> dict with the asset "type"
+            risk_tolerance (int): Risk level shown in the title
+            time_horizon (int): Time horizon shown in the title
+
+        Returns:
+            tuple: (path, Future) - the future resolves to the path, or None if rendering failed
+        """
+        asset_types = {ticker: asset_info[ticker]["type"] for ticker in allocations}
+        path = os.path.join(
+            self.cache_dir,
+            f"{chart_key(allocations, asset_types, risk_tolerance, time_horizon)}.{self.chart_format}"
+        )
+
+        with self._lock:
+            future = self._pending.get(path)
+            if future is not None:
+                return path, future
+
+            if os.path.exists(path):
+                future = Future()
+                future.set_result(path)
+                return path, future
+
+            if self._executor is None:
+                executor_class = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+                self._executor = executor_class(max_workers=self.max_workers)
+
+            future = self._executor.submit(
+                render_allocation_chart, allocations, asset_types, risk_tolerance, time_horizon, path
+            )
+            self._pending[path] = future
+            self.rendered += 1
+
+        future.add_done_callback(lambda done: self._finish(path, done))
+        return path, future
+
+    def wait(self, timeout=None):
+        """Block until every queued chart is written"""
+        with self._lock:
+            pending = list(self._pending.values())
+        for future in pending:
+            future.exception(timeout=timeout)
+
+    def close(self):
+        """Wait for the queued charts and stop the worker"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _finish(self, path, future):
+        with self._lock:
+            self._pending.pop(path, None)
+        if future.exception() is not None:
+            print(f"Error generating chart: {future.exception()}")
+        else:
+            print(f"Portfolio allocation chart saved to {path}")
+
+
+def chart_key(allocations, asset_types, risk_tolerance, time_horizon):
+    """Hash of everything that is drawn on an allocation chart"""
+    payload = json.dumps(
+        [sorted((ticker, round(float(weight), 6)) for ticker, weight in allocations.items()),
+         sorted(asset_types.items()), risk_tolerance, time_horizon],
+        default=str
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def render_allocation_chart(allocations, asset_types, risk_tolerance, time_horizon, filename):
+    """
+    Draw the asset type and individual asset pie charts of an allocation
+
+    Uses matplotlib's Figure API without pyplot's global state, so it can
+    run on any thread or in a worker process.
+
+    Args:
+        allocations (dict): Ticker -> weight
+        asset_types (dict): Ticker -> asset type
+        risk_tolerance (int): Risk level shown in the title
+        time_horizon (int): Time horizon shown in the title
+        filename (str): Output file, the extension selects PNG or SVG
+
+    Returns:
+        str: The filename
+    """
+    from matplotlib.figure import Figure
+
+    # Group allocations by asset type
+    type_allocations = {}
+    for ticker, allocation in allocations.items():
+        asset_type = asset_types[ticker]
+        type_allocations[asset_type] = type_allocations.get(asset_type, 0) + allocation
+
+    fig = Figure(figsize=(15, 7))
+    ax1, ax2 = fig.subplots(1, 2)
+
+    # Plot 1: Overall asset type allocation
+    ax1.pie(
+        type_allocations.values(),
+        labels=[f"{k.capitalize()}: {v*100:.1f}%" for k, v in type_allocations.items()],
+        autopct='%1.1f%%',
+        startangle=90
+    )
+    ax1.set_title(f'Asset Type Allocation\nRisk Level: {risk_tolerance}/10, Time Horizon: {time_horizon} years')
+
+    # Plot 2: Individual asset allocation
+    sorted_allocations = dict(sorted(allocations.items(), key=lambda x: x[1], reverse=True))
+    ax2.pie(
+        sorted_allocations.values(),
+        labels=[f"{k}: {v*100:.1f}%" for k, v in sorted_allocations.items()],
+        autopct='%1.1f%%',
+        startangle=90
+    )
+    ax2.set_title('Individual Asset Allocation')
+
+    fig.tight_layout()
+
+    # Readers only ever see a complete file
+    root, extension = os.path.splitext(filename)
+    temp_file = f"{root}.{os.getpid()}.{threading.get_ident()}.tmp{extension}"
+    fig.savefig(temp_file, format=extension.lstrip("."))
+    os.replace(temp_file, filename)
+
+    return filename
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+# Extra random directions and power iterations of the randomized PCA
+OVERSAMPLING = 10
+POWER_ITERATIONS = 2
+
+
+class FactorCovariance:
+    """
+        Correlation matrix of a universe as K statistical factors plus
+        idiosyncratic variance: C = L L' + diag(specific).
+
+        L holds the loadings of the N assets on the K principal components of
+        their standardized returns, specific = 1 - sum(L^2) so the diagonal
+        is exactly 1. It stands in for the dense correlation matrix of
+        calculate_correlation_matrix (tickers are in .index), but memory is
+        O(N x K) and portfolio variance, risk contributions and the average
+        correlations are O(N x K) instead of O(N^2).
+    """
+
+    def __init__(self, index, loadings, specific, explained_variance=None):
+        """
+            Args:
+                index (list | pd.Index): Ticker symbols
+                loadings (np.ndarray): N x K factor loadings
+                specific (np.ndarray): N idiosyncratic variances
+                explained_variance (np.ndarray, optional): Share of the total variance of each factor
+        """
+        self.index = pd.Index(index)
+        self.loadings = np.asarray(loadings, dtype=float)
+        self.specific = np.asarray(specific, dtype=float)
+        self.explained_variance = explained_variance
+
+    @classmethod
+    def fit(cls, returns, n_factors=20, seed=0):
+        """
+        Fit the factor model to a return history
+
+        Uses a randomized PCA (range finder with power iterations), which
+        costs O(T x N x K) and never forms the N x N matrix. Missing returns
+        count as the asset's mean return.
+
+        Args:
+            returns (pd.DataFrame): T x N returns, one column per ticker
+            n_factors (int): Number of factors K
+            seed (int): Seed of the random projection
+
+        Returns:
+            FactorCovariance: The fitted model
+        """
+        values = returns.to_numpy(dtype=float)
+        n_rows, n_assets = values.shape
+        if n_rows < 2:
+            raise ValueError("Factor model needs at least two return rows")
+
+        std = np.nanstd(values, axis=0, ddof=1)
+        usable = np.isfinite(std) & (std > 0)
+        std = np.where(usable, std, 1.0)
+        standardized = np.where(usable, np.nan_to_num((values - np.nanmean(values, axis=0)) / std), 0.0)
+        standardized /= np.sqrt(n_rows - 1)
+
+        n_factors = max(1, min(n_factors, n_rows - 1, n_assets))
+        singular_values, components = _top_components(standardized, n_factors, seed)
+
+        loadings = components * singular_values
+        loadings[~usable] = 0.0
+        specific = np.clip(1.0 - np.einsum("ik,ik->i", loadings, loadings), 0.0, None)
+
+        total = usable.sum()
+        explained = singular_values ** 2 / total if total else np.zeros(n_factors)
+
+        return cls(returns.columns, loadings, specific, explained)
+
+    @property
+    def n_factors(self):
+        return self.loadings.shape[1]
+
+    def subset(self, tickers):
+        """Model of a subset of the assets, the factors stay the same"""
+        rows = self.index.get_indexer(tickers)
+        if (rows < 0).any():
+            missing = [t for t, row in zip(tickers, rows) if row < 0]
+            raise KeyError(f"Not in the factor model: {', '.join(missing)}")
+        return FactorCovariance(self.index[rows], self.loadings[rows], self.specific[rows], self.explained_variance)
+
+    def portfolio_variance(self, exposures):
+        """
+        Variance of a portfolio in O(N x K)
+
+        Args:
+            exposures (np.ndarray): Weight times volatility of each asset, in index order
+
+        Returns:
+            float: exposures' C exposures
+        """
+        exposures = np.asarray(exposures, dtype=float)
+        factor_exposure = self.loadings.T @ exposures
+        return float(factor_exposure @ factor_exposure + np.sum(self.specific * exposures ** 2))
+
+    def risk_contributions(self, exposures):
+        """
+        Share of the portfolio variance contributed by each asset
+
+        Returns:
+            pd.Series: Contributions in index order, summing to 1
+        """
+        exposures = np.asarray(exposures, dtype=float)
+        marginal = self.loadings @ (self.loadings.T @ exposures) + self.specific * exposures
+        contributions = exposures * marginal
+        total = contributions.sum()
+        return pd.Series(contributions / total if total > 0 else contributions, index=self.index)
+
+    def mean(self):
+        """Average correlation of each asset with all assets (itself included), like DataFrame.mean()"""
+        column_sums = self.loadings @ self.loadings.sum(axis=0) + self.specific
+        return pd.Series(column_sums / len(self.index), index=self.index)
+
+    def to_dense(self):
+        """The full N x N correlation matrix, only for small universes"""
+        dense = self.loadings @ self.loadings.T
+        dense[np.diag_indices_from(dense)] += self.specific
+        return pd.DataFrame(dense, index=self.index, columns=self.index)
+
+    def to_frame(self):
+        """
+        Compact N x (K + 1) representation, stored as Parquet by the run store
+
+        Returns:
+            pd.DataFrame: Columns factor_0 ... factor_{K-1} and specific
+        """
+        frame = pd.DataFrame(
+            self.loadings, index=self.index, columns=[f"factor_{k}" for k in range(self.n_factors)]
+        )
+        frame["specific"] = self.specific
+        return frame
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Inverse of to_frame"""
+        factors = [column for column in frame.columns if column.startswith("factor_")]
+        return cls(frame.index, frame[factors].to_numpy(), frame["specific"].to_numpy())
+
+
+def _top_components(matrix, n_components, seed):
+    """
+    Largest singular values and right singular vectors of a T x N matrix
+
+    Exact SVD when the matrix is small, otherwise a randomized range finder
+    (Halko, Martinsson & Tropp) that only multiplies by N x (K + p) blocks.
+    """
+    n_rows, n_cols = matrix.shape
+    rank = n_components + OVERSAMPLING
+    if min(n_rows, n_cols) <= 2 * rank:
+        _, singular_values, vt = np.linalg.svd(matrix, full_matrices=False)
+        return singular_values[:n_components], vt[:n_components].T
+
+    rng = np.random.default_rng(seed)
+    basis = matrix @ rng.standard_normal((n_cols, rank))
+    for _ in range(POWER_ITERATIONS):
+        # Re-orthonormalize between multiplications to keep small directions
+        basis, _ = np.linalg.qr(basis)
+        basis, _ = np.linalg.qr(matrix.T @ basis)
+        basis = matrix @ basis
+    basis, _ = np.linalg.qr(basis)
+
+    _, singular_values, vt = np.linalg.svd(basis.T @ matrix, full_matrices=False)
+    return singular_values[:n_components], vt[:n_components].T
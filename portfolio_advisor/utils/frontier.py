@@ -0,0 +1,251 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from portfolio_advisor.utils.optimizer import _largest_eigenvalue, project_to_buckets
+
+
+class Frontier:
+    """
+        Long-only efficient frontier sampled at a grid of return tradeoffs.
+
+        Column k of the weights solves
+            minimize    1/2 * w'Cw - tradeoffs[k] * mu'w
+            subject to  sum of w == 1, 0 <= w <= max_weight
+        so the first point (tradeoff 0) is the minimum variance portfolio,
+        volatility grows along the grid and the last point is the maximum
+        return portfolio.
+    """
+
+    def __init__(self, tickers, tradeoffs, weights, returns, volatilities):
+        self.tickers = list(tickers)
+        self.tradeoffs = tradeoffs
+        self.weights = weights
+        self.returns = returns
+        self.volatilities = volatilities
+
+        # Tiny solver noise must not break the binary search
+        self._search_volatilities = np.maximum.accumulate(volatilities)
+
+    def __len__(self):
+        return len(self.tradeoffs)
+
+    def select(self, min_volatility, max_volatility):
+        """
+        Pick the frontier point closest to the middle of a volatility band
+
+        Args:
+            min_volatility (float): Lower end of the band
+            max_volatility (float): Upper end of the band
+
+        Returns:
+            int: Index of the chosen point
+        """
+        target = (min_volatility + max_volatility) / 2
+        vols = self._search_volatilities
+        index = int(np.searchsorted(vols, target))
+        if index == len(vols):
+            return index - 1
+        if index > 0 and target - vols[index - 1] <= vols[index] - target:
+            return index - 1
+        return index
+
+    def allocation(self, index):
+        """
+        Weights of a frontier point
+
+        Returns:
+            dict: Weight per ticker
+        """
+        return {ticker: float(weight) for ticker, weight in zip(self.tickers, self.weights[:, index])}
+
+
+class EfficientFrontier:
+    """
+        Computes whole efficient frontiers in one batched solve.
+
+        All points of the frontier are solved together with accelerated
+        projected gradient descent, so each iteration is a single N x N times
+        N x K matrix product instead of K separate optimizations. Frontiers
+        are cached per covariance snapshot, selecting a point for a risk level
+        afterwards is only a binary search.
+    """
+
+    def __init__(self, n_points=41, max_tradeoff=None, max_iter=5000, tol=1e-9, cache_size=16):
+        """
+            Args:
+                n_points (int): Number of frontier points, including the minimum variance one
+                max_tradeoff (float, optional): Largest return tradeoff of the grid. By default
+                    it is sized per problem, so the last point is the maximum return portfolio
+                max_iter (int): Maximum number of gradient iterations
+                tol (float): Stop once no weight moves more than this in an iteration
+                cache_size (int): Number of frontiers kept in memory
+        """
+        self.n_points = n_points
+        self.max_tradeoff = max_tradeoff
+        self.max_iter = max_iter
+        self.tol = tol
+        self.cache_size = cache_size
+        self.solves = 0
+        self.last_iterations = 0
+        self._cache = OrderedDict()
+        self._warm_starts = {}
+        self._lock = threading.Lock()
+
+    def compute(self, tickers, covariance, expected_returns, max_weight=None):
+        """
+        Get the frontier for a covariance snapshot, solving it only on a cache miss
+
+        Args:
+            tickers (list): Ticker symbols, defines the order of the weights
+            covariance (np.ndarray): N x N covariance matrix
+            expected_returns (np.ndarray): Expected return of each asset
+            max_weight (float, optional): Upper bound for a single weight
+
+        Returns:
+            Frontier: The efficient frontier
+        """
+        covariance = np.ascontiguousarray(covariance, dtype=float)
+        expected_returns = np.ascontiguousarray(expected_returns, dtype=float)
+
+        key = self._snapshot_key(tickers, covariance, expected_returns, max_weight)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        cap = 1.0 if max_weight is None else max(max_weight, 1.0 / len(covariance))
+        tradeoffs = self._tradeoffs(covariance, expected_returns, cap)
+        weights = self._solve(tuple(tickers), covariance, expected_returns, cap, tradeoffs)
+        frontier = Frontier(
+            tickers,
+            tradeoffs,
+            weights,
+            expected_returns @ weights,
+            np.sqrt(np.maximum(np.einsum("ik,ij,jk->k", weights, covariance, weights), 0))
+        )
+
+        # Shared by concurrent requests (e.g. the advisor service)
+        with self._lock:
+            self._cache[key] = frontier
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return frontier
+
+    def _tradeoffs(self, covariance, mu, cap):
+        """Grid of return tradeoffs from 0 up to the maximum return portfolio"""
+        max_tradeoff = self.max_tradeoff
+        if max_tradeoff is None:
+            # A little past the corner, so the last point converges onto it
+            max_tradeoff = 1.1 * _max_return_tradeoff(covariance, mu, cap)
+            if max_tradeoff <= 0:
+                # Every point is the same portfolio, any grid will do
+                max_tradeoff = 1.0
+        return np.concatenate([[0.0], np.geomspace(max_tradeoff / 1000, max_tradeoff, self.n_points - 1)])
+
+    def _solve(self, tickers, covariance, mu, cap, tradeoffs):
+        n, k = len(covariance), len(tradeoffs)
+        self.solves += 1
+
+        # Every column is its own bucket with a budget of 1
+        buckets = np.repeat(np.arange(k), n)
+        budgets = np.ones(k)
+        upper = np.full(n * k, cap)
+
+        def project(values):
+            if cap >= 1.0:
+                return _project_columns_to_simplex(values)
+            return project_to_buckets(values.T.ravel(), buckets, budgets, upper).reshape(k, n).T
+
+        # Warm start from the last frontier over the same assets
+        initial = self._warm_starts.get(tickers)
+        if initial is None:
+            initial = np.full((n, k), 1.0 / n)
+        weights = project(initial)
+
+        # The Hessian is C for every column, so all columns share one step size
+        lipschitz = _largest_eigenvalue(covariance)
+        step = 1.0 / lipschitz if lipschitz > 0 else 1.0
+        linear = np.outer(mu, tradeoffs)
+
+        momentum_point = weights.copy()
+        momentum = np.ones(k)
+        self.last_iterations = self.max_iter
+        for iteration in range(1, self.max_iter + 1):
+            gradient = covariance @ momentum_point - linear
+            new_weights = project(momentum_point - step * gradient)
+
+            if np.max(np.abs(new_weights - weights)) < self.tol:
+                weights = new_weights
+                self.last_iterations = iteration
+                break
+
+            # Restart the momentum of the columns where it points uphill
+            uphill = np.einsum("ik,ik->k", momentum_point - new_weights, new_weights - weights) > 0
+            momentum = np.where(uphill, 1.0, momentum)
+
+            new_momentum = (1 + np.sqrt(1 + 4 * momentum ** 2)) / 2
+            momentum_point = new_weights + (momentum - 1) / new_momentum * (new_weights - weights)
+            weights, momentum = new_weights, new_momentum
+
+        self._warm_starts[tickers] = weights
+
+        return weights
+
+    def _snapshot_key(self, tickers, covariance, expected_returns, max_weight):
+        digest = hashlib.sha1()
+        digest.update("\0".join(tickers).encode())
+        digest.update(covariance.tobytes())
+        digest.update(expected_returns.tobytes())
+        digest.update(repr(max_weight).encode())
+        return digest.hexdigest()
+
+
+def _max_return_tradeoff(covariance, mu, cap):
+    """
+    Smallest tradeoff at which the maximum return portfolio is optimal
+
+    The maximum return portfolio fills the best assets up to the cap. It
+    solves the frontier problem once no pair of a held asset i and an asset
+    j with room left can improve the objective by shifting weight, i.e.
+    tradeoff * (mu_i - mu_j) >= (Cw)_i - (Cw)_j for every pair with
+    mu_i > mu_j.
+
+    Args:
+        covariance (np.ndarray): N x N covariance matrix
+        mu (np.ndarray): Expected return of each asset
+        cap (float): Upper bound for a single weight
+
+    Returns:
+        float: The tradeoff, 0 if the minimum variance portfolio already has the maximum return
+    """
+    n = len(mu)
+    order = np.argsort(-mu, kind="stable")
+    corner = np.zeros(n)
+    corner[order] = np.clip(1.0 - cap * np.arange(n), 0.0, cap)
+
+    gradient = covariance @ corner
+    held = corner > 0
+    room = corner < cap
+    gaps = mu[held][:, None] - mu[room][None, :]
+    excess = gradient[held][:, None] - gradient[room][None, :]
+
+    # Ties in mu leave the corner ambiguous, they do not bound the tradeoff
+    valid = gaps > 1e-12 * max(np.max(np.abs(mu)), 1e-12)
+    if not valid.any():
+        return 0.0
+    return max(float(np.max(excess[valid] / gaps[valid])), 0.0)
+
+
+def _project_columns_to_simplex(values):
+    """Exact projection of every column onto the probability simplex (sort based)"""
+    n = len(values)
+    ordered = -np.sort(-values, axis=0)
+    cumulative = np.cumsum(ordered, axis=0) - 1.0
+    ranks = np.arange(1, n + 1)[:, None]
+    support = (ordered - cumulative / ranks > 0).sum(axis=0)
+    shift = cumulative[support - 1, np.arange(values.shape[1])] / support
+    return np.maximum(values - shift, 0)
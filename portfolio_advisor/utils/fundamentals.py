@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from portfolio_advisor.utils.instrumentation import _write_atomic
+
+
+class RateLimiter:
+    """
+        Thread-safe limiter that spaces calls out to a maximum rate.
+    """
+
+    def __init__(self, requests_per_second=None):
+        """
+            Args:
+                requests_per_second (float): Maximum call rate, None or 0 for no limit
+        """
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until the caller is allowed to make the next call"""
+        if not self.min_interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class FundamentalsFetcher:
+    """
+        Fetches ticker fundamentals on a bounded worker pool and keeps them in
+        a persistent cache.
+
+        Fundamentals such as sector, beta or market cap change slowly, so cached
+        entries are reused until they are older than the TTL. Failed lookups are
+        never cached.
+    """
+
+    def __init__(self, provider, data_dir="./data", max_workers=8, requests_per_second=5.0, ttl=timedelta(days=1)):
+        """
+            Args:
+                provider (MarketDataProvider): Source of the fundamentals
+                data_dir (str): Base data directory, the cache lives in data_dir/fundamentals_cache
+                max_workers (int): Maximum number of concurrent requests
+                requests_per_second (float): Maximum request rate, None for no limit
+                ttl (timedelta): How long cached fundamentals are reused
+        """
+        self.provider = provider
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.ttl = ttl
+
+        cache_dir = os.path.join(data_dir, "fundamentals_cache")
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_file = os.path.join(cache_dir, f"{provider.name}.json")
+
+        self._lock = threading.Lock()
+        self._cache = self._load()
+
+    def get_info(self, tickers):
+        """
+        Get fundamentals for the tickers, only fetching missing or expired ones
+
+        Args:
+            tickers (list): List of ticker symbols
+
+        Returns:
+            dict: Raw fundamentals per ticker, or the exception raised while fetching it
+        """
+        now = self.provider.now()
+        results = {}
+        stale = []
+
+        with self._lock:
+            for ticker in dict.fromkeys(tickers):
+                entry = self._cache.get(ticker)
+                if entry and now - datetime.fromisoformat(entry["fetched_at"]) < self.ttl:
+                    results[ticker] = entry["info"]
+                else:
+                    stale.append(ticker)
+
+        if stale:
+            workers = max(1, min(self.max_workers, len(stale)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                fetched = dict(zip(stale, executor.map(self._fetch, stale)))
+
+            with self._lock:
+                for ticker, info in fetched.items():
+                    if info and not isinstance(info, Exception):
+                        self._cache[ticker] = {"fetched_at": now.isoformat(), "info": info}
+                self._save()
+
+            results.update(fetched)
+
+        return {ticker: results[ticker] for ticker in tickers}
+
+    def _fetch(self, ticker):
+        """Fetch a single ticker, returning the exception instead of raising it"""
+        self.rate_limiter.wait()
+        try:
+            return self.provider.get_info(ticker)
+        except Exception as e:
+            return e
+
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return {}
+
+        try:
+            with open(self.cache_file) as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable fundamentals cache: {e}")
+            return {}
+
+    def _save(self):
+        # Through a unique temporary file, so a crash never leaves a truncated cache
+        # and fetchers of concurrent runs sharing the cache do not collide
+        _write_atomic(self.cache_file, json.dumps(self._cache, default=str))
@@ -0,0 +1,344 @@
+import contextvars
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+
+# Off by default, every hook then returns after a single flag check
+_enabled = False
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+_current_span = contextvars.ContextVar("span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Trace:
+    """
+        Spans and counters recorded while one run was active.
+
+        A trace is bound to the current context by start_trace(), so spans of
+        concurrent runs (e.g. in the advisor service) end up in their own
+        trace. Threads that should report to it have to run in a copy of the
+        context, as the Pipeline does for its stages.
+    """
+
+    def __init__(self, name, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.duration = None
+        self.spans = []
+        self.counters = {}
+
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_span(self, record):
+        with self._lock:
+            self.spans.append(record)
+
+    def add(self, name, labels, value):
+        with self._lock:
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def to_dict(self):
+        """JSON-serializable trace, spans ordered by start time"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda record: record["start"])
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "attributes": self.attributes,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "spans": spans,
+            "counters": counters
+        }
+
+    def write_json(self, path):
+        """Write the trace to a JSON file"""
+        _write_atomic(path, json.dumps(self.to_dict(), indent=2, default=str))
+
+
+class MetricsRegistry:
+    """
+        Process-wide totals of all spans and counters.
+
+        Exported in the Prometheus text format, e.g. for the node exporter's
+        textfile collector or the advisor service's /metrics endpoint.
+    """
+
+    def __init__(self, prefix="portfolio_advisor"):
+        self.prefix = prefix
+        self._counters = {}
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, labels, value):
+        with self._lock:
+            key = (name, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe_span(self, name, duration, failed):
+        with self._lock:
+            totals = self._spans.setdefault(name, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += duration
+            totals[2] += failed
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._spans.clear()
+
+    def to_prometheus(self):
+        """
+        Render all metrics in the Prometheus text exposition format
+
+        Returns:
+            str: One sample per line, counters with a _total suffix
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            spans = sorted(self._spans.items())
+
+        lines = []
+        names = {}
+        for (name, labels), value in counters:
+            names.setdefault(name, []).append((labels, value))
+        for name, samples in names.items():
+            metric = f"{self.prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in samples:
+                lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+
+        if spans:
+            metric = f"{self.prefix}_span_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for name, (count, total, _) in spans:
+                labels = _format_labels((("span", name),))
+                lines.append(f"{metric}_sum{labels} {_format_value(total)}")
+                lines.append(f"{metric}_count{labels} {count}")
+            metric = f"{self.prefix}_span_errors_total"
+            lines.append(f"# TYPE {metric} counter")
+            for name, (_, _, errors) in spans:
+                lines.append(f"{metric}{_format_labels((('span', name),))} {errors}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write the metrics to a file, replacing it atomically"""
+        _write_atomic(path, self.to_prometheus())
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _Span:
+    __slots__ = ("name", "attributes", "span_id", "parent_id", "_start", "_token")
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        """Attach attributes to the span, e.g. token counts"""
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.span_id = next(_span_ids)
+        self.parent_id = _current_span.get()
+        self._token = _current_span.set(self.span_id)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        end = time.perf_counter()
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # A generator span closed from another context, e.g. by the garbage collector
+            _current_span.set(self.parent_id)
+        duration = end - self._start
+
+        # A generator closed before it was exhausted did not fail
+        failed = exc_type is not None and not issubclass(exc_type, GeneratorExit)
+        REGISTRY.observe_span(self.name, duration, failed)
+        trace = _current_trace.get()
+        if trace is not None:
+            record = {
+                "name": self.name,
+                "span_id": self.span_id,
+                "parent_id": self.parent_id,
+                "thread": threading.current_thread().name,
+                "start": round(self._start - trace._origin, 6),
+                "duration": round(duration, 6)
+            }
+            if self.attributes:
+                record["attributes"] = self.attributes
+            if failed:
+                record["error"] = repr(exc)
+            trace.add_span(record)
+        return False
+
+
+class _NullSpan:
+    """Span used while instrumentation is disabled, does nothing"""
+
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enable():
+    """Start recording spans and counters"""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Stop recording, hooks become no-ops"""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def span(name, **attributes):
+    """
+    Time a block of code
+
+        with instrumentation.span("download", tickers=len(tickers)):
+            ...
+
+    Returns:
+        Context manager, a shared no-op object while disabled
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, attributes)
+
+
+def count(name, value=1, **labels):
+    """
+    Add to a counter, e.g. count("yfinance_requests", call="download")
+
+    Args:
+        name (str): Counter name, exported as <prefix>_<name>_total
+        value (float): Amount to add
+        **labels: Prometheus labels of the counter
+    """
+    if not _enabled:
+        return
+    labels = tuple(sorted(labels.items()))
+    REGISTRY.add(name, labels, value)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, labels, value)
+
+
+def traced(name=None):
+    """
+    Decorator recording a span for every call of a function
+
+    Generator functions are timed until they are exhausted.
+
+    Args:
+        name (str, optional): Span name, the function's qualified name by default
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.isgeneratorfunction(func):
+            @wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return (yield from func(*args, **kwargs))
+                with _Span(span_name, {}):
+                    return (yield from func(*args, **kwargs))
+            return generator_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def start_trace(name, **attributes):
+    """
+    Collect the spans and counters of a block into a new Trace
+
+    Yields:
+        Trace: The trace, None while instrumentation is disabled
+    """
+    if not _enabled:
+        yield None
+        return
+
+    trace = Trace(name, **attributes)
+    token = _current_trace.set(trace)
+    try:
+        with _Span(name, {}):
+            yield trace
+    finally:
+        trace.duration = round(time.perf_counter() - trace._origin, 6)
+        _current_trace.reset(token)
+
+
+def current_trace():
+    """Trace of the current context, None outside of start_trace()"""
+    return _current_trace.get()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Unique per write, concurrent runs in one process must not share a temp file
+    temp_file = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(temp_file, "w") as f:
+        f.write(text)
+    os.replace(temp_file, path)
@@ -0,0 +1,141 @@
+import json
+
+# JSON schema type names and the Python types json.loads produces for them
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "null": type(None)
+}
+
+
+class SchemaError(ValueError):
+    """Raised when a structured LLM response does not match its schema"""
+
+    def __init__(self, errors, response=None):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+        self.response = response
+
+
+def validate(instance, schema, path="$"):
+    """
+    Check a parsed JSON value against a JSON schema
+
+    Covers the subset used for structured LLM output: type, properties,
+    required, additionalProperties (false), items, enum, minItems,
+    maxItems and minLength. Other keywords are ignored.
+
+    Args:
+        instance: Value returned by json.loads
+        schema (dict): JSON schema
+        path (str): Location of the value, used in the messages
+
+    Returns:
+        list: Error messages, empty if the value is valid
+    """
+    errors = []
+
+    expected = schema.get("type")
+    if expected is not None:
+        names = expected if isinstance(expected, list) else [expected]
+        python_types = tuple(t for name in names for t in _flatten(_TYPES[name]))
+        # bool is an int subclass, but not a JSON number
+        is_bool = isinstance(instance, bool) and "boolean" not in names
+        if is_bool or not isinstance(instance, python_types):
+            return [f"{path}: expected {' or '.join(names)}, got {_type_name(instance)}"]
+
+    if "enum" in schema and instance not in schema["enum"]:
+        errors.append(f"{path}: {instance!r} is not one of {schema['enum']}")
+
+    if isinstance(instance, str) and len(instance) < schema.get("minLength", 0):
+        errors.append(f"{path}: shorter than {schema['minLength']} characters")
+
+    if isinstance(instance, dict):
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in instance:
+                errors.append(f"{path}: missing required property {key!r}")
+        for key, value in instance.items():
+            if key in properties:
+                errors.extend(validate(value, properties[key], f"{path}.{key}"))
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}: unexpected property {key!r}")
+
+    if isinstance(instance, list):
+        if len(instance) < schema.get("minItems", 0):
+            errors.append(f"{path}: fewer than {schema['minItems']} items")
+        if "maxItems" in schema and len(instance) > schema["maxItems"]:
+            errors.append(f"{path}: more than {schema['maxItems']} items")
+        if "items" in schema:
+            for i, item in enumerate(instance):
+                errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+
+    return errors
+
+
+def parse(text, schema):
+    """
+    Parse a structured response and validate it
+
+    Constrained decoding returns bare JSON, so json.loads on the whole text
+    is tried first. Replies from unconstrained calls are searched for a
+    fenced block or the outermost brackets.
+
+    Args:
+        text (str): Response text
+        schema (dict): JSON schema the value must match
+
+    Returns:
+        The parsed value
+
+    Raises:
+        SchemaError: If no valid JSON is found or it does not match the schema
+    """
+    try:
+        value = json.loads(text)
+    except ValueError:
+        value = _extract(text, "[" if schema.get("type") == "array" else "{")
+        if value is None:
+            raise SchemaError(["$: response is not valid JSON"], text)
+
+    errors = validate(value, schema)
+    if errors:
+        raise SchemaError(errors, text)
+    return value
+
+
+def _extract(text, opening):
+    """JSON value inside a code fence or between the outermost brackets, None if there is none"""
+    closing = "]" if opening == "[" else "}"
+    candidates = []
+    if "```" in text:
+        start = text.find("```") + 3
+        if text.startswith("json", start):
+            start += 4
+        end = text.find("```", start)
+        candidates.append(text[start:end if end >= 0 else None].strip())
+    start, end = text.find(opening), text.rfind(closing) + 1
+    if 0 <= start < end:
+        candidates.append(text[start:end])
+
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    return None
+
+
+def _flatten(python_type):
+    return python_type if isinstance(python_type, tuple) else (python_type,)
+
+
+def _type_name(value):
+    for name, python_type in _TYPES.items():
+        if isinstance(value, python_type) and not (isinstance(value, bool) and name != "boolean"):
+            return name
+    return type(value).__name__
@@ -0,0 +1,71 @@
+import json
+
+
+class JSONArrayStreamParser:
+    """
+        Incremental parser for a JSON array of objects arriving in chunks.
+
+        Text before the first "[" (prose, code fences) is skipped. Every
+        object of the array is returned from feed() as soon as its closing
+        brace arrives, without waiting for the rest of the response.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.done = False
+        self._item = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text):
+        """
+        Consume the next chunk of text
+
+        Args:
+            text (str): Next part of the streamed response
+
+        Returns:
+            list: Objects completed by this chunk, in order
+        """
+        items = []
+
+        for char in text:
+            if self.done:
+                break
+
+            if not self.started:
+                self.started = char == "["
+                continue
+
+            # Between array elements only an object start or the array end matters
+            if self._depth == 0:
+                if char == "{":
+                    self._item = [char]
+                    self._depth = 1
+                elif char == "]":
+                    self.done = True
+                continue
+
+            self._item.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        items.append(json.loads("".join(self._item)))
+                    except json.JSONDecodeError as e:
+                        print(f"Skipping malformed streamed object: {e}")
+
+        return items
@@ -0,0 +1,47 @@
+import importlib
+import threading
+
+
+class LazyModule:
+    """
+        Stand-in for a module that is imported on first attribute access.
+
+        Heavy optional clients (ollama, yfinance) are only needed once a
+        request reaches the LLM or the network, so modules bind them with
+        lazy_import() and keep a module-level name that tests can patch.
+    """
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__dict__["_name"])
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy_import(name):
+    """
+    Module proxy that imports name on first use
+
+    Args:
+        name (str): Module name, e.g. "yfinance"
+
+    Returns:
+        LazyModule: Attribute access is forwarded to the imported module
+    """
+    return LazyModule(name)
@@ -0,0 +1,245 @@
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from portfolio_advisor.utils import instrumentation
+from portfolio_advisor.utils.lazy_import import lazy_import
+
+# yfinance is imported on the first download
+yf = lazy_import("yfinance")
+
+
+class MarketDataProvider:
+    """
+        Interface the agents use to get market data.
+
+        Implementations return price bars in the yf.download(group_by="ticker")
+        layout, with (Ticker, Price) MultiIndex columns, and raw fundamentals
+        dictionaries in the yf.Ticker(...).info layout.
+    """
+
+    # Used to keep the on-disk caches of different providers apart
+    name = "base"
+
+    def download(self, tickers, start=None, interval="1d"):
+        """
+        Download price bars
+
+        Args:
+            tickers (list): List of ticker symbols
+            start (datetime): First date to download, None for the full history
+            interval (str): Data interval (e.g., "1d", "1wk", "1mo")
+
+        Returns:
+            pd.DataFrame: Bars with (Ticker, Price) MultiIndex columns
+        """
+        raise NotImplementedError
+
+    def get_info(self, ticker):
+        """
+        Get fundamentals for a single ticker
+
+        Args:
+            ticker (str): Ticker symbol
+
+        Returns:
+            dict: Raw fundamentals, keyed like yf.Ticker(...).info
+        """
+        raise NotImplementedError
+
+    def symbols(self):
+        """Ticker symbols the source is known to serve, empty if it cannot list them"""
+        return []
+
+    def now(self):
+        """Current time as seen by the data source, periods are measured from it"""
+        return datetime.now()
+
+
+class YahooFinanceProvider(MarketDataProvider):
+    """Live market data from Yahoo Finance"""
+
+    name = "yahoo"
+
+    def download(self, tickers, start=None, interval="1d"):
+        with instrumentation.span("yfinance.download", tickers=len(tickers), interval=interval):
+            try:
+                if start is None:
+                    data = yf.download(tickers, period="max", interval=interval, group_by="ticker")
+                else:
+                    data = yf.download(tickers, start=start.strftime("%Y-%m-%d"), interval=interval, group_by="ticker")
+            except Exception:
+                instrumentation.count("yfinance_failures", call="download")
+                raise
+
+        if instrumentation.is_enabled():
+            instrumentation.count("yfinance_requests", call="download")
+            if data is None or data.empty:
+                instrumentation.count("yfinance_failures", call="download")
+            else:
+                # yfinance does not expose the response size, count the size of the returned bars
+                instrumentation.count("yfinance_bytes", int(data.memory_usage(deep=True).sum()), call="download")
+        return data
+
+    def get_info(self, ticker):
+        with instrumentation.span("yfinance.info"):
+            try:
+                info = yf.Ticker(ticker).info
+            except Exception:
+                instrumentation.count("yfinance_failures", call="info")
+                raise
+
+        if instrumentation.is_enabled():
+            instrumentation.count("yfinance_requests", call="info")
+            instrumentation.count("yfinance_bytes", len(json.dumps(info, default=str)), call="info")
+        return info
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+        Offline market data replayed from a file saved by get_market_data.
+
+        Reads the market_data_{interval}_{period}.csv layout (Ticker/Price
+        header rows) or a Parquet file with the same columns. The clock is
+        frozen at the last recorded bar, so periods like "1y" are measured
+        back from the end of the recording and runs are deterministic.
+    """
+
+    name = "replay"
+
+    def __init__(self, path, interval="1d", info=None):
+        """
+            Args:
+                path (str): CSV or Parquet file with recorded bars
+                interval (str): Interval the bars were recorded at
+                info (dict or str): Fundamentals per ticker, or a JSON file containing them
+        """
+        self.path = path
+        self.interval = interval
+
+        if path.endswith(".parquet"):
+            self.data = pd.read_parquet(path)
+        else:
+            self.data = pd.read_csv(path, header=[0, 1], index_col=0, parse_dates=True)
+        self.data.columns.names = ["Ticker", "Price"]
+        self.data = self.data.sort_index()
+
+        if isinstance(info, str):
+            with open(info) as f:
+                info = json.load(f)
+        self.info = info or {}
+
+    def download(self, tickers, start=None, interval="1d"):
+        if interval != self.interval:
+            raise ValueError(f"Recording in {os.path.basename(self.path)} has interval {self.interval}, not {interval}")
+
+        available = [t for t in tickers if t in self.data.columns.get_level_values(0)]
+        missing = [t for t in tickers if t not in available]
+        if missing:
+            print(f"No recorded data for: {', '.join(missing)}")
+
+        data = self.data[available] if available else self.data.iloc[:, :0]
+        if start is not None:
+            data = data[data.index >= pd.Timestamp(start)]
+
+        return data
+
+    def get_info(self, ticker):
+        return self.info.get(ticker, {})
+
+    def symbols(self):
+        return list(self.data.columns.get_level_values(0).unique())
+
+    def now(self):
+        return self.data.index[-1].to_pydatetime()
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+        Offline market data drawn from a factor model, for benchmarks.
+
+        Daily log returns are r = B f + e, with a few shared factors f (the
+        first one a market factor every ticker loads on) and independent
+        noise e, so the universe has realistic cross-correlations. Every
+        ticker's series is generated from its own seed, which makes a
+        download cost proportional to the tickers asked for and gives the
+        same prices whatever subset or start date is requested.
+    """
+
+    name = "synthetic"
+
+    SECTORS = ("Technology", "Healthcare", "Financial Services", "Energy", "Consumer Defensive", "Industrials")
+
+    def __init__(self, n_tickers=100, years=25, n_factors=3, seed=0, end=datetime(2024, 12, 31)):
+        """
+            Args:
+                n_tickers (int): Universe size, tickers are named SYN00000, SYN00001, ...
+                years (int): Length of the generated history
+                n_factors (int): Number of shared return factors
+                seed (int): Seed of the whole universe
+                end (datetime): Date of the last bar, also the provider's clock
+        """
+        self.tickers = [f"SYN{i:05d}" for i in range(n_tickers)]
+        self.seed = seed
+        self.end = end
+        self.dates = pd.bdate_range(end=end, periods=int(years * 252), name="Date")
+
+        rng = np.random.default_rng(seed)
+        self._factor_returns = rng.normal(0.0, 0.01, size=(len(self.dates), n_factors))
+        self._factor_returns[:, 0] += 0.0003
+        self._index = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    def download(self, tickers, start=None, interval="1d"):
+        if interval != "1d":
+            raise ValueError(f"Synthetic data is generated at interval 1d, not {interval}")
+
+        first = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start))
+        dates = self.dates[first:]
+
+        frames = {}
+        for ticker in tickers:
+            if ticker not in self._index:
+                print(f"No synthetic data for: {ticker}")
+                continue
+            close = self._close(self._index[ticker])[first:]
+            frames[ticker] = pd.DataFrame(
+                {"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1e6},
+                index=dates
+            )
+
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+    def get_info(self, ticker):
+        i = self._index[ticker]
+        return {
+            "shortName": f"Synthetic {i}",
+            "sector": self.SECTORS[i % len(self.SECTORS)],
+            "industry": "Synthetic",
+            "marketCap": 1e9 * (1 + i % 100),
+            "beta": float(self._loadings(i)[0]),
+            "averageVolume": 1e6
+        }
+
+    def symbols(self):
+        return list(self.tickers)
+
+    def now(self):
+        return self.end
+
+    def _loadings(self, i):
+        rng = np.random.default_rng([self.seed, i, 0])
+        loadings = rng.normal(0.0, 0.5, size=self._factor_returns.shape[1])
+        loadings[0] = rng.uniform(0.5, 1.5)
+        return loadings
+
+    def _close(self, i):
+        """Full close price history of the i-th ticker"""
+        rng = np.random.default_rng([self.seed, i, 1])
+        noise = rng.normal(0.0, rng.uniform(0.005, 0.02), size=len(self.dates))
+        log_returns = self._factor_returns @ self._loadings(i) + noise
+        return 100.0 * np.exp(np.cumsum(log_returns))
@@ -0,0 +1,139 @@
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+
+class OnlineCovariance:
+    """
+        Incremental covariance and correlation estimator.
+
+        Keeps weighted running sums (mean and co-moment matrix, Welford
+        style), so appending new return rows costs O(N^2) per row without
+        revisiting history. With a decay factor older rows are weighted down
+        exponentially (EWMA), otherwise all rows weigh the same.
+    """
+
+    def __init__(self, tickers, decay=None):
+        """
+            Args:
+                tickers (list): Ticker symbols, defines the column order
+                decay (float, optional): EWMA decay per row in (0, 1), e.g. 0.94
+        """
+        if decay is not None and not 0 < decay < 1:
+            raise ValueError("decay must be between 0 and 1")
+
+        n = len(tickers)
+        self.tickers = list(tickers)
+        self.decay = decay
+        self.count = 0
+        self.weight = 0.0
+        self.weight_sq = 0.0
+        self.mean = np.zeros(n)
+        self.comoment = np.zeros((n, n))
+        self.last_timestamp = None
+
+    def update(self, returns, timestamps=None):
+        """
+        Add return rows to the estimate
+
+        Args:
+            returns (np.ndarray): B x N return rows (or a single row), oldest first
+            timestamps (list, optional): Timestamp of each row, the last one is remembered
+        """
+        rows = np.atleast_2d(np.asarray(returns, dtype=float))
+        if rows.shape[1] != len(self.tickers):
+            raise ValueError(f"Expected {len(self.tickers)} columns, got {rows.shape[1]}")
+        if not len(rows):
+            return
+
+        # Row weights: the newest row has weight 1, older ones decay
+        n_rows = len(rows)
+        if self.decay is None:
+            row_weights = np.ones(n_rows)
+            carry = 1.0
+        else:
+            row_weights = self.decay ** np.arange(n_rows - 1, -1, -1)
+            carry = self.decay ** n_rows
+
+        # Weighted statistics of the new rows
+        batch_weight = row_weights.sum()
+        batch_mean = row_weights @ rows / batch_weight
+        centered = rows - batch_mean
+        batch_comoment = (centered * row_weights[:, None]).T @ centered
+
+        # Merge with the (decayed) running state
+        old_weight = self.weight * carry
+        total_weight = old_weight + batch_weight
+        delta = batch_mean - self.mean
+
+        self.comoment = self.comoment * carry + batch_comoment + np.outer(delta, delta) * (old_weight * batch_weight / total_weight)
+        self.mean = self.mean + delta * (batch_weight / total_weight)
+        self.weight = total_weight
+        self.weight_sq = self.weight_sq * carry ** 2 + (row_weights ** 2).sum()
+        self.count += n_rows
+
+        if timestamps is not None and len(timestamps):
+            self.last_timestamp = pd.Timestamp(timestamps[-1])
+
+    def covariance(self):
+        """
+        Unbiased (reliability weighted) covariance estimate
+
+        Returns:
+            pd.DataFrame: N x N covariance matrix
+        """
+        effective = self.weight - self.weight_sq / self.weight if self.weight else 0.0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            covariance = self.comoment / effective
+        return pd.DataFrame(covariance, index=self.tickers, columns=self.tickers)
+
+    def correlation(self):
+        """
+        Correlation matrix derived from the running co-moments
+
+        Returns:
+            pd.DataFrame: N x N correlation matrix
+        """
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = self.comoment / np.outer(std, std)
+        np.fill_diagonal(correlation, np.where(std > 0, 1.0, np.nan))
+        return pd.DataFrame(correlation, index=self.tickers, columns=self.tickers)
+
+    def save(self, path):
+        """Persist the estimator state to an .npz file, replacing it atomically"""
+        # np.savez appends .npz to names without it, keep the suffix on both files
+        if not path.endswith(".npz"):
+            path = f"{path}.npz"
+        # Unique per write, so a concurrent load never sees a half-written file
+        temp_file = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp.npz"
+        np.savez(
+            temp_file,
+            tickers=np.array(self.tickers),
+            decay=np.array(np.nan if self.decay is None else self.decay),
+            count=np.array(self.count),
+            weight=np.array(self.weight),
+            weight_sq=np.array(self.weight_sq),
+            mean=self.mean,
+            comoment=self.comoment,
+            last_timestamp=np.array("" if self.last_timestamp is None else self.last_timestamp.isoformat())
+        )
+        os.replace(temp_file, path)
+
+    @classmethod
+    def load(cls, path):
+        """Restore an estimator saved with save()"""
+        with np.load(path) as state:
+            decay = float(state["decay"])
+            estimator = cls(state["tickers"].tolist(), decay=None if np.isnan(decay) else decay)
+            estimator.count = int(state["count"])
+            estimator.weight = float(state["weight"])
+            estimator.weight_sq = float(state["weight_sq"])
+            estimator.mean = state["mean"]
+            estimator.comoment = state["comoment"]
+            last_timestamp = str(state["last_timestamp"])
+
+        estimator.last_timestamp = pd.Timestamp(last_timestamp) if last_timestamp else None
+        return estimator
@@ -0,0 +1,139 @@
+import numpy as np
+
+
+class PortfolioOptimizer:
+    """
+        Long-only mean-variance optimizer with per-bucket budget constraints.
+
+        Solves
+            minimize    risk_aversion / 2 * w'Cw - mu'w
+            subject to  sum of w over each bucket == bucket budget
+                        0 <= w <= max_weight
+        with accelerated projected gradient descent (FISTA with adaptive
+        restart). Each iteration is one N x N matrix-vector product, so it
+        stays fast for hundreds of assets. The last solution for each key is
+        kept and used as a warm start when re-solving after small changes.
+    """
+
+    def __init__(self, max_iter=2000, tol=1e-10):
+        """
+            Args:
+                max_iter (int): Maximum number of gradient iterations
+                tol (float): Stop once no weight moves more than this in an iteration
+        """
+        self.max_iter = max_iter
+        self.tol = tol
+        self.last_iterations = 0
+        self._warm_starts = {}
+
+    def solve(self, covariance, buckets, budgets, expected_returns=None, risk_aversion=1.0,
+              max_weight=None, initial=None, key=None):
+        """
+        Find the optimal weights
+
+        Args:
+            covariance (np.ndarray): N x N covariance matrix
+            buckets (np.ndarray): Bucket index (0..B-1) of each asset
+            budgets (np.ndarray): Total weight of each bucket
+            expected_returns (np.ndarray, optional): Expected returns over the period the
+                covariance is measured in (annual for annualized volatilities), None for minimum variance
+            risk_aversion (float): Weight of the variance term
+            max_weight (float, optional): Upper bound for a single weight
+            initial (np.ndarray, optional): Starting point, overrides the stored warm start
+            key (hashable, optional): Identifies the problem for warm starts
+
+        Returns:
+            np.ndarray: Optimal weights
+        """
+        covariance = np.asarray(covariance, dtype=float)
+        buckets = np.asarray(buckets, dtype=int)
+        budgets = np.asarray(budgets, dtype=float)
+        n = len(covariance)
+
+        mu = np.zeros(n) if expected_returns is None else np.asarray(expected_returns, dtype=float)
+        upper = _bucket_upper_bounds(buckets, budgets, max_weight)
+
+        if initial is None and key is not None:
+            initial = self._warm_starts.get(key)
+        if initial is None or len(initial) != n:
+            initial = budgets[buckets] / np.bincount(buckets, minlength=len(budgets))[buckets]
+        weights = project_to_buckets(np.asarray(initial, dtype=float), buckets, budgets, upper)
+
+        # Step size from the largest eigenvalue of the Hessian
+        lipschitz = risk_aversion * _largest_eigenvalue(covariance)
+        step = 1.0 / lipschitz if lipschitz > 0 else 1.0
+
+        momentum_point = weights.copy()
+        momentum = 1.0
+        self.last_iterations = self.max_iter
+        for iteration in range(1, self.max_iter + 1):
+            gradient = risk_aversion * (covariance @ momentum_point) - mu
+            new_weights = project_to_buckets(momentum_point - step * gradient, buckets, budgets, upper)
+
+            if np.max(np.abs(new_weights - weights)) < self.tol:
+                weights = new_weights
+                self.last_iterations = iteration
+                break
+
+            # Restart the momentum whenever it points uphill
+            if np.dot(momentum_point - new_weights, new_weights - weights) > 0:
+                momentum = 1.0
+
+            new_momentum = (1 + np.sqrt(1 + 4 * momentum ** 2)) / 2
+            momentum_point = new_weights + (momentum - 1) / new_momentum * (new_weights - weights)
+            weights, momentum = new_weights, new_momentum
+
+        if key is not None:
+            self._warm_starts[key] = weights
+
+        return weights
+
+
+def project_to_buckets(values, buckets, budgets, upper, iterations=60):
+    """
+    Euclidean projection onto {0 <= w <= upper, sum of w per bucket == budget}
+
+    Every bucket is a capped simplex, its projection is clip(v - t, 0, upper)
+    for a shift t found by bisection. All buckets are bisected at once.
+    """
+    n_buckets = len(budgets)
+    low = np.full(n_buckets, values.min() - upper.max() - 1.0)
+    high = np.full(n_buckets, values.max())
+
+    for _ in range(iterations):
+        shift = (low + high) / 2
+        totals = np.bincount(buckets, np.clip(values - shift[buckets], 0, upper), minlength=n_buckets)
+        too_much = totals > budgets
+        low = np.where(too_much, shift, low)
+        high = np.where(too_much, high, shift)
+
+    weights = np.clip(values - ((low + high) / 2)[buckets], 0, upper)
+
+    # Remove the remaining bisection error so budgets are met exactly
+    totals = np.bincount(buckets, weights, minlength=n_buckets)
+    scale = np.divide(budgets, totals, out=np.ones(n_buckets), where=totals > 0)
+    return weights * scale[buckets]
+
+
+def _bucket_upper_bounds(buckets, budgets, max_weight):
+    """Per-asset upper bounds, relaxed where a bucket could not reach its budget"""
+    counts = np.bincount(buckets, minlength=len(budgets))
+    if max_weight is None:
+        return budgets[buckets].copy()
+
+    minimum_cap = np.divide(budgets, counts, out=np.zeros(len(budgets)), where=counts > 0)
+    return np.maximum(max_weight, minimum_cap)[buckets]
+
+
+def _largest_eigenvalue(matrix, iterations=50):
+    """Power iteration estimate of the largest eigenvalue, padded for safety"""
+    vector = np.ones(len(matrix)) / np.sqrt(len(matrix))
+    eigenvalue = 0.0
+    for _ in range(iterations):
+        product = matrix @ vector
+        norm = np.linalg.norm(product)
+        if norm == 0:
+            return 0.0
+        vector = product / norm
+        eigenvalue = norm
+    return eigenvalue * 1.1
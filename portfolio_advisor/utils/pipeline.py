@@ -0,0 +1,97 @@
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from portfolio_advisor.utils import instrumentation
+
+
+class Pipeline:
+    """
+        Runs named stages as a dependency graph on a thread pool.
+
+        A stage starts as soon as all the stages it depends on are finished,
+        so independent stages overlap and the total time is bounded by the
+        critical path. Each stage receives the results of its dependencies as
+        keyword arguments.
+    """
+
+    def __init__(self, max_workers=4):
+        """
+            Args:
+                max_workers (int): Maximum number of stages running at the same time
+        """
+        self.max_workers = max_workers
+        self.stages = {}
+        self.timings = {}
+
+    def add_stage(self, name, func, depends_on=()):
+        """
+        Add a stage to the graph
+
+        Args:
+            name (str): Unique stage name, also the keyword its result is passed as
+            func (callable): Called with the dependency results as keyword arguments
+            depends_on (tuple): Names of the stages that have to finish first
+        """
+        if name in self.stages:
+            raise ValueError(f"Duplicate pipeline stage: {name}")
+        self.stages[name] = (func, tuple(depends_on))
+
+    def run(self):
+        """
+        Run all stages
+
+        Returns:
+            dict: Result of each stage by name. Wall-clock seconds per stage
+                are stored in self.timings, the total under "total".
+
+        Raises:
+            Exception: The first exception raised by a stage, pending stages are cancelled
+        """
+        for name, (_, depends_on) in self.stages.items():
+            unknown = [d for d in depends_on if d not in self.stages]
+            if unknown:
+                raise ValueError(f"Stage {name} depends on unknown stages: {', '.join(unknown)}")
+
+        results = {}
+        self.timings = {}
+        pending = dict(self.stages)
+        running = {}
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                # Submit every stage whose dependencies are done
+                for name, (func, depends_on) in list(pending.items()):
+                    if all(d in results for d in depends_on):
+                        kwargs = {d: results[d] for d in depends_on}
+                        # Stages run in a copy of the caller's context, so their
+                        # spans belong to the caller's trace
+                        context = contextvars.copy_context()
+                        running[executor.submit(context.run, self._timed, name, func, kwargs)] = name
+                        del pending[name]
+
+                if not running:
+                    raise ValueError(f"Dependency cycle between stages: {', '.join(pending)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception:
+                        for other in running:
+                            other.cancel()
+                        raise
+
+        self.timings["total"] = time.perf_counter() - start
+
+        return results
+
+    def _timed(self, name, func, kwargs):
+        start = time.perf_counter()
+        try:
+            with instrumentation.span(f"stage.{name}"):
+                return func(**kwargs)
+        finally:
+            self.timings[name] = time.perf_counter() - start
@@ -0,0 +1,305 @@
+import json
+import os
+import queue
+import re
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from portfolio_advisor.utils import instrumentation
+from portfolio_advisor.utils.market_data import YahooFinanceProvider
+
+
+class PriceCache:
+    """
+        Shared on-disk cache of historical price bars.
+
+        Bars are stored per (ticker, interval) as Parquet files, so every agent
+        reads the same history and a refresh only downloads the date range that
+        is missing from disk. Bars are downloaded through a MarketDataProvider.
+    """
+
+    def __init__(self, data_dir="./data", provider=None, max_age=timedelta(hours=1)):
+        """
+            Args:
+                data_dir (str): Base data directory, the cache lives in data_dir/price_cache
+                provider (MarketDataProvider): Source of the bars, Yahoo Finance by default
+                max_age (timedelta): How long cached bars are considered fresh
+        """
+        self.provider = provider if provider else YahooFinanceProvider()
+        self.cache_dir = os.path.join(data_dir, "price_cache", self.provider.name)
+        self.max_age = max_age
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @instrumentation.traced()
+    def get_history(self, tickers, period="1y", interval="1d"):
+        """
+        Get historical bars for the tickers, downloading only what is missing
+
+        Args:
+            tickers (list): List of ticker symbols
+            period (str): Time period (e.g., "30d", "1y", "5y", "ytd", "max")
+            interval (str): Data interval (e.g., "1d", "1wk", "1mo")
+
+        Returns:
+            pd.DataFrame: Bars with (Ticker, Price) MultiIndex columns, the same
+                layout as yf.download(group_by="ticker"), also for a single ticker
+        """
+        if isinstance(tickers, str):
+            tickers = [tickers]
+
+        # Each ticker is fetched by one caller at a time: a concurrent request for
+        # the same ticker waits and then reads the fresh bars from disk, requests
+        # for other tickers are not blocked. Locks are taken in sorted order so
+        # overlapping ticker sets cannot deadlock.
+        locks = [self._ticker_lock(ticker, interval) for ticker in sorted(set(tickers))]
+        for lock in locks:
+            lock.acquire()
+        try:
+            return self._get_history(tickers, period, interval)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _ticker_lock(self, ticker, interval):
+        with self._locks_lock:
+            return self._locks.setdefault((ticker, interval), threading.Lock())
+
+    def _get_history(self, tickers, period, interval):
+        now = self.provider.now()
+        start = _period_start(period, now)
+
+        # Group the stale tickers by the date they need to be fetched from,
+        # so each distinct range costs a single download call
+        frames = {}
+        metas = {}
+        pending = {}
+        for ticker in tickers:
+            frames[ticker], metas[ticker] = self._load(ticker, interval)
+            fetch = self._fetch_start(frames[ticker], metas[ticker], start, now)
+            if fetch is not None:
+                pending.setdefault(fetch, []).append(ticker)
+
+        for (fetch_start, is_delta), group in pending.items():
+            fetched = self._download(group, fetch_start, interval)
+            for ticker in group:
+                frames[ticker] = self._merge(
+                    ticker, interval, frames[ticker], metas[ticker],
+                    fetched.get(ticker), is_delta, start, now
+                )
+
+        history = {}
+        for ticker in tickers:
+            frame = frames[ticker]
+            if frame is None:
+                frame = pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+            elif start is not None:
+                frame = frame[frame.index >= _align_tz(start, frame.index)]
+            history[ticker] = frame
+
+        data = pd.concat(history, axis=1).sort_index()
+        data.columns.names = ["Ticker", "Price"]
+
+        return data
+
+    def _fetch_start(self, frame, meta, start, now):
+        """
+        Decide what has to be downloaded for a ticker
+
+        Returns:
+            tuple: (fetch_start, is_delta), or None if the cached bars are fresh.
+                A fetch_start of None means the full available history.
+        """
+        if frame is None or frame.empty or meta is None:
+            return start, False
+
+        # Requested window reaches further back than what was ever fetched
+        covered_from = meta.get("covered_from")
+        if covered_from is not None and (start is None or start < datetime.fromisoformat(covered_from)):
+            return start, False
+
+        fetched_at = datetime.fromisoformat(meta["fetched_at"])
+        if now - fetched_at < self.max_age:
+            return None
+
+        # Re-fetch the last two stored bars: the last one may have been partial,
+        # the one before it is used to detect split/dividend adjustments
+        return _naive(frame.index[max(len(frame) - 2, 0)]), True
+
+    def _download(self, tickers, start, interval):
+        """Download bars for a group of tickers and split them per ticker"""
+        data = self.provider.download(tickers, start=start, interval=interval)
+
+        bars = {}
+        if data is None or data.empty:
+            return bars
+
+        for ticker in tickers:
+            try:
+                frame = data[ticker] if isinstance(data.columns, pd.MultiIndex) else data
+                bars[ticker] = frame.dropna(how="all")
+            except KeyError:
+                print(f"No price data returned for {ticker}")
+
+        return bars
+
+    def _merge(self, ticker, interval, cached, meta, new_bars, is_delta, start, now):
+        """Merge freshly downloaded bars into the cached ones and persist them"""
+        has_cached = cached is not None and not cached.empty
+
+        if new_bars is None or new_bars.empty:
+            if has_cached:
+                # Nothing new (e.g. market closed), just mark the cache as fresh
+                self._save(ticker, interval, cached, meta.get("covered_from"), now)
+            return cached
+
+        full_covered_from = start.isoformat() if start is not None else None
+
+        if not is_delta:
+            merged = new_bars.sort_index()
+            if has_cached:
+                merged = pd.concat([merged, cached[cached.index > merged.index[-1]]])
+            self._save(ticker, interval, merged, full_covered_from, now)
+            return merged
+
+        # Prices are split/dividend adjusted, if the overlapping bar changed the
+        # stored history is stale and has to be downloaded again
+        overlap = cached.index[:-1].intersection(new_bars.index)
+        if len(overlap) and "Close" in cached.columns:
+            old_close = cached.loc[overlap, "Close"].astype(float)
+            new_close = new_bars.loc[overlap, "Close"].astype(float)
+            if not np.allclose(old_close.values, new_close.values, rtol=1e-6, equal_nan=True):
+                full = self._download([ticker], start, interval).get(ticker)
+                if full is not None and not full.empty:
+                    self._save(ticker, interval, full, full_covered_from, now)
+                    return full
+
+        merged = pd.concat([cached[~cached.index.isin(new_bars.index)], new_bars]).sort_index()
+        self._save(ticker, interval, merged, meta.get("covered_from"), now)
+        return merged
+
+    def _paths(self, ticker, interval):
+        safe_ticker = re.sub(r"[^A-Za-z0-9._-]", "_", ticker)
+        directory = os.path.join(self.cache_dir, interval)
+        return (os.path.join(directory, f"{safe_ticker}.parquet"),
+                os.path.join(directory, f"{safe_ticker}.json"))
+
+    def _load(self, ticker, interval):
+        """Load cached bars and metadata for a ticker, (None, None) if missing"""
+        bars_path, meta_path = self._paths(ticker, interval)
+        if not (os.path.exists(bars_path) and os.path.exists(meta_path)):
+            return None, None
+
+        try:
+            frame = pd.read_parquet(bars_path)
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable price cache for {ticker}: {e}")
+            return None, None
+
+        return frame, meta
+
+    def _save(self, ticker, interval, frame, covered_from, now):
+        """Write bars and metadata for a ticker"""
+        bars_path, meta_path = self._paths(ticker, interval)
+        os.makedirs(os.path.dirname(bars_path), exist_ok=True)
+
+        # Write to temporary files first so other processes never read a partial file
+        suffix = f".{os.getpid()}.tmp"
+        frame.to_parquet(bars_path + suffix)
+        os.replace(bars_path + suffix, bars_path)
+        with open(meta_path + suffix, "w") as f:
+            json.dump({"covered_from": covered_from, "fetched_at": now.isoformat()}, f, indent=4)
+        os.replace(meta_path + suffix, meta_path)
+
+
+class PricePrefetcher:
+    """
+        Background worker that warms a PriceCache as tickers become known.
+
+        Tickers queued while a download is running are fetched together in
+        the next download, so a burst of tickers costs few provider calls.
+    """
+
+    def __init__(self, price_cache, period="1y", interval="1d"):
+        self.price_cache = price_cache
+        self.period = period
+        self.interval = interval
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add(self, ticker):
+        """Queue a ticker for prefetching"""
+        self._queue.put(ticker)
+
+    def close(self):
+        """Stop accepting tickers and wait for the queued downloads to finish"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            ticker = self._queue.get()
+            if ticker is None:
+                return
+
+            # Drain whatever else has arrived in the meantime into one batch
+            batch = [ticker]
+            while True:
+                try:
+                    ticker = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if ticker is None:
+                    stopping = True
+                    break
+                batch.append(ticker)
+
+            try:
+                self.price_cache.get_history(batch, period=self.period, interval=self.interval)
+            except Exception as e:
+                print(f"Error prefetching prices for {', '.join(batch)}: {e}")
+
+
+def _period_start(period, now):
+    """Convert a yfinance style period into a start datetime (None for "max")"""
+    if period == "max":
+        return None
+    if period == "ytd":
+        return datetime(now.year, 1, 1)
+
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+
+    amount, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        start = now - timedelta(days=amount)
+    elif unit == "wk":
+        start = now - timedelta(weeks=amount)
+    elif unit == "mo":
+        start = (pd.Timestamp(now) - pd.DateOffset(months=amount)).to_pydatetime()
+    else:
+        start = (pd.Timestamp(now) - pd.DateOffset(years=amount)).to_pydatetime()
+
+    return start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _align_tz(timestamp, index):
+    """Make a naive timestamp comparable with a (possibly tz-aware) index"""
+    timestamp = pd.Timestamp(timestamp)
+    if getattr(index, "tz", None) is not None:
+        return timestamp.tz_localize(index.tz)
+    return timestamp
+
+
+def _naive(timestamp):
+    """Convert an index timestamp into a naive datetime"""
+    return pd.Timestamp(timestamp).tz_localize(None).to_pydatetime()
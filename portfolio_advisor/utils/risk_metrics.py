@@ -0,0 +1,272 @@
+import warnings
+from functools import cached_property
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+# Number of bars per year for each supported data interval
+PERIODS_PER_YEAR = {
+    "1d": 252,  # Trading days in a year
+    "1wk": 52,  # Weeks in a year
+    "1mo": 12   # Months in a year
+}
+
+RISK_METRIC_COLUMNS = ["volatility", "max_drawdown", "avg_return", "sharpe_ratio", "downside_deviation"]
+
+
+def annualize_factor(interval):
+    """Square root of the number of bars per year, 1 for unknown intervals"""
+    return np.sqrt(PERIODS_PER_YEAR[interval]) if interval in PERIODS_PER_YEAR else 1.0
+
+
+def price_matrix(data, tickers):
+    """
+    Extract a single aligned T x N price matrix from (Ticker, Price) bars
+
+    Args:
+        data (pd.DataFrame): Bars with (Ticker, Price) MultiIndex columns
+        tickers (list): List of ticker symbols, defines the column order
+
+    Returns:
+        pd.DataFrame: Adjusted close (or close) prices, one column per ticker.
+            Tickers without data become all-NaN columns.
+    """
+    if data.empty:
+        return pd.DataFrame(np.nan, index=data.index, columns=list(tickers), dtype=float)
+
+    fields = data.columns.get_level_values(1)
+    field = "Adj Close" if "Adj Close" in fields else "Close"
+
+    prices = data.xs(field, axis=1, level=1)
+    prices = prices.loc[:, ~prices.columns.duplicated()]
+
+    return prices.reindex(columns=list(tickers)).astype(float)
+
+
+def compute_risk_metrics(prices, interval="1d", metrics=None, benchmark=None, confidence=0.95):
+    """
+    Compute the risk metrics for every ticker at once
+
+    Works on the whole T x N price matrix with array operations, the results
+    match the per-ticker pandas calculation (sample standard deviations,
+    NaN-aware means and drawdowns). Intermediates such as the return matrix,
+    its moments, the sorted returns and the running maximum are computed
+    once and shared by all requested metrics, metrics that are not requested
+    cost nothing.
+
+    Args:
+        prices (pd.DataFrame): Aligned price matrix, one column per ticker
+        interval (str): Data interval used for annualization
+        metrics (list, optional): Names from ALL_RISK_METRICS, defaults to
+            RISK_METRIC_COLUMNS
+        benchmark (pd.Series, optional): Benchmark prices, required for "beta"
+        confidence (float): Confidence level of VaR and CVaR
+
+    Returns:
+        pd.DataFrame: One column per requested metric, one row per ticker.
+            VaR and CVaR are per-bar losses (positive numbers), drawdown
+            duration and time to recovery are counted in bars.
+    """
+    metrics = list(RISK_METRIC_COLUMNS if metrics is None else metrics)
+    unknown = [m for m in metrics if m not in ALL_RISK_METRICS]
+    if unknown:
+        raise ValueError(f"Unknown risk metrics: {', '.join(unknown)}")
+    if "beta" in metrics and benchmark is None:
+        raise ValueError("The beta metric requires benchmark prices")
+
+    stats = _ReturnStats(prices, interval, benchmark, confidence)
+
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        risk_metrics = pd.DataFrame(
+            {name: getattr(stats, name) for name in metrics},
+            index=prices.columns,
+            columns=metrics
+        )
+
+    # Tickers without any price data get no metrics at all
+    missing = np.isnan(stats.values).all(axis=0)
+    if missing.any():
+        risk_metrics.loc[missing] = np.nan
+
+    return risk_metrics
+
+
+class _ReturnStats:
+    """
+        Lazily computed risk metrics and the intermediates they share.
+
+        Every metric in ALL_RISK_METRICS is a cached property, so requesting
+        several metrics that need e.g. the sorted returns sorts only once.
+    """
+
+    def __init__(self, prices, interval, benchmark, confidence):
+        self.values = prices.to_numpy(dtype=float)
+        self.factor = annualize_factor(interval)
+        self.prices = prices
+        self.benchmark = benchmark
+        self.confidence = confidence
+
+    # Shared intermediates
+
+    @cached_property
+    def returns(self):
+        # Simple returns, a missing price on either side gives a missing return
+        return self.values[1:] / self.values[:-1] - 1
+
+    @cached_property
+    def valid(self):
+        return ~np.isnan(self.returns)
+
+    @cached_property
+    def count(self):
+        return self.valid.sum(axis=0)
+
+    @cached_property
+    def mean(self):
+        return np.where(self.valid, self.returns, 0.0).sum(axis=0) / self.count
+
+    @cached_property
+    def std(self):
+        deviations = np.where(self.valid, self.returns - self.mean, 0.0)
+        std = np.sqrt((deviations ** 2).sum(axis=0) / (self.count - 1))
+        std[self.count < 2] = np.nan
+        return std
+
+    @cached_property
+    def sorted_returns(self):
+        # Missing returns sort to the end of each column
+        return np.sort(self.returns, axis=0)
+
+    @cached_property
+    def tail_size(self):
+        return np.maximum(np.floor(self.count * (1 - self.confidence)), 1).astype(int)
+
+    @cached_property
+    def running_max(self):
+        # fmax skips missing prices
+        return np.fmax.accumulate(self.values, axis=0)
+
+    @cached_property
+    def drawdown(self):
+        return self.values / self.running_max - 1
+
+    @cached_property
+    def normal_quantile(self):
+        return NormalDist().inv_cdf(1 - self.confidence)
+
+    # Metrics
+
+    @cached_property
+    def volatility(self):
+        return self.std * self.factor
+
+    @cached_property
+    def avg_return(self):
+        return self.mean * self.factor
+
+    @cached_property
+    def sharpe_ratio(self):
+        return np.where(self.std > 0, self.mean / self.std * self.factor, 0.0)
+
+    @cached_property
+    def max_drawdown(self):
+        return np.nanmin(self.drawdown, axis=0)
+
+    @cached_property
+    def downside_deviation(self):
+        # Standard deviation of the negative returns only
+        negative = self.valid & (self.returns < 0)
+        negative_count = negative.sum(axis=0)
+        negative_mean = np.where(negative, self.returns, 0.0).sum(axis=0) / negative_count
+        negative_dev = np.where(negative, self.returns - negative_mean, 0.0)
+        downside = np.sqrt((negative_dev ** 2).sum(axis=0) / (negative_count - 1))
+        downside[negative_count == 1] = np.nan
+        downside[negative_count == 0] = 0.0
+        return downside * self.factor
+
+    @cached_property
+    def sortino_ratio(self):
+        # Mean return over the semi-deviation below a target of zero
+        below = np.where(self.valid, np.minimum(self.returns, 0.0), 0.0)
+        semi_deviation = np.sqrt((below ** 2).sum(axis=0) / self.count)
+        return np.where(semi_deviation > 0, self.mean / semi_deviation * self.factor, 0.0)
+
+    @cached_property
+    def var_historical(self):
+        # Empirical quantile with linear interpolation, as np.nanquantile
+        position = (self.count - 1) * (1 - self.confidence)
+        lower = np.floor(position).astype(int).clip(min=0)
+        upper = np.ceil(position).astype(int).clip(min=0)
+        columns = np.arange(self.returns.shape[1])
+        low = self.sorted_returns[lower, columns]
+        high = self.sorted_returns[upper, columns]
+        return -(low + (high - low) * (position - lower))
+
+    @cached_property
+    def cvar_historical(self):
+        # Mean of the worst (1 - confidence) share of returns
+        tails = np.cumsum(np.nan_to_num(self.sorted_returns), axis=0)
+        columns = np.arange(self.returns.shape[1])
+        return -tails[self.tail_size - 1, columns] / self.tail_size
+
+    @cached_property
+    def var_parametric(self):
+        return -(self.mean + self.normal_quantile * self.std)
+
+    @cached_property
+    def cvar_parametric(self):
+        density = NormalDist().pdf(self.normal_quantile)
+        return -(self.mean - self.std * density / (1 - self.confidence))
+
+    @cached_property
+    def beta(self):
+        benchmark = self.benchmark.reindex(self.prices.index).to_numpy(dtype=float)
+        benchmark_returns = (benchmark[1:] / benchmark[:-1] - 1)[:, None]
+
+        # Pairwise complete observations per ticker
+        both = self.valid & ~np.isnan(benchmark_returns)
+        n = both.sum(axis=0)
+        x = np.where(both, self.returns, 0.0)
+        y = np.where(both, benchmark_returns, 0.0)
+        x_mean = x.sum(axis=0) / n
+        y_mean = y.sum(axis=0) / n
+        covariance = ((x - x_mean) * (y - y_mean) * both).sum(axis=0) / (n - 1)
+        variance = (((y - y_mean) * both) ** 2).sum(axis=0) / (n - 1)
+        return covariance / variance
+
+    @cached_property
+    def max_drawdown_duration(self):
+        # Bars since the last running maximum, missing prices count as no change
+        rows = np.arange(len(self.values))[:, None]
+        filled = pd.DataFrame(self.drawdown).ffill().to_numpy()
+        at_peak = ~(filled < 0)
+        last_peak = np.maximum.accumulate(np.where(at_peak, rows, 0), axis=0)
+        return (rows - last_peak).max(axis=0).astype(float)
+
+    @cached_property
+    def time_to_recovery(self):
+        # Bars from the deepest trough back to the peak before it, NaN if not recovered yet
+        drawdown = np.where(np.isnan(self.drawdown), 0.0, self.drawdown)
+        trough = drawdown.argmin(axis=0)
+        columns = np.arange(self.values.shape[1])
+        peak = self.running_max[trough, columns]
+
+        rows = np.arange(len(self.values))[:, None]
+        recovered = (self.values >= peak) & (rows > trough)
+        recovery = np.where(recovered.any(axis=0), recovered.argmax(axis=0) - trough, np.nan)
+        return np.where(drawdown[trough, columns] < 0, recovery, 0.0)
+
+
+# Every metric compute_risk_metrics can return
+ALL_RISK_METRICS = RISK_METRIC_COLUMNS + [
+    "var_historical",
+    "cvar_historical",
+    "var_parametric",
+    "cvar_parametric",
+    "sortino_ratio",
+    "beta",
+    "max_drawdown_duration",
+    "time_to_recovery"
+]
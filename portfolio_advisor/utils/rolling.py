@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+
+from portfolio_advisor.utils.risk_metrics import annualize_factor
+
+# Rows of N x N cross-products held in memory at once by rolling_correlation
+CORRELATION_CHUNK_ROWS = 256
+
+
+class RollingCorrelation:
+    """
+        Correlation matrices of every trailing window, stored as one T x N x N array.
+
+        Row t holds the correlations of the window ending at dates[t], NaN
+        for pairs without a complete window.
+    """
+
+    def __init__(self, dates, tickers, values):
+        self.dates = dates
+        self.tickers = list(tickers)
+        self.values = values
+
+    def at(self, date):
+        """Correlation matrix of the window ending at a date"""
+        row = self.dates.get_loc(date)
+        return pd.DataFrame(self.values[row], index=self.tickers, columns=self.tickers)
+
+    def pair(self, first, second):
+        """Correlation of two tickers over time"""
+        i, j = self.tickers.index(first), self.tickers.index(second)
+        return pd.Series(self.values[:, i, j], index=self.dates, name=f"{first}/{second}")
+
+
+def rolling_returns(prices):
+    """Simple returns of a price matrix, indexed by the date each return ends on"""
+    values = prices.to_numpy(dtype=float)
+    returns = values[1:] / values[:-1] - 1
+    return pd.DataFrame(returns, index=prices.index[1:], columns=prices.columns)
+
+
+def rolling_volatility(returns, window, interval="1d"):
+    """
+    Annualized volatility of every trailing window of returns
+
+    Uses prefix sums of returns and squared returns, so every window of
+    every asset costs O(1) after one O(T x N) pass. Returns are centered on
+    their column means first, which keeps the sum-of-squares difference
+    numerically stable.
+
+    Args:
+        returns (pd.DataFrame): T x N returns
+        window (int): Window length in bars
+        interval (str): Data interval used for annualization
+
+    Returns:
+        pd.DataFrame: T x N volatilities, NaN until a window without missing returns is complete
+    """
+    count, first, second = _window_sums(returns.to_numpy(dtype=float), window)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance = np.maximum(second - first ** 2 / count, 0) / (count - 1)
+    variance[count < window] = np.nan
+
+    return pd.DataFrame(np.sqrt(variance) * annualize_factor(interval), index=returns.index, columns=returns.columns)
+
+
+def rolling_correlation(returns, window, chunk_rows=CORRELATION_CHUNK_ROWS):
+    """
+    Pairwise correlations of every trailing window of returns
+
+    Window sums of the cross-products r_i * r_j come from prefix sums, which
+    makes all windows O(T x N^2) in total. The prefix sums are built chunk by
+    chunk (each chunk plus the window before it) so memory stays bounded by
+    the chunk size instead of the history length.
+
+    Args:
+        returns (pd.DataFrame): T x N returns
+        window (int): Window length in bars
+        chunk_rows (int): Rows of cross-products computed at once
+
+    Returns:
+        RollingCorrelation: T x N x N correlations (float32)
+    """
+    values = returns.to_numpy(dtype=float)
+    n_rows, n_assets = values.shape
+
+    count, first, second = _window_sums(values, window)
+    centered = np.nan_to_num(values - np.nanmean(values, axis=0))
+    complete = count >= window
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        deviation = np.sqrt(np.maximum(second - first ** 2 / window, 0))
+
+    correlations = np.full((n_rows, n_assets, n_assets), np.nan, dtype=np.float32)
+    for start in range(window - 1, n_rows, chunk_rows):
+        stop = min(start + chunk_rows, n_rows)
+
+        # Prefix cross-products of the chunk and the window before it
+        rows = centered[start - window + 1:stop]
+        prefix = np.zeros((len(rows) + 1, n_assets, n_assets))
+        np.cumsum(rows[:, :, None] * rows[:, None, :], axis=0, out=prefix[1:])
+        cross = prefix[window:] - prefix[:-window]
+
+        mean_first = first[start:stop]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            covariance = cross - mean_first[:, :, None] * mean_first[:, None, :] / window
+            chunk = covariance / (deviation[start:stop, :, None] * deviation[start:stop, None, :])
+
+        pair_complete = complete[start:stop, :, None] & complete[start:stop, None, :]
+        correlations[start:stop] = np.where(pair_complete, np.clip(chunk, -1, 1), np.nan)
+
+    return RollingCorrelation(returns.index, returns.columns, correlations)
+
+
+def rolling_drawdown(prices, window):
+    """
+    Drawdown from the highest price of every trailing window
+
+    The trailing maximum uses the van Herk / Gil-Werman algorithm: within
+    blocks of the window length a prefix and a suffix maximum are built,
+    and any window is covered by the suffix of one block and the prefix of
+    the next. That is three comparisons per element whatever the window.
+
+    Args:
+        prices (pd.DataFrame): T x N prices, gaps are filled with the last price
+        window (int): Window length in bars
+
+    Returns:
+        pd.DataFrame: T x N drawdowns (0 at a new window high, negative below it)
+    """
+    values = prices.ffill().to_numpy(dtype=float)
+    peak = rolling_max(values, window)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        drawdown = values / peak - 1
+
+    return pd.DataFrame(drawdown, index=prices.index, columns=prices.columns)
+
+
+def rolling_max(values, window):
+    """
+    Maximum of every trailing window along axis 0 (van Herk / Gil-Werman)
+
+    The first window - 1 rows use the expanding maximum. Missing values are
+    skipped, a window of only missing values gives NaN.
+    """
+    n_rows = len(values)
+    if window <= 1 or n_rows == 0:
+        return values.copy()
+
+    # Pad to whole blocks, -inf never wins a maximum
+    n_blocks = -(-n_rows // window)
+    padded = np.full((n_blocks * window,) + values.shape[1:], -np.inf)
+    padded[:n_rows] = np.where(np.isnan(values), -np.inf, values)
+    blocks = padded.reshape((n_blocks, window) + values.shape[1:])
+
+    prefix = np.maximum.accumulate(blocks, axis=1).reshape(padded.shape)
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+
+    result = np.empty(padded.shape)
+    result[:window - 1] = prefix[:window - 1]
+    result[window - 1:] = np.maximum(suffix[:len(padded) - window + 1], prefix[window - 1:])
+    result = result[:n_rows]
+
+    result[np.isneginf(result)] = np.nan
+    return result
+
+
+def _window_sums(values, window):
+    """Per-window valid counts, sums and sums of squares of centered values, via prefix sums"""
+    valid = ~np.isnan(values)
+    centered = np.where(valid, values - np.nanmean(values, axis=0), 0.0)
+
+    def trailing(matrix):
+        prefix = np.zeros((len(matrix) + 1,) + matrix.shape[1:])
+        np.cumsum(matrix, axis=0, out=prefix[1:])
+        sums = prefix[1:].copy()
+        sums[window:] -= prefix[1:-window]
+        return sums
+
+    return trailing(valid.astype(float)), trailing(centered), trailing(centered ** 2)
@@ -0,0 +1,218 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+
+class RunStore:
+    """
+        Append-only store for the outputs of advisor runs.
+
+        Run metadata and JSON results (recommended assets, risk analyses,
+        recommendations) live in one SQLite database indexed by profile and
+        creation time. Matrices (risk metrics, correlations) are written as
+        Parquet files under runs/<run_id>/. Run ids are unique, so concurrent
+        runs never overwrite each other. With persist=False nothing is
+        written, for hot paths that only need the returned values.
+    """
+
+    def __init__(self, data_dir="./data", persist=True):
+        """
+            Args:
+                data_dir (str): Directory for runs.sqlite and the runs/ folder
+                persist (bool): Write anything at all
+        """
+        self.data_dir = data_dir
+        self.persist = persist
+        self.db_path = os.path.join(data_dir, "runs.sqlite")
+        self.runs_dir = os.path.join(data_dir, "runs")
+        self._lock = threading.Lock()
+
+        if self.persist:
+            os.makedirs(self.runs_dir, exist_ok=True)
+            with self._connect() as connection:
+                # WAL lets readers and concurrent runs proceed while one run writes
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript("""
+                    CREATE TABLE IF NOT EXISTS runs (
+                        run_id TEXT PRIMARY KEY,
+                        kind TEXT NOT NULL,
+                        created_at TEXT NOT NULL,
+                        risk_tolerance INTEGER,
+                        time_horizon REAL,
+                        profile TEXT
+                    );
+                    CREATE INDEX IF NOT EXISTS runs_profile ON runs (risk_tolerance, time_horizon);
+                    CREATE INDEX IF NOT EXISTS runs_created ON runs (created_at);
+                    CREATE TABLE IF NOT EXISTS artifacts (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        run_id TEXT NOT NULL,
+                        name TEXT NOT NULL,
+                        created_at TEXT NOT NULL,
+                        format TEXT NOT NULL,
+                        payload TEXT NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS artifacts_run ON artifacts (run_id, name);
+                """)
+
+    def new_run(self, kind, profile=None):
+        """
+        Register a new run
+
+        Args:
+            kind (str): What produced the run, e.g. "recommendation" or "risk_metrics"
+            profile (dict, optional): User profile, risk_tolerance and time_horizon are indexed
+
+        Returns:
+            str: Run id, sortable by creation time
+        """
+        now = datetime.now()
+        run_id = f"{now.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+        if self.persist:
+            profile = profile or {}
+            with self._lock, self._connect() as connection:
+                connection.execute(
+                    "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        run_id,
+                        kind,
+                        now.isoformat(),
+                        profile.get("risk_tolerance"),
+                        profile.get("time_horizon"),
+                        json.dumps(profile, default=str)
+                    )
+                )
+
+        return run_id
+
+    def save(self, run_id, name, value):
+        """
+        Append a result to a run
+
+        Args:
+            run_id (str): Run id from new_run
+            name (str): Result name, e.g. "correlation_matrix"
+            value (pd.DataFrame | dict | list): DataFrames are stored as Parquet,
+                everything else as JSON
+        """
+        if not self.persist:
+            return
+
+        if isinstance(value, pd.DataFrame):
+            # Results are appended, a repeated name gets its own file
+            path = self.path_for(run_id, f"{name}_{uuid.uuid4().hex[:8]}.parquet")
+            value.to_parquet(path)
+            result_format, payload = "parquet", os.path.relpath(path, self.data_dir)
+        else:
+            result_format, payload = "json", json.dumps(value, default=str)
+
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT INTO artifacts (run_id, name, created_at, format, payload) VALUES (?, ?, ?, ?, ?)",
+                (run_id, name, datetime.now().isoformat(), result_format, payload)
+            )
+
+    def load(self, run_id, name):
+        """
+        Load the latest result with this name from a run
+
+        Returns:
+            pd.DataFrame | dict | list: The stored value, None if there is none
+        """
+        if not self.persist:
+            return None
+
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT format, payload FROM artifacts WHERE run_id = ? AND name = ? ORDER BY id DESC LIMIT 1",
+                (run_id, name)
+            ).fetchone()
+
+        if row is None:
+            return None
+        result_format, payload = row
+        if result_format == "parquet":
+            return pd.read_parquet(os.path.join(self.data_dir, payload))
+        return json.loads(payload)
+
+    def path_for(self, run_id, filename):
+        """
+        Path for a file belonging to a run (e.g. a chart), None without persistence
+
+        Returns:
+            str: Path inside runs/<run_id>/, the folder is created
+        """
+        if not self.persist:
+            return None
+        directory = os.path.join(self.runs_dir, run_id)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, filename)
+
+    def find_runs(self, kind=None, risk_tolerance=None, time_horizon=None, since=None, limit=None):
+        """
+        Find runs, newest first
+
+        Args:
+            kind (str, optional): Only runs of this kind
+            risk_tolerance (int, optional): Only runs for this risk tolerance
+            time_horizon (float, optional): Only runs for this time horizon
+            since (datetime, optional): Only runs created at or after this time
+            limit (int, optional): Maximum number of runs
+
+        Returns:
+            list: Dicts with run_id, kind, created_at, profile and the names of the stored results
+        """
+        if not self.persist:
+            return []
+
+        conditions, params = [], []
+        for column, value in (("kind", kind), ("risk_tolerance", risk_tolerance), ("time_horizon", time_horizon)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since.isoformat())
+
+        query = "SELECT run_id, kind, created_at, profile FROM runs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+
+        with self._connect() as connection:
+            runs = connection.execute(query, params).fetchall()
+            results = {}
+            for run_id, name in connection.execute(
+                "SELECT run_id, name FROM artifacts WHERE run_id IN (SELECT run_id FROM (" + query + ")) ORDER BY id",
+                params
+            ):
+                results.setdefault(run_id, []).append(name)
+
+        return [
+            {
+                "run_id": run_id,
+                "kind": run_kind,
+                "created_at": created_at,
+                "profile": json.loads(profile) if profile else {},
+                "results": list(dict.fromkeys(results.get(run_id, [])))
+            }
+            for run_id, run_kind, created_at, profile in runs
+        ]
+
+    @contextmanager
+    def _connect(self):
+        """Connection that commits on success and is always closed"""
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
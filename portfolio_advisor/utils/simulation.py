@@ -0,0 +1,179 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from portfolio_advisor.utils.risk_metrics import PERIODS_PER_YEAR
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Random numbers generated per chunk, bounds memory to a few arrays of this size
+CHUNK_VALUES = 2_000_000
+
+
+def simulate_wealth(returns, weights, investment_amount, years, mode="parametric", n_paths=10000,
+                    steps_per_year=12, interval="1d", block_steps=3, thresholds=None, seed=None,
+                    max_workers=None, parallel_threshold=50000):
+    """
+    Project a portfolio's wealth over an investment horizon with Monte Carlo
+
+    In "parametric" mode the assets follow a multivariate geometric Brownian
+    motion fitted to the historical returns. A portfolio rebalanced to
+    constant weights is then itself a GBM with drift w'mu and variance w'Cw,
+    so one normal draw per step and path is exact. In "bootstrap" mode the
+    steps are blocks of consecutive historical portfolio returns, which
+    keeps fat tails and short-term autocorrelation.
+
+    Paths are simulated in memory-bounded chunks, spread over a process pool
+    for large path counts. Every chunk has its own seed derived from seed,
+    so the result does not depend on the number of workers.
+
+    Args:
+        returns (pd.DataFrame): T x N periodic simple returns, one column per ticker
+        weights (dict): Portfolio weight per ticker
+        investment_amount (float): Starting wealth
+        years (float): Investment horizon in years
+        mode (str): "parametric" or "bootstrap"
+        n_paths (int): Number of simulated paths
+        steps_per_year (int): Simulation steps per year, 12 for monthly
+        interval (str): Data interval of the returns
+        block_steps (int): Consecutive steps drawn together in bootstrap mode
+        thresholds (list, optional): Wealth levels for shortfall probabilities,
+            defaults to the investment amount
+        seed (int, optional): Seed for reproducible results
+        max_workers (int, optional): Worker processes, 1 to stay in-process
+        parallel_threshold (int): Minimum number of paths for the process pool
+
+    Returns:
+        dict: Terminal wealth percentiles, percentiles at the end of every
+            year and shortfall probabilities
+    """
+    if mode not in ("parametric", "bootstrap"):
+        raise ValueError(f"Unknown simulation mode: {mode}")
+
+    periods_per_year = PERIODS_PER_YEAR.get(interval, 252)
+    n_steps = max(1, int(round(years * steps_per_year)))
+    portfolio_returns = _portfolio_log_returns(returns, weights)
+
+    if mode == "parametric":
+        # Fit the GBM on simple returns, annualized
+        simple = np.expm1(portfolio_returns)
+        drift = simple.mean() * periods_per_year
+        volatility = simple.std(ddof=1) * np.sqrt(periods_per_year)
+        dt = 1.0 / steps_per_year
+        params = ((drift - volatility ** 2 / 2) * dt, volatility * np.sqrt(dt))
+    else:
+        # Prefix sums turn the log return of any window into one subtraction
+        periods_per_step = max(1, periods_per_year // steps_per_year)
+        if len(portfolio_returns) < block_steps * periods_per_step:
+            raise ValueError(
+                f"Bootstrap needs at least {block_steps * periods_per_step} return rows, got {len(portfolio_returns)}"
+            )
+        prefix = np.concatenate([[0.0], np.cumsum(portfolio_returns)])
+        params = (prefix, periods_per_step, block_steps)
+
+    # Split the paths into chunks with independent random streams
+    chunk_paths = max(1, CHUNK_VALUES // n_steps)
+    sizes = [min(chunk_paths, n_paths - start) for start in range(0, n_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(mode, params, size, n_steps, steps_per_year, s) for size, s in zip(sizes, seeds)]
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers > 1 and len(tasks) > 1 and n_paths >= parallel_threshold:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+            chunks = list(executor.map(_simulate_chunk, tasks))
+    else:
+        chunks = [_simulate_chunk(task) for task in tasks]
+
+    checkpoints = np.concatenate([c[0] for c in chunks]) if len(chunks) > 1 else chunks[0][0]
+    minimum = np.concatenate([c[1] for c in chunks]) if len(chunks) > 1 else chunks[0][1]
+
+    return _summarize(checkpoints, minimum, investment_amount, years, mode, n_paths, steps_per_year, thresholds)
+
+
+def _portfolio_log_returns(returns, weights):
+    """Log returns of the portfolio rebalanced to constant weights every period"""
+    if not isinstance(returns, pd.DataFrame):
+        raise TypeError("returns must be a DataFrame with one column per ticker")
+
+    held = {t: w for t, w in weights.items() if w and t in returns.columns}
+    missing = [t for t, w in weights.items() if w and t not in returns.columns]
+    if missing:
+        print(f"No return history for {', '.join(missing)}, simulating the remaining weights")
+    if not held:
+        raise ValueError("None of the weighted tickers have return history")
+
+    matrix = returns[list(held)].dropna().values
+    w = np.array(list(held.values()), dtype=float)
+    w = w / w.sum()
+
+    return np.log1p(matrix @ w)
+
+
+def _simulate_chunk(task):
+    """
+    Simulate one chunk of paths
+
+    Returns:
+        tuple: (paths x years log growth at every year end plus the final step,
+            minimum log growth of every path)
+    """
+    mode, params, n_paths, n_steps, steps_per_year, seed = task
+    rng = np.random.default_rng(seed)
+
+    if mode == "parametric":
+        drift, scale = params
+        steps = rng.standard_normal((n_paths, n_steps))
+        steps *= scale
+        steps += drift
+    else:
+        prefix, periods_per_step, block_steps = params
+        n_blocks = -(-n_steps // block_steps)
+        last_start = len(prefix) - 1 - block_steps * periods_per_step
+        starts = rng.integers(0, last_start + 1, size=(n_paths, n_blocks))
+        index = np.repeat(starts, block_steps, axis=1)[:, :n_steps]
+        index += (np.arange(n_steps) % block_steps) * periods_per_step
+        steps = prefix[index + periods_per_step] - prefix[index]
+
+    growth = np.cumsum(steps, axis=1, out=steps)
+
+    # Year ends plus the final step for horizons that are not whole years
+    columns = list(range(steps_per_year - 1, n_steps, steps_per_year))
+    if not columns or columns[-1] != n_steps - 1:
+        columns.append(n_steps - 1)
+
+    return growth[:, columns], np.minimum(growth.min(axis=1), 0.0)
+
+
+def _summarize(checkpoints, minimum, investment_amount, years, mode, n_paths, steps_per_year, thresholds):
+    wealth = investment_amount * np.exp(checkpoints)
+    terminal = wealth[:, -1]
+    lowest = investment_amount * np.exp(minimum)
+
+    if thresholds is None:
+        thresholds = [investment_amount]
+
+    terminal_percentiles = np.percentile(terminal, PERCENTILES)
+    yearly_percentiles = np.percentile(wealth, PERCENTILES, axis=0)
+
+    return {
+        "mode": mode,
+        "paths": n_paths,
+        "years": years,
+        "steps_per_year": steps_per_year,
+        "investment_amount": investment_amount,
+        "expected_wealth": float(terminal.mean()),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, terminal_percentiles)},
+        "yearly_percentiles": {f"p{p}": row.tolist() for p, row in zip(PERCENTILES, yearly_percentiles)},
+        "probability_of_loss": float((terminal < investment_amount).mean()),
+        "shortfall": [
+            {
+                "threshold": threshold,
+                "probability": float((terminal < threshold).mean()),
+                "probability_ever": float((lowest < threshold).mean())
+            }
+            for threshold in thresholds
+        ]
+    }
@@ -0,0 +1,250 @@
+import bisect
+import difflib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+# Symbol list shipped with the repository, one ticker per line
+DEFAULT_SYMBOLS_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "data", "symbols.txt")
+
+
+class SymbolTable:
+    """
+        Local index of known ticker symbols.
+
+        Checks tickers proposed by the LLM before any market data is requested:
+        membership is a set lookup, prefix searches bisect a sorted list and
+        close matches for typos come from difflib. Unknown tickers are rejected
+        in microseconds instead of failing later inside a download.
+    """
+
+    def __init__(self, symbols=()):
+        """
+            Args:
+                symbols (iterable): Known ticker symbols
+        """
+        self._symbols = set()
+        self._sorted = []
+        self.add(symbols)
+
+    def __contains__(self, ticker):
+        return ticker in self._symbols
+
+    def __len__(self):
+        return len(self._symbols)
+
+    @classmethod
+    def load(cls, path=DEFAULT_SYMBOLS_FILE):
+        """
+        Read a symbol file, one ticker per line
+
+        Anything after the first whitespace is ignored (e.g. a company name),
+        as are empty lines and lines starting with #.
+
+        Args:
+            path (str): Symbol file
+
+        Returns:
+            SymbolTable: The table, empty if the file does not exist
+        """
+        if not os.path.exists(path):
+            print(f"No symbol file at {path}")
+            return cls()
+
+        with open(path) as f:
+            lines = (line.split() for line in f if line.strip() and not line.startswith("#"))
+            return cls(normalize(fields[0]) for fields in lines)
+
+    def add(self, symbols):
+        """Add ticker symbols to the table"""
+        new = {normalize(symbol) for symbol in symbols} - self._symbols
+        new.discard("")
+        if new:
+            self._symbols.update(new)
+            self._sorted = sorted(self._symbols)
+
+    def with_prefix(self, prefix, limit=10):
+        """
+        Known symbols starting with a prefix, in alphabetical order
+
+        Args:
+            prefix (str): Ticker prefix
+            limit (int): Maximum number of symbols
+
+        Returns:
+            list: Matching ticker symbols
+        """
+        prefix = normalize(prefix)
+        start = bisect.bisect_left(self._sorted, prefix)
+        matches = []
+        for symbol in self._sorted[start:start + limit]:
+            if not symbol.startswith(prefix):
+                break
+            matches.append(symbol)
+        return matches
+
+    def suggest(self, ticker, count=3, cutoff=0.6):
+        """
+        Known symbols close to an unknown ticker, best match first
+
+        Args:
+            ticker (str): Ticker symbol
+            count (int): Maximum number of suggestions
+            cutoff (float): Minimum difflib similarity in [0, 1]
+
+        Returns:
+            list: Suggested ticker symbols
+        """
+        ticker = normalize(ticker)
+        if not ticker:
+            return []
+
+        # Typos rarely change the first letter, only search the whole table when that fails
+        candidates = self.with_prefix(ticker[0], limit=len(self._sorted))
+        matches = difflib.get_close_matches(ticker, candidates, n=count, cutoff=cutoff)
+        if not matches:
+            matches = difflib.get_close_matches(ticker, self._sorted, n=count, cutoff=cutoff)
+        return matches
+
+    def resolve(self, ticker):
+        """
+        Map a ticker to its known spelling
+
+        Case, surrounding whitespace, a leading $ and the share class
+        separator (BRK.B vs BRK-B) are corrected, anything else is not.
+
+        Args:
+            ticker (str): Ticker symbol as proposed
+
+        Returns:
+            str: Known ticker symbol, None if the ticker is unknown
+        """
+        symbol = normalize(ticker)
+        if symbol in self._symbols:
+            return symbol
+
+        for variant in (symbol.replace(".", "-"), symbol.replace("-", ".")):
+            if variant in self._symbols:
+                return variant
+        return None
+
+    def validate(self, tickers):
+        """
+        Split tickers into known and unknown ones
+
+        Args:
+            tickers (list): Ticker symbols as proposed
+
+        Returns:
+            tuple: (dict proposed ticker -> known symbol, dict unknown ticker -> suggestions)
+        """
+        valid = {}
+        invalid = {}
+        for ticker in tickers:
+            symbol = self.resolve(ticker)
+            if symbol is None:
+                invalid[ticker] = self.suggest(ticker)
+            else:
+                valid[ticker] = symbol
+        return valid, invalid
+
+
+class SymbolVerifier:
+    """
+        Decides on tickers outside the symbol table with one provider lookup.
+
+        A hand-picked symbol list never covers every listing, so a ticker the
+        table does not know is looked up once through the fundamentals
+        fetcher. If its fundamentals describe a listed security it is added
+        to the table. Verdicts are persisted per provider in
+        data_dir/symbols_checked_<provider>.json, listed tickers for good and
+        unlisted ones until they are older than the TTL, so an unknown ticker
+        costs one request instead of a failed download in every run. Failed
+        lookups are never persisted.
+    """
+
+    def __init__(self, table, fundamentals, data_dir="./data", ttl=timedelta(days=7)):
+        """
+            Args:
+                table (SymbolTable): Known symbols, verified tickers are added to it
+                fundamentals (FundamentalsFetcher): Source of the lookups
+                data_dir (str): Directory of the verdict file
+                ttl (timedelta): How long an unlisted verdict is reused
+        """
+        self.table = table
+        self.fundamentals = fundamentals
+        self.ttl = ttl
+        # Replay or synthetic data must not blacklist real tickers for a live provider
+        self.path = os.path.join(data_dir, f"symbols_checked_{fundamentals.provider.name}.json")
+
+        self._lock = threading.Lock()
+        self._checked = self._load()
+        self.table.add(ticker for ticker, verdict in self._checked.items() if verdict["listed"])
+
+    def verify(self, ticker):
+        """
+        Check a ticker the table does not know with the provider
+
+        Args:
+            ticker (str): Ticker symbol as proposed
+
+        Returns:
+            str: The normalized symbol if it is listed, None otherwise
+        """
+        symbol = normalize(ticker)
+        if not symbol:
+            return None
+
+        now = self.fundamentals.provider.now()
+        with self._lock:
+            verdict = self._checked.get(symbol)
+        fresh = verdict and (verdict["listed"] or now - datetime.fromisoformat(verdict["checked_at"]) < self.ttl)
+
+        if not fresh:
+            info = self.fundamentals.get_info([symbol])[symbol]
+            if isinstance(info, Exception):
+                # Says nothing about the ticker, try again next time
+                print(f"Could not check {symbol}: {info}")
+                return None
+
+            verdict = {"listed": is_listed(info), "checked_at": now.isoformat()}
+            with self._lock:
+                self._checked[symbol] = verdict
+                self._save()
+            if verdict["listed"]:
+                self.table.add([symbol])
+
+        return symbol if verdict["listed"] else None
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable symbol checks: {e}")
+            return {}
+
+    def _save(self):
+        # Unique temp file, agents of concurrent runs may save at the same time
+        temp_file = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(self._checked, f)
+        os.replace(temp_file, self.path)
+
+
+def is_listed(info):
+    """Whether fundamentals from a provider describe a listed security"""
+    if not isinstance(info, dict):
+        return False
+    return any(info.get(field) for field in ("quoteType", "shortName", "longName"))
+
+
+def normalize(ticker):
+    """Canonical form of a ticker symbol: stripped, upper case, without a leading $"""
+    if not isinstance(ticker, str):
+        return ""
+    return ticker.strip().lstrip("$").upper()
@@ -0,0 +1,271 @@
+import os
+
+import numpy as np
+
+# Numeric attributes of the index and the fundamentals field each one is read from
+NUMERIC_FIELDS = {
+    "market_cap": "marketCap",
+    "beta": "beta",
+    "pe_ratio": "trailingPE",
+    "dividend_yield": "dividendYield",
+    "average_volume": "averageVolume"
+}
+
+
+class UniverseIndex:
+    """
+        Columnar index of a stock universe for screening by fundamentals.
+
+        Every attribute is one typed numpy array (float64 for the numeric
+        fields, missing values as NaN, and int32 codes into a small list of
+        sector names), so a compound filter is a handful of vectorized
+        comparisons and a top-K sort is an argpartition. Screening thousands
+        of symbols takes microseconds instead of a loop over info dicts.
+
+        The index is stored as a single .npz file and refreshed in place from
+        the FundamentalsFetcher, which only fetches missing or expired tickers.
+    """
+
+    def __init__(self, tickers=(), sector_codes=None, sectors=(), columns=None):
+        """
+            Args:
+                tickers (list): Ticker symbols, one row each
+                sector_codes (np.ndarray, optional): Row index into sectors, -1 if unknown
+                sectors (list): Distinct sector names
+                columns (dict, optional): NUMERIC_FIELDS name -> float array
+        """
+        self.tickers = np.asarray(list(tickers), dtype=object)
+        n_rows = len(self.tickers)
+        self.sectors = list(sectors)
+        self.sector_codes = (
+            np.asarray(sector_codes, dtype=np.int32) if sector_codes is not None else np.full(n_rows, -1, np.int32)
+        )
+        columns = columns or {}
+        self.columns = {
+            name: np.asarray(columns[name], dtype=float) if name in columns else np.full(n_rows, np.nan)
+            for name in NUMERIC_FIELDS
+        }
+        self._rows = {ticker: row for row, ticker in enumerate(self.tickers)}
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self._rows
+
+    @classmethod
+    def from_infos(cls, infos):
+        """
+        Build an index from raw fundamentals, e.g. FundamentalsFetcher.get_info()
+
+        Args:
+            infos (dict): Fundamentals per ticker, exceptions are skipped
+
+        Returns:
+            UniverseIndex: The index
+        """
+        index = cls()
+        index.update(infos)
+        return index
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved with save(), an empty index if the file does not exist"""
+        if not os.path.exists(path):
+            return cls()
+
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                tickers=data["tickers"].tolist(),
+                sector_codes=data["sector_codes"],
+                sectors=data["sectors"].tolist(),
+                columns={name: data[name] for name in NUMERIC_FIELDS if name in data}
+            )
+
+    def save(self, path):
+        """Write the index to an .npz file, replacing it atomically"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # np.savez appends .npz to names without it, keep the suffix on the temp file
+        temp_file = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            temp_file,
+            tickers=self.tickers.astype(str),
+            sector_codes=self.sector_codes,
+            sectors=np.asarray(self.sectors, dtype=str),
+            **self.columns
+        )
+        os.replace(temp_file, path)
+
+    def update(self, infos):
+        """
+        Insert or overwrite rows from raw fundamentals
+
+        Existing tickers are updated in place, new ones are appended with a
+        single concatenation per column. Failed lookups (exceptions or empty
+        dicts) leave their row untouched.
+
+        Args:
+            infos (dict): Fundamentals per ticker
+
+        Returns:
+            int: Number of rows inserted or changed
+        """
+        infos = {ticker: info for ticker, info in infos.items() if info and not isinstance(info, Exception)}
+        if not infos:
+            return 0
+
+        sector_lookup = {sector: code for code, sector in enumerate(self.sectors)}
+
+        def sector_code(info):
+            sector = info.get("sector")
+            if not isinstance(sector, str) or not sector:
+                return -1
+            if sector not in sector_lookup:
+                sector_lookup[sector] = len(self.sectors)
+                self.sectors.append(sector)
+            return sector_lookup[sector]
+
+        existing = [ticker for ticker in infos if ticker in self._rows]
+        new = [ticker for ticker in infos if ticker not in self._rows]
+        changed = 0
+
+        if existing:
+            rows = np.fromiter((self._rows[ticker] for ticker in existing), dtype=np.intp, count=len(existing))
+            codes = np.fromiter((sector_code(infos[ticker]) for ticker in existing), dtype=np.int32, count=len(existing))
+            values = {
+                name: np.fromiter((_number(infos[t].get(field)) for t in existing), dtype=float, count=len(existing))
+                for name, field in NUMERIC_FIELDS.items()
+            }
+
+            differs = self.sector_codes[rows] != codes
+            for name, column in values.items():
+                old = self.columns[name][rows]
+                differs |= ~((old == column) | (np.isnan(old) & np.isnan(column)))
+            changed += int(differs.sum())
+
+            self.sector_codes[rows] = codes
+            for name, column in values.items():
+                self.columns[name][rows] = column
+
+        if new:
+            start = len(self.tickers)
+            self.tickers = np.concatenate([self.tickers, np.asarray(new, dtype=object)])
+            self.sector_codes = np.concatenate([
+                self.sector_codes,
+                np.fromiter((sector_code(infos[ticker]) for ticker in new), dtype=np.int32, count=len(new))
+            ])
+            for name, field in NUMERIC_FIELDS.items():
+                column = np.fromiter((_number(infos[t].get(field)) for t in new), dtype=float, count=len(new))
+                self.columns[name] = np.concatenate([self.columns[name], column])
+            self._rows.update((ticker, start + offset) for offset, ticker in enumerate(new))
+            changed += len(new)
+
+        return changed
+
+    def refresh(self, fetcher, tickers=None):
+        """
+        Bring the index up to date with the fundamentals fetcher
+
+        Only tickers whose cached fundamentals are missing or expired are
+        fetched, and only rows whose values changed are rewritten.
+
+        Args:
+            fetcher (FundamentalsFetcher): Source of the fundamentals
+            tickers (list, optional): Tickers to refresh or add, all indexed tickers by default
+
+        Returns:
+            int: Number of rows inserted or changed
+        """
+        if tickers is None:
+            tickers = self.tickers.tolist()
+        if not tickers:
+            return 0
+        return self.update(fetcher.get_info(tickers))
+
+    def mask(self, sectors=None, **bounds):
+        """
+        Boolean row mask of a compound filter
+
+        Args:
+            sectors (list, optional): Allowed sector names, case-insensitive
+            **bounds: min_<field> / max_<field> for any NUMERIC_FIELDS name, inclusive.
+                Rows where a bounded field is missing do not match.
+
+        Returns:
+            np.ndarray: One bool per row
+        """
+        mask = np.ones(len(self.tickers), dtype=bool)
+
+        if sectors is not None:
+            wanted = {sector.lower() for sector in sectors}
+            codes = [code for code, sector in enumerate(self.sectors) if sector.lower() in wanted]
+            mask &= np.isin(self.sector_codes, codes)
+
+        for key, bound in bounds.items():
+            if bound is None:
+                continue
+            side, _, name = key.partition("_")
+            if side not in ("min", "max") or name not in self.columns:
+                raise ValueError(f"Unknown filter: {key}")
+            column = self.columns[name]
+            # Comparisons with NaN are False, so missing values never match
+            mask &= column >= bound if side == "min" else column <= bound
+
+        return mask
+
+    def query(self, sectors=None, **bounds):
+        """
+        Tickers matching a compound filter, in index order
+
+            index.query(sectors=["Technology"], min_market_cap=1e10, max_beta=1.2)
+
+        Returns:
+            list: Matching ticker symbols
+        """
+        return self.tickers[self.mask(sectors, **bounds)].tolist()
+
+    def top_k(self, k, by="market_cap", ascending=False, sectors=None, **bounds):
+        """
+        The k best tickers by one attribute among those matching a filter
+
+        Args:
+            k (int): Number of tickers
+            by (str): NUMERIC_FIELDS name to sort by, missing values are skipped
+            ascending (bool): Smallest values first, largest by default
+            sectors (list, optional): Allowed sector names
+            **bounds: min_<field> / max_<field> filters as in mask()
+
+        Returns:
+            list: Up to k ticker symbols, sorted
+        """
+        if by not in self.columns:
+            raise ValueError(f"Unknown attribute: {by}")
+
+        column = self.columns[by]
+        rows = np.flatnonzero(self.mask(sectors, **bounds) & ~np.isnan(column))
+        if k <= 0 or not len(rows):
+            return []
+
+        keys = column[rows] if ascending else -column[rows]
+        if k < len(rows):
+            # Partial selection is O(N), only the k survivors are sorted
+            selected = np.argpartition(keys, k - 1)[:k]
+            rows, keys = rows[selected], keys[selected]
+        order = np.argsort(keys, kind="stable")
+        return self.tickers[rows[order]].tolist()
+
+    def sector_of(self, ticker):
+        """Sector name of a ticker, None if unknown"""
+        code = self.sector_codes[self._rows[ticker]]
+        return self.sectors[code] if code >= 0 else None
+
+
+def _number(value):
+    """Fundamentals value as a float, NaN for missing or non-numeric values"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
@@ -0,0 +1,99 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+ASSETS = [
+    {"ticker": "AAPL", "name": "Apple Inc.", "type": "stock", "justification": "Quality"},
+    {"ticker": "JNJ", "name": "Johnson & Johnson", "type": "stock", "justification": "Defensive"},
+    {"ticker": "SPY", "name": "SPDR S&P 500 ETF", "type": "ETF", "justification": "Broad market"}
+]
+
+RISK_ANALYSIS = {
+    "appropriate_assets": ["SPY"],
+    "too_risky_assets": [],
+    "too_conservative_assets": [],
+    "portfolio_strategy": "Core and satellite",
+    "reasoning": "Broad market core"
+}
+
+
+class FakeChat:
+    """
+        Stand-in for ollama.chat that answers the advisor's prompts.
+
+        The asset prompt gets the assets, anything else the risk analysis,
+        both as JSON and split into chunks when streamed. Queued replies
+        take precedence and are used up in order. Every call is recorded as
+        (last message or None, keyword arguments).
+    """
+
+    def __init__(self, assets=ASSETS, risk_analysis=RISK_ANALYSIS):
+        self.assets = assets
+        self.risk_analysis = risk_analysis
+        self.replies = []
+        self.delay = 0.0
+        self.chunk_size = 40
+        self.stats = None
+        self.calls = []
+        self.streamed = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, model, messages, options=None, stream=False, **kwargs):
+        question = messages[-1]["content"] if messages else None
+        with self._lock:
+            self.calls.append((question, kwargs))
+            self.streamed += bool(stream)
+            reply = self.replies.pop(0) if self.replies else self.reply(question)
+        if self.delay:
+            time.sleep(self.delay)
+
+        text = reply if isinstance(reply, str) else json.dumps(reply)
+        # Ollama reports token counts and durations with the last message
+        final = {"done": True, **self.stats} if self.stats else {}
+        if stream:
+            chunks = [{"message": {"content": text[i:i + self.chunk_size]}} for i in range(0, len(text), self.chunk_size)]
+            if final:
+                chunks.append({"message": {"content": ""}, **final})
+            return iter(chunks)
+        return {"message": {"content": text}, **final}
+
+    def reply(self, question):
+        """Reply to a question, replace it for custom answers"""
+        if question and "Recommend investment assets" in question:
+            return self.assets
+        return self.risk_analysis
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """
+    Path to a private copy of the recorded market data (AAPL, MSFT, SPY, UNH
+    and JNJ, 30 daily bars), so no test can overwrite the tracked file
+    """
+    directory = tmp_path / "recording"
+    directory.mkdir()
+    return shutil.copy(os.path.join(FIXTURES, "market_data_1d_30d.csv"), directory)
+
+
+@pytest.fixture
+def assets():
+    """Assets FakeChat recommends by default, valid for RECOMMENDED_ASSETS_SCHEMA"""
+    return ASSETS
+
+
+@pytest.fixture
+def fake_chat(monkeypatch):
+    """
+    FakeChat installed in place of ollama.chat, tests adjust its attributes
+    """
+    from portfolio_advisor.models import base_model
+
+    chat = FakeChat()
+    monkeypatch.setattr(base_model.ollama, "chat", chat)
+    return chat
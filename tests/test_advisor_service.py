@@ -0,0 +1,167 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from advisor_service import AdvisorService, _normalize_profile
+from portafolio_system import PortfolioAdvisorSystem
+from portfolio_advisor.utils.market_data import ReplayProvider
+from portfolio_advisor.utils.price_cache import PriceCache
+
+
+async def _request(port, method, path, payload=None):
+    """Minimal HTTP/1.1 client, returns (status, decoded JSON body)"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n".encode() + body
+    )
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), json.loads(content)
+
+
+def test_service_coalesces_identical_profiles(tmp_path, fake_chat, recording):
+    """
+    Test that concurrent identical requests share one computation and the
+    model is kept loaded
+    """
+    # Slow enough for concurrent requests to overlap
+    fake_chat.delay = 0.2
+    calls = fake_chat.calls
+
+    advisor = PortfolioAdvisorSystem(
+        data_dir=str(tmp_path), provider=ReplayProvider(recording), stream_llm=False, llm_keep_alive="30m"
+    )
+    service = AdvisorService(advisor, max_workers=4)
+    service.warm_up()
+
+    # Warm up only loads the model
+    assert calls == [(None, {"keep_alive": "30m"})]
+
+    async def scenario():
+        port = await service.start(port=0)
+        try:
+            profile = {"risk_tolerance": 5, "time_horizon": 10, "focus_sectors": ["Technology", "Healthcare"]}
+            reordered = dict(profile, focus_sectors=["Healthcare", "Technology"])
+            responses = await asyncio.gather(
+                _request(port, "POST", "/recommendations", profile),
+                _request(port, "POST", "/recommendations", reordered),
+                _request(port, "POST", "/recommendations", profile)
+            )
+            stored = await _request(port, "GET", f"/runs/{responses[0][1]['run_id']}")
+            health = await _request(port, "GET", "/health")
+            invalid = await _request(port, "POST", "/recommendations", {"risk_tolerance": 11, "time_horizon": 5})
+            missing = await _request(port, "GET", "/unknown")
+            return responses, stored, health, invalid, missing
+        finally:
+            await service.close()
+
+    responses, stored, health, invalid, missing = asyncio.run(scenario())
+
+    assert [status for status, _ in responses] == [200, 200, 200]
+    assert len({body["run_id"] for _, body in responses}) == 1
+    # One asset selection and one risk analysis for all three requests
+    assert len(calls) == 1 + 2
+    assert all(kwargs["keep_alive"] == "30m" for _, kwargs in calls)
+    # Both structured calls are constrained to their schema
+    assert all("format" in kwargs for content, kwargs in calls if content is not None)
+
+    assert stored[0] == 200
+    assert stored[1]["portfolio_allocations"] == responses[0][1]["portfolio_allocations"]
+    assert health[0] == 200 and health[1]["coalesced"] == 2 and health[1]["in_flight"] == 0
+    assert invalid[0] == 400
+    assert missing[0] == 404
+
+
+def test_price_cache_single_flight_per_ticker(tmp_path, recording):
+    """
+    Test that overlapping concurrent requests download each ticker once
+    and requests for other tickers are not blocked
+    """
+    provider = ReplayProvider(recording)
+    downloads = []
+    replay_download = provider.download
+
+    # Only passes once two downloads are in flight together
+    both_downloading = threading.Barrier(2, timeout=5)
+
+    def slow_download(tickers, start=None, interval="1d"):
+        downloads.append(tuple(tickers))
+        both_downloading.wait()
+        # Keep the download in flight while the overlapping request arrives
+        time.sleep(0.1)
+        return replay_download(tickers, start=start, interval=interval)
+
+    provider.download = slow_download
+    cache = PriceCache(data_dir=str(tmp_path), provider=provider)
+
+    results = {}
+    requests = {"first": ["AAPL", "MSFT"], "second": ["MSFT", "AAPL"], "third": ["JNJ"]}
+    threads = [
+        threading.Thread(target=lambda name=name, tickers=tickers: results.__setitem__(name, cache.get_history(tickers)))
+        for name, tickers in requests.items()
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    downloaded = [ticker for group in downloads for ticker in group]
+    assert sorted(downloaded) == ["AAPL", "JNJ", "MSFT"]
+    # The JNJ download ran next to the AAPL/MSFT one, otherwise the barrier had broken
+    assert not both_downloading.broken
+    assert set(results) == set(requests)
+    assert results["first"]["AAPL"].equals(results["second"]["AAPL"])
+
+
+@pytest.mark.parametrize("profile", [
+    {"risk_tolerance": 5, "time_horizon": 10, "focus_sectors": ["Technology", 3]},
+    {"risk_tolerance": 5, "time_horizon": 10, "focus_sectors": {"Technology": True}},
+    {"risk_tolerance": 5, "time_horizon": 10, "investment_amount": [10000]},
+    {"risk_tolerance": 5, "time_horizon": 10, "investment_amount": -5},
+    {"risk_tolerance": 5, "time_horizon": float("nan")},
+    {"risk_tolerance": 5, "time_horizon": float("inf")},
+    {"risk_tolerance": 5.5, "time_horizon": 10},
+    {"risk_tolerance": True, "time_horizon": 10},
+    {"risk_tolerance": "5", "time_horizon": 10},
+    {"risk_tolerance": 5, "time_horizon": 10 ** 400},
+    {"time_horizon": 10}
+])
+def test_malformed_profiles_are_rejected(profile):
+    """
+    Test that every malformed field raises ValueError, the 400 path of the service
+    """
+    with pytest.raises(ValueError):
+        _normalize_profile(profile)
+
+
+def test_malformed_payloads_get_400(tmp_path, recording):
+    """
+    Test that bad field types are answered with 400 instead of a dropped connection
+    """
+    advisor = PortfolioAdvisorSystem(data_dir=str(tmp_path), provider=ReplayProvider(recording), persist=False)
+    service = AdvisorService(advisor, max_workers=1)
+
+    async def scenario():
+        port = await service.start(port=0)
+        try:
+            return await asyncio.gather(
+                _request(port, "POST", "/recommendations", {"risk_tolerance": 5, "time_horizon": 5, "focus_sectors": [1]}),
+                _request(port, "POST", "/recommendations", [{"risk_tolerance": 5, "time_horizon": 5, "investment_amount": [1]}]),
+                _request(port, "POST", "/recommendations", {"risk_tolerance": 5, "time_horizon": float("nan")})
+            )
+        finally:
+            await service.close()
+
+    responses = asyncio.run(scenario())
+    assert [status for status, _ in responses] == [400, 400, 400]
+    assert all(body["error"].startswith("Invalid profile") for _, body in responses)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
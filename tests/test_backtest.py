@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio_advisor.agents.risk_assesment import RiskAssessmentAgent
+from portfolio_advisor.models.base_model import FinancialAdvisorLLM
+from portfolio_advisor.utils.backtest import run_backtest
+from portfolio_advisor.utils.market_data import ReplayProvider
+
+
+def _prices(rows=200, n=4, seed=0):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0005, 0.015, (rows, n))
+    index = pd.bdate_range("2024-01-02", periods=rows)
+    return pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), index=index, columns=[f"A{i}" for i in range(n)])
+
+
+def _reference_nav(prices, weights, rebalance_rows=(), threshold=None):
+    """Day by day simulation of one portfolio"""
+    values = prices.to_numpy()
+    units = weights / values[0]
+    nav, turnover = [1.0], 0.0
+    for t in range(1, len(values)):
+        total = (units * values[t]).sum()
+        nav.append(total)
+        current = units * values[t] / total
+        if t in rebalance_rows or (threshold is not None and np.abs(current - weights).max() > threshold):
+            turnover += np.abs(current - weights).sum() / 2
+            units = weights * total / values[t]
+    return np.array(nav), turnover
+
+
+def test_buy_and_hold_and_calendar_rebalancing_match_reference():
+    """
+    Test buy-and-hold and monthly rebalancing against a per-day loop
+    """
+    prices = _prices()
+    weights = pd.DataFrame([[0.4, 0.3, 0.2, 0.1], [0.25, 0.25, 0.25, 0.25]], columns=prices.columns, index=["a", "b"])
+
+    hold = run_backtest(prices, weights)
+    monthly = run_backtest(prices, weights, rebalance="monthly")
+
+    month_starts = set(np.flatnonzero(np.diff(prices.index.month) != 0) + 1)
+    for label, row in weights.iterrows():
+        nav, _ = _reference_nav(prices, row.to_numpy())
+        np.testing.assert_allclose(hold.nav[label], nav)
+        assert hold.turnover[label] == 0
+
+        nav, turnover = _reference_nav(prices, row.to_numpy(), rebalance_rows=month_starts)
+        np.testing.assert_allclose(monthly.nav[label], nav)
+        assert monthly.turnover[label] == pytest.approx(turnover)
+
+
+def test_threshold_rebalancing_matches_reference():
+    """
+    Test threshold rebalancing against a per-day loop, including the extremes
+    """
+    prices = _prices(seed=4)
+    weights = np.array([0.4, 0.3, 0.2, 0.1])
+
+    result = run_backtest(prices, weights, rebalance="threshold", threshold=0.02)
+    nav, turnover = _reference_nav(prices, weights, threshold=0.02)
+    np.testing.assert_allclose(result.nav[0], nav)
+    assert result.turnover[0] == pytest.approx(turnover)
+    assert turnover > 0
+
+    never = run_backtest(prices, weights, rebalance="threshold", threshold=1.0)
+    np.testing.assert_allclose(never.nav, run_backtest(prices, weights).nav)
+
+    daily = run_backtest(prices, weights, rebalance="threshold", threshold=0.0)
+    expected = np.cumprod(np.concatenate([[1.0], (prices.pct_change().iloc[1:].to_numpy() @ weights) + 1]))
+    np.testing.assert_allclose(daily.nav[0], expected)
+
+
+def test_many_portfolios_and_drawdowns():
+    """
+    Test a bulk run of candidate portfolios
+    """
+    prices = _prices(rows=250, n=20)
+    weights = np.random.default_rng(1).dirichlet(np.ones(20), size=2000)
+
+    result = run_backtest(prices, weights, rebalance="quarterly")
+
+    assert result.nav.shape == (250, 2000)
+    assert (result.drawdown <= 0).all().all()
+    np.testing.assert_allclose(result.metrics["max_drawdown"], result.drawdown.min())
+    np.testing.assert_allclose(result.metrics["total_return"], result.nav.iloc[-1] - 1)
+
+
+def test_agent_backtest_against_benchmark(tmp_path, recording):
+    """
+    Test that a benchmark-only portfolio tracks the benchmark exactly
+    """
+    agent = RiskAssessmentAgent(
+        llm=FinancialAdvisorLLM(), data_dir=str(tmp_path), provider=ReplayProvider(recording)
+    )
+    allocations = pd.DataFrame([{"SPY": 1.0}, {"AAPL": 0.5, "JNJ": 0.5}], index=["spy", "mix"])
+
+    result = agent.backtest_allocations(allocations, period="1mo", rebalance="none", benchmark="SPY")
+
+    assert result.metrics.at["spy", "beta"] == pytest.approx(1.0)
+    assert result.metrics.at["spy", "excess_return"] == pytest.approx(0.0, abs=1e-12)
+    assert result.metrics.at["spy", "tracking_error"] == pytest.approx(0.0, abs=1e-12)
+    assert np.isfinite(result.metrics.at["mix", "information_ratio"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
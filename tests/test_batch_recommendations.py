@@ -0,0 +1,54 @@
+import os
+
+from portafolio_system import PortfolioAdvisorSystem
+from portfolio_advisor.utils.market_data import ReplayProvider
+
+
+def test_batch_shares_data_and_llm_work(tmp_path, fake_chat, recording):
+    """
+    Test that a profile grid costs one data fetch and deduplicated LLM calls
+    """
+    provider = ReplayProvider(recording)
+    downloads = []
+    replay_download = provider.download
+    provider.download = lambda *args, **kwargs: downloads.append(args) or replay_download(*args, **kwargs)
+
+    advisor = PortfolioAdvisorSystem(data_dir=str(tmp_path), provider=provider)
+    profiles = [
+        {"risk_tolerance": risk, "time_horizon": horizon, "investment_amount": 10000}
+        for risk in (3, 5, 8) for horizon in (3, 10)
+    ] + [{"risk_tolerance": 3, "time_horizon": 3}]
+
+    recommendations = advisor.create_batch_recommendations(profiles, max_workers=2)
+
+    assert len(recommendations) == len(profiles)
+    assert len(downloads) == 1
+    # Six distinct selections plus one risk analysis per risk tolerance
+    assert len(fake_chat.calls) == 6 + 3
+    for recommendation in recommendations:
+        assert abs(sum(recommendation["portfolio_allocations"].values()) - 100) < 0.1
+    assert recommendations[-1]["portfolio_allocations"] == recommendations[0]["portfolio_allocations"]
+
+    # Results go to the run store instead of timestamped files
+    assert not [name for name in os.listdir(tmp_path) if name.endswith((".csv", ".json"))]
+    assert len({recommendation["run_id"] for recommendation in recommendations}) == len(profiles)
+    stored = advisor.run_store.load(recommendations[0]["run_id"], "recommendation")
+    assert stored["portfolio_allocations"] == recommendations[0]["portfolio_allocations"]
+
+
+def test_batch_without_persist_writes_no_runs(tmp_path, fake_chat, recording):
+    """
+    Test that batch workers respect persist=False and create no run store
+    """
+    advisor = PortfolioAdvisorSystem(data_dir=str(tmp_path), provider=ReplayProvider(recording), persist=False)
+    profiles = [{"risk_tolerance": risk, "time_horizon": 10} for risk in (3, 8)]
+    recommendations = advisor.create_batch_recommendations(profiles, max_workers=2)
+
+    assert len(recommendations) == len(profiles)
+    assert not os.path.exists(tmp_path / "runs.sqlite")
+    assert not os.path.exists(tmp_path / "runs")
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__])
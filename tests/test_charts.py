@@ -0,0 +1,73 @@
+import os
+import threading
+
+import pytest
+
+from portfolio_advisor.utils import charts
+from portfolio_advisor.utils.charts import ChartRenderer
+
+ALLOCATIONS = {"AAPL": 0.4, "JNJ": 0.25, "SPY": 0.35}
+ASSET_INFO = {"AAPL": {"type": "stock"}, "JNJ": {"type": "stock"}, "SPY": {"type": "ETF"}}
+
+
+def test_chart_renders_in_background_and_is_cached(tmp_path, monkeypatch):
+    """
+    Test that submit returns before the chart is written and identical
+    charts are rendered once
+    """
+    render = charts.render_allocation_chart
+    release = threading.Event()
+
+    def blocked_render(*args):
+        # Rendering on the caller's thread would never get past this
+        if not release.wait(timeout=5):
+            raise TimeoutError("render was not released")
+        return render(*args)
+
+    monkeypatch.setattr(charts, "render_allocation_chart", blocked_render)
+    renderer = ChartRenderer(str(tmp_path))
+
+    path, future = renderer.submit(ALLOCATIONS, ASSET_INFO, 5, 10)
+    assert not future.done()
+    assert not os.path.exists(path)
+
+    # Same portfolio while rendering and after it is on disk
+    same_path, same_future = renderer.submit(dict(reversed(list(ALLOCATIONS.items()))), ASSET_INFO, 5, 10)
+    assert same_path == path and same_future is future
+
+    release.set()
+    renderer.wait()
+    assert future.result() == path
+    with open(path, "rb") as f:
+        assert f.read(8) == b"\x89PNG\r\n\x1a\n"
+
+    cached_path, cached_future = renderer.submit(ALLOCATIONS, ASSET_INFO, 5, 10)
+    assert cached_path == path and cached_future.done()
+    assert renderer.rendered == 1
+
+    # A different profile is a different chart
+    other_path, _ = renderer.submit(ALLOCATIONS, ASSET_INFO, 7, 10)
+    assert other_path != path
+    renderer.close()
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp.png")] == []
+
+
+def test_chart_svg_format(tmp_path):
+    """
+    Test SVG output and that unknown formats are rejected
+    """
+    renderer = ChartRenderer(str(tmp_path), chart_format="svg")
+    path, future = renderer.submit(ALLOCATIONS, ASSET_INFO, 3, 5)
+    future.result()
+    renderer.close()
+
+    assert path.endswith(".svg")
+    with open(path) as f:
+        assert "<svg" in f.read()
+
+    with pytest.raises(ValueError):
+        ChartRenderer(str(tmp_path), chart_format="gif")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from portfolio_advisor.agents.risk_assesment import RiskAssessmentAgent
+from portfolio_advisor.models.base_model import FinancialAdvisorLLM
+from portfolio_advisor.utils import factor_model
+from portfolio_advisor.utils.factor_model import FactorCovariance
+from portfolio_advisor.utils.market_data import ReplayProvider, SyntheticProvider
+from portfolio_advisor.utils.run_store import RunStore
+
+
+def _synthetic_returns(n_tickers, years=2):
+    provider = SyntheticProvider(n_tickers=n_tickers, years=years, n_factors=3, seed=3)
+    close = provider.download(provider.tickers).xs("Close", axis=1, level=1)
+    return close.pct_change().iloc[1:]
+
+
+def test_factor_model_matches_dense_correlations():
+    """
+    Test that a few factors reproduce the correlations of factor-driven
+    returns and that the O(N x K) operations agree with the dense matrix
+    """
+    returns = _synthetic_returns(60)
+    model = FactorCovariance.fit(returns, n_factors=3)
+    dense = model.to_dense()
+    sample = returns.corr()
+
+    assert model.loadings.shape == (60, 3)
+    np.testing.assert_allclose(np.diag(dense), 1.0)
+    off_diagonal = ~np.eye(60, dtype=bool)
+    assert np.abs(dense.values - sample.values)[off_diagonal].mean() < 0.05
+
+    rng = np.random.default_rng(0)
+    exposures = rng.random(60) * 0.3
+    assert np.isclose(model.portfolio_variance(exposures), exposures @ dense.values @ exposures)
+
+    contributions = model.risk_contributions(exposures)
+    expected = exposures * (dense.values @ exposures)
+    np.testing.assert_allclose(contributions.values, expected / expected.sum())
+    pd.testing.assert_series_equal(model.mean(), dense.mean(), check_names=False)
+
+    # Compact storage round trip and subsets keep the structure
+    restored = FactorCovariance.from_frame(model.to_frame())
+    pd.testing.assert_frame_equal(restored.to_dense(), dense)
+    tickers = list(returns.columns[[5, 1, 40]])
+    pd.testing.assert_frame_equal(model.subset(tickers).to_dense(), dense.loc[tickers, tickers])
+
+
+def test_randomized_pca_finds_top_components():
+    """
+    Test that the randomized range finder matches an exact SVD
+    """
+    returns = _synthetic_returns(300)
+    values = returns.to_numpy()
+    standardized = (values - values.mean(axis=0)) / values.std(axis=0, ddof=1) / np.sqrt(len(values) - 1)
+
+    singular_values, components = factor_model._top_components(standardized, 5, seed=0)
+    _, exact_values, exact_vt = np.linalg.svd(standardized, full_matrices=False)
+
+    np.testing.assert_allclose(singular_values[:3], exact_values[:3], rtol=1e-3)
+    alignment = np.abs(np.sum(components[:, :3] * exact_vt[:3].T, axis=0))
+    assert (alignment > 0.99).all()
+
+
+def test_portfolio_risk_with_factor_model(tmp_path, recording):
+    """
+    Test that assess_portfolio_risk gives the dense result with a full-rank
+    factor model and stores the model compactly
+    """
+    store = RunStore(str(tmp_path))
+    agent = RiskAssessmentAgent(
+        llm=FinancialAdvisorLLM(), data_dir=str(tmp_path), provider=ReplayProvider(recording), run_store=store
+    )
+    tickers = ["AAPL", "MSFT", "JNJ", "SPY", "XOM"]
+    risk_metrics = agent.calculate_risk_metrics(tickers, period="30d")
+    dense = agent.calculate_correlation_matrix(tickers, period="30d")
+
+    run_id = store.new_run("factor_test")
+    model = agent.calculate_correlation_matrix(tickers, period="30d", factors=len(tickers), run_id=run_id)
+    assert isinstance(model, FactorCovariance)
+    assert list(store.load(run_id, "factor_model").columns[-1:]) == ["specific"]
+
+    allocations = {"AAPL": 0.3, "MSFT": 0.2, "JNJ": 0.2, "SPY": 0.3}
+    dense_metrics = agent.assess_portfolio_risk(risk_metrics, dense, allocations)
+    factor_metrics = agent.assess_portfolio_risk(risk_metrics, model, allocations)
+    assert np.isclose(factor_metrics["volatility"], dense_metrics["volatility"], rtol=1e-6)
+    assert factor_metrics["expected_return"] == dense_metrics["expected_return"]
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__])
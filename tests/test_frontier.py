@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio_advisor.agents.portofolio_constructor import PortfolioConstructorAgent
+from portfolio_advisor.agents.risk_assesment import VOLATILITY_RANGES
+from portfolio_advisor.models.base_model import FinancialAdvisorLLM
+from portfolio_advisor.utils.frontier import EfficientFrontier
+from portfolio_advisor.utils.market_data import SyntheticProvider
+from portfolio_advisor.utils.optimizer import PortfolioOptimizer
+from portfolio_advisor.utils.risk_metrics import compute_risk_metrics, price_matrix
+
+
+def _universe(n=30, seed=3):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(n, 2)) * 0.12
+    covariance = factors @ factors.T + np.diag(rng.uniform(0.002, 0.06, n))
+    expected_returns = 0.02 + 0.8 * np.sqrt(np.diag(covariance)) * rng.uniform(0.5, 1.0, n)
+    tickers = [f"T{i:02d}" for i in range(n)]
+    return tickers, covariance, expected_returns
+
+
+def test_frontier_points_are_feasible_and_ordered():
+    """
+    Test that every point is long-only and fully invested, and that the
+    minimum variance end matches the single-point optimizer
+    """
+    tickers, covariance, expected_returns = _universe()
+    frontier = EfficientFrontier().compute(tickers, covariance, expected_returns)
+
+    np.testing.assert_allclose(frontier.weights.sum(axis=0), 1.0, atol=1e-9)
+    assert frontier.weights.min() >= 0
+    assert np.all(np.diff(frontier.volatilities) > -1e-6)
+    assert np.all(np.diff(frontier.returns) > -1e-6)
+
+    min_variance = PortfolioOptimizer().solve(covariance, np.zeros(len(tickers), dtype=int), np.array([1.0]))
+    np.testing.assert_allclose(frontier.weights[:, 0], min_variance, atol=1e-5)
+
+
+def test_frontier_is_cached_per_snapshot():
+    """
+    Test that the same snapshot is solved once and a changed one again
+    """
+    tickers, covariance, expected_returns = _universe()
+    engine = EfficientFrontier()
+
+    first = engine.compute(tickers, covariance, expected_returns)
+    assert engine.compute(tickers, covariance.copy(), expected_returns.copy()) is first
+    assert engine.solves == 1
+
+    engine.compute(tickers, covariance * 1.01, expected_returns)
+    assert engine.solves == 2
+
+
+def test_select_picks_point_inside_band():
+    """
+    Test that a band the frontier passes through gets a point inside it
+    """
+    tickers, covariance, expected_returns = _universe()
+    frontier = EfficientFrontier().compute(tickers, covariance, expected_returns)
+
+    low, high = frontier.volatilities[0], frontier.volatilities[-1]
+    band = (low + 0.3 * (high - low), low + 0.5 * (high - low))
+    assert band[0] <= frontier.volatilities[frontier.select(*band)] <= band[1]
+
+    assert frontier.select(0.0, 1e-6) == 0
+    assert frontier.select(10.0, 20.0) == len(frontier) - 1
+
+
+def test_risk_level_sweep_solves_once(tmp_path):
+    """
+    Test that allocating all ten risk levels reuses one frontier
+    """
+    tickers, covariance, expected_returns = _universe()
+    volatilities = np.sqrt(np.diag(covariance))
+    risk_metrics = pd.DataFrame({"volatility": volatilities, "avg_return": expected_returns}, index=tickers)
+    correlation_matrix = pd.DataFrame(covariance / np.outer(volatilities, volatilities), index=tickers, columns=tickers)
+
+    agent = PortfolioConstructorAgent(llm=FinancialAdvisorLLM(), data_dir=str(tmp_path))
+    sweep = {
+        level: agent.generate_allocation(tickers, {}, risk_metrics, level, 10, method="frontier", correlation_matrix=correlation_matrix)
+        for level in VOLATILITY_RANGES
+    }
+
+    assert agent.frontier.solves == 1
+    for allocations in sweep.values():
+        assert abs(sum(allocations.values()) - 1) < 1e-9
+
+    def volatility(allocations):
+        w = np.array([allocations[t] for t in tickers])
+        return np.sqrt(w @ covariance @ w)
+
+    assert volatility(sweep[1]) <= volatility(sweep[5]) <= volatility(sweep[10])
+
+
+def test_frontier_spans_risk_levels_of_daily_metrics(tmp_path):
+    """
+    Test that a frontier built from daily risk metrics runs from the minimum
+    variance portfolio to the highest return asset and separates the risk levels
+    """
+    provider = SyntheticProvider(n_tickers=12, years=2, seed=5)
+    tickers = provider.tickers
+    prices = price_matrix(provider.download(tickers), tickers)
+    risk_metrics = compute_risk_metrics(prices, interval="1d")
+    correlation_matrix = prices.pct_change().corr()
+
+    agent = PortfolioConstructorAgent(llm=FinancialAdvisorLLM(), data_dir=str(tmp_path))
+    sweep = {
+        level: agent.generate_allocation(tickers, {}, risk_metrics, level, 10, method="frontier", correlation_matrix=correlation_matrix)
+        for level in VOLATILITY_RANGES
+    }
+
+    covariance = agent._covariance(tickers, risk_metrics, correlation_matrix)
+    frontier = agent.frontier.compute(tickers, covariance, agent._expected_returns(tickers, risk_metrics, "1d"))
+    assert agent.frontier.solves == 1
+    best = risk_metrics["avg_return"].idxmax()
+    assert frontier.allocation(len(frontier) - 1)[best] > 1 - 1e-6
+    assert frontier.volatilities[-1] == pytest.approx(risk_metrics.at[best, "volatility"], rel=1e-4)
+
+    def volatility(allocations):
+        w = np.array([allocations[t] for t in tickers])
+        return np.sqrt(w @ covariance @ w)
+
+    volatilities = [volatility(sweep[level]) for level in sorted(sweep)]
+    assert np.all(np.diff(volatilities) > -1e-9)
+    # The aggressive bands lie above the minimum variance point and must not share a portfolio
+    assert volatilities[7] < volatilities[8] < volatilities[9]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,92 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from portfolio_advisor.utils.fundamentals import FundamentalsFetcher, RateLimiter
+from portfolio_advisor.utils.market_data import MarketDataProvider
+
+
+class SlowInfoProvider(MarketDataProvider):
+    """Provider whose fundamentals lookups take a fixed amount of time"""
+
+    name = "slow"
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def get_info(self, ticker):
+        with self._lock:
+            self.calls.append(ticker)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if ticker == "FAIL":
+            raise ValueError("lookup failed")
+        return {"shortName": ticker, "beta": 1.0}
+
+
+def test_fundamentals_fetch_concurrently_and_cache(tmp_path):
+    """
+    Test that lookups run in parallel, are cached on disk and that failures are not cached
+    """
+    provider = SlowInfoProvider()
+    tickers = [f"T{i}" for i in range(20)] + ["FAIL"]
+    fetcher = FundamentalsFetcher(provider, data_dir=str(tmp_path), max_workers=10, requests_per_second=None)
+
+    infos = fetcher.get_info(tickers)
+
+    assert 1 < provider.max_active <= 10
+    assert infos["T3"]["shortName"] == "T3"
+    assert isinstance(infos["FAIL"], ValueError)
+
+    # A new fetcher reads the persisted cache and only retries the failure
+    provider.calls.clear()
+    fetcher = FundamentalsFetcher(provider, data_dir=str(tmp_path), requests_per_second=None)
+    fetcher.get_info(tickers)
+    assert provider.calls == ["FAIL"]
+
+    # Expired entries are fetched again
+    provider.calls.clear()
+    fetcher.ttl = timedelta(0)
+    fetcher.get_info(["T1"])
+    assert provider.calls == ["T1"]
+
+
+def test_fetchers_sharing_a_cache_save_concurrently(tmp_path):
+    """
+    Test that fetchers of concurrent runs writing the same cache never share a temp file
+    """
+    provider = SlowInfoProvider(delay=0)
+    fetchers = [FundamentalsFetcher(provider, data_dir=str(tmp_path), requests_per_second=None) for _ in range(4)]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda i: fetchers[i % 4].get_info([f"T{i}"]), range(400)))
+
+    assert os.listdir(tmp_path / "fundamentals_cache") == ["slow.json"]
+    assert len(FundamentalsFetcher(provider, data_dir=str(tmp_path))._cache) > 0
+
+
+def test_rate_limiter_spaces_calls():
+    """
+    Test that the limiter enforces the configured request rate
+    """
+    limiter = RateLimiter(requests_per_second=50)
+
+    start = time.perf_counter()
+    for _ in range(6):
+        limiter.wait()
+
+    assert time.perf_counter() - start >= 5 / 50 * 0.9
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__])
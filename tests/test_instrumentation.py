@@ -0,0 +1,118 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from portafolio_system import PortfolioAdvisorSystem
+from portfolio_advisor.utils import instrumentation, market_data
+from portfolio_advisor.utils.market_data import ReplayProvider, YahooFinanceProvider
+
+
+OLLAMA_STATS = {"eval_count": 120, "prompt_eval_count": 300, "eval_duration": 2_000_000_000}
+
+
+@pytest.fixture
+def enabled():
+    instrumentation.REGISTRY.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.REGISTRY.reset()
+
+
+def test_disabled_instrumentation_records_nothing():
+    """
+    Test that spans are a shared no-op and traced functions are plain calls
+    while instrumentation is disabled
+    """
+    instrumentation.REGISTRY.reset()
+
+    @instrumentation.traced()
+    def add(a, b):
+        return a + b
+
+    assert not instrumentation.is_enabled()
+    assert instrumentation.span("first") is instrumentation.span("second")
+    with instrumentation.start_trace("run") as trace:
+        assert add(1, 2) == 3
+        instrumentation.count("calls")
+    assert trace is None
+    assert instrumentation.REGISTRY.to_prometheus() == "\n"
+
+
+def test_recommendation_trace_and_metrics(tmp_path, fake_chat, enabled, recording):
+    """
+    Test that a run stores a trace of its stages and agent calls, including
+    Ollama token counts, and refreshes the Prometheus file
+    """
+    fake_chat.stats = OLLAMA_STATS
+
+    advisor = PortfolioAdvisorSystem(data_dir=str(tmp_path), provider=ReplayProvider(recording), chart_format=None)
+    recommendation = advisor.create_portfolio_recommendation(5, 10)
+
+    trace = advisor.run_store.load(recommendation["run_id"], "trace")
+    spans = {span["name"]: span for span in trace["spans"]}
+    root = spans["recommendation"]
+    assert trace["attributes"]["run_id"] == recommendation["run_id"]
+    assert {"stage.risk_metrics", "stage.allocations", "FinancialAdvisorLLM.ask_stream", "ollama.chat",
+            "DataCollectorAgent.get_recommended_assets", "RiskAssessmentAgent.calculate_risk_metrics"} <= set(spans)
+
+    # Agent spans in pipeline threads hang below their stage, stages below the run
+    assert spans["stage.risk_metrics"]["parent_id"] == root["span_id"]
+    assert spans["RiskAssessmentAgent.calculate_risk_metrics"]["parent_id"] == spans["stage.risk_metrics"]["span_id"]
+
+    counters = {(c["name"], tuple(sorted(c["labels"].items()))): c["value"] for c in trace["counters"]}
+    model = (("model", "llama3:latest"),)
+    assert counters[("ollama_requests", model)] == 2
+    assert counters[("ollama_eval_tokens", model)] == 240
+    assert counters[("ollama_eval_seconds", model)] == pytest.approx(4.0)
+    assert [s for s in trace["spans"] if s["name"] == "ollama.chat"][0]["attributes"]["eval_count"] == 120
+
+    with open(tmp_path / "metrics.prom") as f:
+        metrics = f.read()
+    assert 'portfolio_advisor_ollama_prompt_eval_tokens_total{model="llama3:latest"} 600' in metrics
+    assert 'portfolio_advisor_span_seconds_count{span="stage.allocations"} 1' in metrics
+
+
+def test_yahoo_provider_counts_requests_bytes_and_failures(monkeypatch, enabled):
+    """
+    Test that yfinance calls, returned bytes and failures are counted
+    """
+    bars = pd.DataFrame({"Close": [1.0, 2.0]}, index=pd.date_range("2024-01-01", periods=2))
+    monkeypatch.setattr(market_data.yf, "download", lambda *args, **kwargs: bars)
+
+    def broken(ticker):
+        raise ConnectionError("offline")
+
+    monkeypatch.setattr(market_data.yf, "Ticker", broken)
+
+    provider = YahooFinanceProvider()
+    provider.download(["AAPL"])
+    with pytest.raises(ConnectionError):
+        provider.get_info("AAPL")
+
+    metrics = instrumentation.REGISTRY.to_prometheus()
+    assert 'portfolio_advisor_yfinance_requests_total{call="download"} 1' in metrics
+    assert f'portfolio_advisor_yfinance_bytes_total{{call="download"}} {bars.memory_usage(deep=True).sum()}' in metrics
+    assert 'portfolio_advisor_yfinance_failures_total{call="info"} 1' in metrics
+    assert 'portfolio_advisor_span_errors_total{span="yfinance.info"} 1' in metrics
+
+
+def test_concurrent_prometheus_writes(tmp_path, enabled):
+    """
+    Test that threads writing the metrics file at once never share a temp file
+    """
+    instrumentation.count("calls")
+    path = str(tmp_path / "metrics.prom")
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda _: instrumentation.REGISTRY.write_prometheus(path), range(400)))
+
+    with open(path) as f:
+        assert "portfolio_advisor_calls_total 1" in f.read()
+    assert os.listdir(tmp_path) == ["metrics.prom"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,116 @@
+import json
+
+import pytest
+
+from portfolio_advisor.agents.data_collection import RECOMMENDED_ASSETS_SCHEMA, DataCollectorAgent
+from portfolio_advisor.agents.risk_assesment import RISK_ANALYSIS_SCHEMA
+from portfolio_advisor.models.base_model import FinancialAdvisorLLM
+from portfolio_advisor.models.response_cache import ResponseCache
+from portfolio_advisor.utils.market_data import ReplayProvider
+from portfolio_advisor.utils import json_schema
+from portfolio_advisor.utils.json_schema import SchemaError
+
+
+def test_validate_reports_every_problem(assets):
+    """
+    Test that the validator checks types, required keys, enums and nested items
+    """
+    assert json_schema.validate(assets, RECOMMENDED_ASSETS_SCHEMA) == []
+
+    errors = json_schema.validate(
+        [{"ticker": "", "name": 3, "type": "bond"}, "AAPL"], RECOMMENDED_ASSETS_SCHEMA
+    )
+    assert errors == [
+        "$[0]: missing required property 'justification'",
+        "$[0].ticker: shorter than 1 characters",
+        "$[0].name: expected string, got integer",
+        "$[0].type: 'bond' is not one of ['stock', 'ETF']",
+        "$[1]: expected object, got string"
+    ]
+    assert json_schema.validate([], RECOMMENDED_ASSETS_SCHEMA) == ["$: fewer than 1 items"]
+    assert json_schema.validate({"appropriate_assets": [True]}, RISK_ANALYSIS_SCHEMA)[0] == (
+        "$: missing required property 'too_risky_assets'"
+    )
+    assert json_schema.validate(1.5, {"type": "integer"}) == ["$: expected integer, got number"]
+
+
+def test_parse_accepts_bare_and_fenced_json(assets):
+    """
+    Test that bare JSON is parsed directly and fenced replies are still found
+    """
+    assert json_schema.parse(json.dumps(assets), RECOMMENDED_ASSETS_SCHEMA) == assets
+    fenced = f"Here you go:\n```json\n{json.dumps(assets)}\n```\nGood luck!"
+    assert json_schema.parse(fenced, RECOMMENDED_ASSETS_SCHEMA) == assets
+
+    with pytest.raises(SchemaError) as error:
+        json_schema.parse("I cannot help with that", RECOMMENDED_ASSETS_SCHEMA)
+    assert error.value.response == "I cannot help with that"
+
+
+def test_structured_response_is_constrained_and_repaired(tmp_path, fake_chat, assets):
+    """
+    Test that the schema is sent as Ollama's format, an invalid reply is
+    repaired within the retry budget and never cached
+    """
+    calls = fake_chat.calls
+    fake_chat.replies = ['[{"ticker": "SPY"}]', assets]
+    llm = FinancialAdvisorLLM(cache=ResponseCache(str(tmp_path / "llm_cache.json")))
+
+    assert llm.get_structured_response("Which assets?", schema=RECOMMENDED_ASSETS_SCHEMA) == assets
+    assert len(calls) == 2
+    assert all(kwargs["format"] == RECOMMENDED_ASSETS_SCHEMA for _, kwargs in calls)
+    assert "missing required property 'name'" in calls[1][0]
+
+    # Only the repaired answer was cached, the free-form answer has its own key
+    assert llm.cache.stats()["entries"] == 1
+    llm.get_structured_response("Which assets?")
+    assert len(calls) == 3 and "format" not in calls[2][1]
+
+    # An answer that stays invalid raises once the budget is used up
+    fake_chat.replies = ["not json"] * 3
+    with pytest.raises(SchemaError):
+        llm.get_structured_response("Other assets?", schema=RECOMMENDED_ASSETS_SCHEMA, max_retries=2)
+    assert len(calls) == 3 + 3
+
+
+def test_streamed_assets_are_validated(tmp_path, fake_chat, assets, recording):
+    """
+    Test that streamed assets missing required keys are dropped before the
+    callback sees them
+    """
+    fake_chat.assets = [
+        {"ticker": "AAPL", "name": "Apple Inc.", "type": "stock", "justification": "Quality"},
+        {"ticker": "MSFT", "type": "stock"},
+        {"ticker": "JNJ", "name": "Johnson & Johnson", "type": "bond", "justification": "Defensive"}
+    ] + assets[2:]
+    fake_chat.chunk_size = 25
+
+    agent = DataCollectorAgent(llm=FinancialAdvisorLLM(), data_dir=str(tmp_path), provider=ReplayProvider(recording))
+
+    prefetched = []
+    recommended = agent.get_recommended_assets(5, 10, on_asset=lambda asset: prefetched.append(asset["ticker"]))
+
+    assert prefetched == ["AAPL", "SPY"]
+    assert [asset["ticker"] for asset in recommended] == ["AAPL", "SPY"]
+    assert all({"name", "type", "justification"} <= set(asset) for asset in recommended)
+
+
+def test_unusable_stream_is_repaired_without_regenerating(tmp_path, fake_chat, assets, recording):
+    """
+    Test that a streamed reply without a usable asset goes straight to the
+    repair prompt instead of being generated a second time
+    """
+    fake_chat.replies = ['[{"ticker": "SPY"}]', assets]
+    agent = DataCollectorAgent(llm=FinancialAdvisorLLM(), data_dir=str(tmp_path), provider=ReplayProvider(recording))
+
+    prefetched = []
+    recommended = agent.get_recommended_assets(5, 10, on_asset=lambda asset: prefetched.append(asset["ticker"]))
+
+    assert prefetched == []
+    assert recommended == assets
+    assert len(fake_chat.calls) == 2 and fake_chat.streamed == 1
+    assert 'Your previous answer was invalid:\n[{"ticker": "SPY"}]' in fake_chat.calls[1][0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,33 @@
+import json
+
+from portfolio_advisor.utils.json_stream import JSONArrayStreamParser
+
+
+def test_objects_are_emitted_as_they_complete():
+    """
+    Test incremental parsing of a fenced JSON array split into small chunks
+    """
+    assets = [
+        {"ticker": "AAPL", "name": "Apple Inc.", "type": "stock", "justification": 'Brace } in [text] and "quotes" \\ too'},
+        {"ticker": "BND", "name": "Vanguard Total Bond", "type": "ETF", "justification": "Nested", "tags": [{"a": 1}]}
+    ]
+    response = "Here are my picks:\n```json\n" + json.dumps(assets, indent=2) + "\n```\nGood luck!"
+
+    parser = JSONArrayStreamParser()
+    emitted = []
+    first_complete_at = None
+    for i in range(0, len(response), 7):
+        items = parser.feed(response[i:i + 7])
+        if items and first_complete_at is None:
+            first_complete_at = i
+        emitted.extend(items)
+
+    assert emitted == assets
+    assert parser.done
+    # The first asset is available well before the response ends
+    assert first_complete_at < len(response) // 2 + 7
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__])
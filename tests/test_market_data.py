@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from portfolio_advisor.agents.data_collection import DataCollectorAgent
+from portfolio_advisor.agents.risk_assesment import RiskAssessmentAgent
+from portfolio_advisor.models.base_model import FinancialAdvisorLLM
+from portfolio_advisor.utils.market_data import ReplayProvider, SyntheticProvider
+
+
+def test_replay_provider_reads_recording(recording):
+    """
+    Test that the recorded CSV is replayed in the yf.download layout
+    """
+    provider = ReplayProvider(recording)
+    data = provider.download(["AAPL", "SPY", "NOPE"])
+
+    assert list(data.columns.names) == ["Ticker", "Price"]
+    assert list(data.columns.get_level_values(0).unique()) == ["AAPL", "SPY"]
+    assert provider.now() == data.index[-1]
+
+
+def test_risk_agent_runs_offline(tmp_path, recording):
+    """
+    Test the risk agent end to end on replayed data, without any network access
+    """
+    provider = ReplayProvider(recording)
+    agent = RiskAssessmentAgent(llm=FinancialAdvisorLLM(), data_dir=str(tmp_path), provider=provider)
+    tickers = ["AAPL", "MSFT", "SPY", "UNH", "JNJ"]
+
+    risk_metrics = agent.calculate_risk_metrics(tickers, period="1y")
+    correlation_matrix = agent.calculate_correlation_matrix(tickers, period="1y")
+
+    closes = provider.data.xs("Close", axis=1, level=1)
+    returns = (closes / closes.shift(1) - 1).dropna()
+    assert np.isclose(risk_metrics.loc["AAPL", "volatility"], returns["AAPL"].std() * np.sqrt(252))
+    pd.testing.assert_frame_equal(correlation_matrix, returns[tickers].corr(), check_names=False)
+
+
+def test_data_agent_uses_provider_info(tmp_path, recording):
+    """
+    Test that fundamentals come from the provider
+    """
+    provider = ReplayProvider(recording, info={"AAPL": {"shortName": "Apple Inc.", "sector": "Technology"}})
+    agent = DataCollectorAgent(llm=FinancialAdvisorLLM(), data_dir=str(tmp_path), provider=provider)
+
+    stock_info = agent.get_stock_info(["AAPL", "MSFT"])
+    assert stock_info["AAPL"]["sector"] == "Technology"
+    assert stock_info["MSFT"]["name"] == "N/A"
+
+
+def test_empty_download_keeps_existing_recording(tmp_path, recording):
+    """
+    Test that get_market_data does not overwrite a recording with an empty frame
+    """
+    provider = ReplayProvider(recording)
+    agent = DataCollectorAgent(llm=FinancialAdvisorLLM(), data_dir=str(tmp_path), provider=provider)
+
+    data = agent.get_market_data(["AAPL"], period="30d")
+    saved = tmp_path / "market_data_1d_30d.csv"
+    assert saved.exists()
+
+    assert agent.get_market_data(["NOPE"], period="30d").empty
+    assert not ReplayProvider(str(saved)).download(["AAPL"]).empty
+    assert len(ReplayProvider(str(saved)).data) == len(data)
+
+
+def test_synthetic_provider_is_correlated_and_deterministic():
+    """
+    Test that synthetic prices share a market factor and do not depend on
+    which subset or start date is requested
+    """
+    provider = SyntheticProvider(n_tickers=50, years=2, seed=7)
+    data = provider.download(provider.tickers)
+
+    assert list(data.columns.get_level_values(0).unique()) == provider.tickers
+    assert len(data) == 2 * 252
+    assert data.index[-1] == pd.Timestamp(provider.now())
+
+    close = data.xs("Close", axis=1, level=1)
+    correlations = np.log(close).diff().corr().to_numpy()
+    assert correlations[np.triu_indices(50, 1)].mean() > 0.2
+
+    subset = provider.download(["SYN00003"], start=data.index[100])
+    pd.testing.assert_series_equal(
+        subset["SYN00003"]["Close"], data["SYN00003"]["Close"].iloc[100:], check_freq=False
+    )
+    assert provider.get_info("SYN00003")["sector"] in SyntheticProvider.SECTORS
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,100 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from portfolio_advisor.agents.risk_assesment import RiskAssessmentAgent
+from portfolio_advisor.models.base_model import FinancialAdvisorLLM
+from portfolio_advisor.utils.market_data import ReplayProvider
+from portfolio_advisor.utils.online_covariance import OnlineCovariance
+
+
+def _returns(n_rows=300, n_assets=6, seed=3):
+    rng = np.random.default_rng(seed)
+    mixing = rng.normal(size=(n_assets, n_assets))
+    return rng.normal(size=(n_rows, n_assets)) @ mixing * 0.01
+
+
+def test_online_estimate_matches_batch(tmp_path):
+    """
+    Test that row-by-row and batched updates match the full recomputation
+    and survive a save/load round trip
+    """
+    returns = _returns()
+    tickers = [f"T{i}" for i in range(returns.shape[1])]
+    expected = pd.DataFrame(returns, columns=tickers)
+
+    estimator = OnlineCovariance(tickers)
+    estimator.update(returns[:200])
+    path = str(tmp_path / "state.npz")
+    estimator.save(path)
+
+    estimator = OnlineCovariance.load(path)
+    for row in returns[200:]:
+        estimator.update(row)
+
+    np.testing.assert_allclose(estimator.covariance().values, expected.cov().values, rtol=1e-9)
+    np.testing.assert_allclose(estimator.correlation().values, expected.corr().values, rtol=1e-9)
+
+
+def test_concurrent_saves_and_loads(tmp_path):
+    """
+    Test that loads running alongside saves of the same file always see a complete state
+    """
+    returns = _returns()
+    tickers = [f"T{i}" for i in range(returns.shape[1])]
+    estimator = OnlineCovariance(tickers)
+    estimator.update(returns)
+    path = str(tmp_path / "state.npz")
+    estimator.save(path)
+
+    def save_or_load(i):
+        if i % 2:
+            estimator.save(path)
+        else:
+            return OnlineCovariance.load(path).count
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        counts = [count for count in executor.map(save_or_load, range(200)) if count is not None]
+
+    assert counts == [len(returns)] * 100
+    assert os.listdir(tmp_path) == ["state.npz"]
+
+
+def test_ewma_estimate_matches_weighted_formula():
+    """
+    Test the exponentially weighted estimate against the direct weighted formula
+    """
+    returns = _returns(n_rows=120)
+    decay = 0.94
+    weights = decay ** np.arange(len(returns) - 1, -1, -1)
+    mean = weights @ returns / weights.sum()
+    comoment = ((returns - mean) * weights[:, None]).T @ (returns - mean)
+    std = np.sqrt(np.diag(comoment))
+
+    estimator = OnlineCovariance(list("ABCDEF"), decay=decay)
+    estimator.update(returns[:50])
+    estimator.update(returns[50:])
+
+    np.testing.assert_allclose(estimator.correlation().values, comoment / np.outer(std, std), rtol=1e-9)
+
+
+def test_agent_incremental_correlation(tmp_path, recording):
+    """
+    Test that the agent's incremental mode persists state and matches the full recomputation
+    """
+    agent = RiskAssessmentAgent(llm=FinancialAdvisorLLM(), data_dir=str(tmp_path), provider=ReplayProvider(recording))
+    tickers = ["AAPL", "MSFT", "SPY"]
+
+    full = agent.calculate_correlation_matrix(tickers)
+    first = agent.calculate_correlation_matrix(tickers, incremental=True)
+    second = agent.calculate_correlation_matrix(tickers, incremental=True)
+
+    pd.testing.assert_frame_equal(first, full, check_names=False)
+    pd.testing.assert_frame_equal(second, full, check_names=False)
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+from portfolio_advisor.agents.portofolio_constructor import PortfolioConstructorAgent
+from portfolio_advisor.models.base_model import FinancialAdvisorLLM
+from portfolio_advisor.utils.optimizer import PortfolioOptimizer
+
+
+def _random_covariance(n, seed=11):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(n, 3)) * 0.1
+    return factors @ factors.T + np.diag(rng.uniform(0.01, 0.05, n))
+
+
+def test_two_asset_minimum_variance_closed_form():
+    """
+    Test the minimum variance solution against the two-asset closed form
+    """
+    covariance = np.array([[0.04, 0.006], [0.006, 0.01]])
+    expected = (covariance[1, 1] - covariance[0, 1]) / (covariance[0, 0] + covariance[1, 1] - 2 * covariance[0, 1])
+
+    weights = PortfolioOptimizer().solve(covariance, np.array([0, 0]), np.array([1.0]))
+
+    np.testing.assert_allclose(weights, [expected, 1 - expected], atol=1e-7)
+
+
+def test_bucket_constraints_and_warm_start():
+    """
+    Test that budgets and bounds hold, the optimum beats equal weights and
+    a warm start needs fewer iterations
+    """
+    n = 200
+    covariance = _random_covariance(n)
+    mu = np.random.default_rng(5).normal(0.08, 0.04, n)
+    buckets = np.repeat([0, 1, 2], [120, 60, 20])
+    budgets = np.array([0.6, 0.35, 0.05])
+
+    optimizer = PortfolioOptimizer()
+    weights = optimizer.solve(covariance, buckets, budgets, expected_returns=mu, risk_aversion=8, max_weight=0.02, key="universe")
+    cold_iterations = optimizer.last_iterations
+
+    np.testing.assert_allclose(np.bincount(buckets, weights), budgets, atol=1e-9)
+    assert weights.min() >= 0 and weights.max() <= 0.02 + 1e-9
+
+    equal = budgets[buckets] / np.bincount(buckets)[buckets]
+    objective = lambda w: 4 * w @ covariance @ w - mu @ w
+    assert objective(weights) < objective(equal)
+
+    optimizer.solve(covariance * 1.01, buckets, budgets, expected_returns=mu, risk_aversion=8, max_weight=0.02, key="universe")
+    assert optimizer.last_iterations < cold_iterations
+
+
+def test_generate_allocation_optimizes_within_buckets(tmp_path):
+    """
+    Test that the optimizer keeps the template bucket totals of the equal split
+    """
+    assets = ["AAPL", "MSFT", "JNJ", "BND", "AGG", "GLD"]
+    asset_info = {
+        "AAPL": {"type": "stock"}, "MSFT": {"type": "stock"}, "JNJ": {"type": "stock"},
+        "BND": {"type": "etf", "category": "Bond"}, "AGG": {"type": "etf", "category": "Bond"},
+        "GLD": {"type": "etf", "category": "Commodity"}
+    }
+    risk_metrics = pd.DataFrame({
+        "volatility": [0.25, 0.28, 0.15, 0.05, 0.06, 0.20],
+        "avg_return": [0.15, 0.18, 0.10, 0.03, 0.03, 0.08]
+    }, index=assets)
+    correlation_matrix = pd.DataFrame(np.eye(6) * 0.6 + 0.4, index=assets, columns=assets)
+
+    agent = PortfolioConstructorAgent(llm=FinancialAdvisorLLM(), data_dir=str(tmp_path))
+    equal = agent.generate_allocation(assets, asset_info, risk_metrics, 5, 10)
+    optimized = agent.generate_allocation(
+        assets, asset_info, risk_metrics, 5, 10, method="min_variance", correlation_matrix=correlation_matrix
+    )
+
+    for bucket in (["AAPL", "MSFT", "JNJ"], ["BND", "AGG"], ["GLD"]):
+        assert abs(sum(equal[t] for t in bucket) - sum(optimized[t] for t in bucket)) < 1e-9
+    assert optimized["JNJ"] > optimized["MSFT"]
+
+
+def test_mean_variance_uses_annual_returns(tmp_path):
+    """
+    Test that daily avg_return is annualized before it meets the annualized
+    covariance, so an aggressive profile tilts towards the higher return stock
+    """
+    assets = ["AAPL", "JNJ"]
+    asset_info = {"AAPL": {"type": "stock"}, "JNJ": {"type": "stock"}}
+    # avg_return as compute_risk_metrics reports it: daily mean times sqrt(252)
+    annual_returns = np.array([0.20, 0.05])
+    risk_metrics = pd.DataFrame({
+        "volatility": [0.30, 0.15],
+        "avg_return": annual_returns / np.sqrt(252)
+    }, index=assets)
+    correlation_matrix = pd.DataFrame(np.eye(2) * 0.7 + 0.3, index=assets, columns=assets)
+
+    agent = PortfolioConstructorAgent(llm=FinancialAdvisorLLM(), data_dir=str(tmp_path))
+    allocations = agent.generate_allocation(
+        assets, asset_info, risk_metrics, 10, 10, method="mean_variance", correlation_matrix=correlation_matrix
+    )
+    total = sum(allocations.values())
+
+    covariance = agent._covariance(assets, risk_metrics, correlation_matrix)
+    expected = PortfolioOptimizer().solve(covariance, np.zeros(2, dtype=int), np.array([total]),
+                                          expected_returns=annual_returns, risk_aversion=2.0)
+    np.testing.assert_allclose([allocations[t] for t in assets], expected, atol=1e-6)
+    assert allocations["AAPL"] > allocations["JNJ"]
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__])
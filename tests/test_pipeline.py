@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from portfolio_advisor.utils.pipeline import Pipeline
+
+
+def test_independent_stages_overlap():
+    """
+    Test that independent stages run concurrently and results flow to dependents
+    """
+    # Each stage only returns once the other one has started, run one after the other they fail
+    both_running = threading.Barrier(2, timeout=5)
+
+    def concurrent(value):
+        both_running.wait()
+        return value
+
+    pipeline = Pipeline(max_workers=4)
+    pipeline.add_stage("a", lambda: concurrent(1))
+    pipeline.add_stage("b", lambda: concurrent(2))
+    pipeline.add_stage("c", lambda a, b: a + b, depends_on=("a", "b"))
+
+    results = pipeline.run()
+
+    assert results == {"a": 1, "b": 2, "c": 3}
+    assert set(pipeline.timings) == {"a", "b", "c", "total"}
+
+
+def test_stage_errors_propagate():
+    """
+    Test that a failing stage aborts the run and unknown dependencies are rejected
+    """
+    def fail():
+        raise RuntimeError("stage failed")
+
+    pipeline = Pipeline()
+    pipeline.add_stage("a", fail)
+    pipeline.add_stage("b", lambda a: a, depends_on=("a",))
+    with pytest.raises(RuntimeError):
+        pipeline.run()
+
+    pipeline = Pipeline()
+    pipeline.add_stage("a", lambda missing: missing, depends_on=("missing",))
+    with pytest.raises(ValueError):
+        pipeline.run()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from portfolio_advisor.utils.market_data import MarketDataProvider
+from portfolio_advisor.utils.price_cache import PriceCache
+
+
+def _fake_bars(tickers, start, end):
+    """Build a yf.download(group_by="ticker") style frame of business-day bars"""
+    dates = pd.bdate_range(start, end, name="Date")
+    frames = {}
+    for i, ticker in enumerate(tickers):
+        close = 100.0 + i + (dates - pd.Timestamp("2020-01-01")).days.values.astype(float)
+        frames[ticker] = pd.DataFrame({
+            "Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1000.0
+        }, index=dates)
+    return pd.concat(frames, axis=1)
+
+
+class FakeProvider(MarketDataProvider):
+    """Provider that records download calls and serves synthetic bars"""
+
+    name = "fake"
+
+    def __init__(self):
+        self.calls = []
+
+    def download(self, tickers, start=None, interval="1d"):
+        self.calls.append((tuple(tickers), start))
+        return _fake_bars(tickers, start or "2020-01-01", datetime.now())
+
+
+def test_price_cache_incremental(tmp_path):
+    """
+    Test that the cache downloads once, serves warm reads from disk and
+    only asks for the missing date range on refresh
+    """
+    provider = FakeProvider()
+    calls = provider.calls
+    cache = PriceCache(data_dir=str(tmp_path), provider=provider)
+
+    # Cold read downloads all tickers with a single call
+    data = cache.get_history(["AAPL", "MSFT"], period="30d")
+    assert len(calls) == 1
+    assert list(data.columns.get_level_values(0).unique()) == ["AAPL", "MSFT"]
+    assert data.index.min() >= pd.Timestamp(datetime.now() - timedelta(days=30)).normalize()
+
+    # Warm read is served from disk
+    warm = cache.get_history(["AAPL", "MSFT"], period="30d")
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(data, warm, check_freq=False)
+
+    # A stale cache only fetches from the last stored bars onwards
+    cache.max_age = timedelta(0)
+    cache.get_history(["AAPL"], period="30d")
+    assert len(calls) == 2
+    assert calls[-1][1] >= data.index[-2]
+
+    # A longer window back-fills the history
+    cache.max_age = timedelta(hours=1)
+    longer = cache.get_history(["AAPL"], period="90d")
+    assert len(calls) == 3
+    assert longer.index.min() < data.index.min()
+
+
+def test_price_cache_single_ticker_layout(tmp_path):
+    """
+    Test that a flat single ticker download still comes back with ticker-level columns
+    """
+    class FlatProvider(FakeProvider):
+        def download(self, tickers, start=None, interval="1d"):
+            return super().download(tickers, start, interval)[tickers[0]]
+
+    data = PriceCache(data_dir=str(tmp_path), provider=FlatProvider()).get_history("SPY", period="10d")
+    assert data["SPY"]["Close"].notna().all()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,67 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from portfolio_advisor.models.base_model import FinancialAdvisorLLM
+from portfolio_advisor.models.response_cache import ResponseCache
+
+
+def test_llm_responses_are_cached(tmp_path, fake_chat):
+    """
+    Test that deterministic calls are served from the cache and persisted
+    """
+    calls = fake_chat.calls
+    fake_chat.reply = lambda question: f"answer {len(calls)}"
+
+    path = str(tmp_path / "llm_cache.json")
+    llm = FinancialAdvisorLLM(cache=ResponseCache(path))
+
+    first = llm.get_structured_response("Which assets?", system_prompt="advisor")
+    second = llm.get_structured_response("Which assets?", system_prompt="advisor")
+    assert first == second == "answer 1"
+    assert llm.cache.stats()["hits"] == 1
+
+    # A different system prompt or a non-zero temperature is not a hit
+    llm.get_structured_response("Which assets?", system_prompt="analyst")
+    llm.ask("Which assets?", system_prompt="advisor", temperature=0.7)
+    assert len(calls) == 3
+
+    # The cache survives a restart
+    restarted = FinancialAdvisorLLM(cache=ResponseCache(path))
+    assert restarted.get_structured_response("Which assets?", system_prompt="advisor") == "answer 1"
+    assert len(calls) == 3
+
+
+def test_response_cache_lru_eviction():
+    """
+    Test that the least recently used response is evicted first
+    """
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.stats() == {"hits": 2, "misses": 1, "entries": 2, "max_entries": 2}
+
+
+def test_caches_sharing_a_file_save_concurrently(tmp_path):
+    """
+    Test that caches of concurrent agents writing the same file never share a temp file
+    """
+    path = str(tmp_path / "llm_cache.json")
+    caches = [ResponseCache(path) for _ in range(4)]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda i: caches[i % 4].put(f"key {i}", f"answer {i}"), range(400)))
+
+    with open(path) as f:
+        assert len(json.load(f)) == 100
+    assert os.listdir(tmp_path) == ["llm_cache.json"]
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,140 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio_advisor.utils.risk_metrics import ALL_RISK_METRICS, compute_risk_metrics, price_matrix
+
+
+def _reference_metrics(prices, annualize_factor):
+    """Per-ticker pandas calculation the vectorized engine has to reproduce"""
+    risk_metrics = pd.DataFrame(index=prices.columns)
+    for ticker in prices.columns:
+        series = prices[ticker]
+        returns = (series / series.shift(1) - 1).dropna()
+        risk_metrics.at[ticker, "volatility"] = returns.std() * annualize_factor
+        risk_metrics.at[ticker, "max_drawdown"] = (series / series.cummax() - 1).min()
+        risk_metrics.at[ticker, "avg_return"] = returns.mean() * annualize_factor
+        risk_metrics.at[ticker, "sharpe_ratio"] = (returns.mean() / returns.std()) * annualize_factor if returns.std() > 0 else 0
+        negative_returns = returns[returns < 0]
+        if len(negative_returns) > 0:
+            risk_metrics.at[ticker, "downside_deviation"] = negative_returns.std() * annualize_factor
+        else:
+            risk_metrics.at[ticker, "downside_deviation"] = 0
+    return risk_metrics
+
+
+def test_vectorized_metrics_match_reference():
+    """
+    Test the vectorized engine against the per-ticker loop, including
+    missing bars and a late listing
+    """
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range("2024-01-01", periods=260, name="Date")
+    tickers = [f"T{i}" for i in range(25)]
+    prices = pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0.0004, 0.015, (len(dates), len(tickers))), axis=0)),
+        index=dates, columns=tickers
+    )
+    prices.iloc[10:15, 3] = np.nan
+    prices.iloc[:100, 5] = np.nan
+
+    expected = _reference_metrics(prices, np.sqrt(252))
+    result = compute_risk_metrics(prices, interval="1d")
+
+    pd.testing.assert_frame_equal(result, expected, check_names=False, rtol=1e-10)
+
+
+def test_price_matrix_from_multiindex_bars():
+    """
+    Test extraction of the aligned price matrix, missing tickers become NaN
+    """
+    dates = pd.bdate_range("2024-01-01", periods=5, name="Date")
+    bars = pd.concat({
+        "AAA": pd.DataFrame({"Close": np.arange(5.0) + 1, "Volume": 1.0}, index=dates),
+        "BBB": pd.DataFrame({"Close": np.arange(5.0) + 10, "Volume": 1.0}, index=dates)
+    }, axis=1)
+
+    prices = price_matrix(bars, ["BBB", "AAA", "ZZZ"])
+    assert list(prices.columns) == ["BBB", "AAA", "ZZZ"]
+    assert prices["ZZZ"].isna().all()
+
+    metrics = compute_risk_metrics(prices)
+    assert metrics.loc["ZZZ"].isna().all()
+    assert metrics.loc["AAA", "max_drawdown"] == 0
+
+
+def test_extended_metrics_match_reference():
+    """
+    Test VaR, CVaR, Sortino and beta against per-ticker pandas calculations
+    """
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range("2024-01-01", periods=300)
+    prices = pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, (len(dates), 6)), axis=0)),
+        index=dates, columns=[f"T{i}" for i in range(6)]
+    )
+    prices.iloc[:40, 2] = np.nan
+    benchmark = prices.mean(axis=1)
+
+    result = compute_risk_metrics(prices, metrics=ALL_RISK_METRICS, benchmark=benchmark, confidence=0.95)
+    assert list(result.columns) == ALL_RISK_METRICS
+
+    z = NormalDist().inv_cdf(0.05)
+    benchmark_returns = benchmark.pct_change()
+    for ticker in prices.columns:
+        returns = (prices[ticker] / prices[ticker].shift(1) - 1).dropna()
+        worst = np.sort(returns.values)[:int(len(returns) * 0.05)]
+        semi_deviation = np.sqrt((np.minimum(returns, 0) ** 2).mean())
+
+        assert result.at[ticker, "var_historical"] == pytest.approx(-np.quantile(returns, 0.05))
+        assert result.at[ticker, "cvar_historical"] == pytest.approx(-worst.mean())
+        assert result.at[ticker, "var_parametric"] == pytest.approx(-(returns.mean() + z * returns.std()))
+        assert result.at[ticker, "cvar_parametric"] == pytest.approx(
+            -(returns.mean() - returns.std() * NormalDist().pdf(z) / 0.05)
+        )
+        assert result.at[ticker, "sortino_ratio"] == pytest.approx(returns.mean() / semi_deviation * np.sqrt(252))
+        assert result.at[ticker, "beta"] == pytest.approx(
+            returns.cov(benchmark_returns.loc[returns.index]) / benchmark_returns.loc[returns.index].var()
+        )
+        assert result.at[ticker, "cvar_historical"] >= result.at[ticker, "var_historical"]
+
+
+def test_drawdown_duration_and_recovery():
+    """
+    Test drawdown duration and time to recovery on hand-checked series
+    """
+    prices = pd.DataFrame({
+        "OPEN": [100, 110, 99, 105, 111, 90, 95],
+        "RECOVERED": [100, 80, 90, 101, 102, 103, 104],
+        "GAP": [100, 90, np.nan, np.nan, 95, 101, 102],
+        "RISING": [1, 2, 3, 4, 5, 6, 7]
+    }, dtype=float)
+
+    result = compute_risk_metrics(prices, metrics=["max_drawdown_duration", "time_to_recovery"])
+
+    assert result["max_drawdown_duration"].tolist() == [2, 2, 4, 0]
+    assert np.isnan(result.at["OPEN", "time_to_recovery"])
+    assert result.at["RECOVERED", "time_to_recovery"] == 2
+    assert result.at["GAP", "time_to_recovery"] == 4
+    assert result.at["RISING", "time_to_recovery"] == 0
+
+
+def test_metric_selection():
+    """
+    Test that only requested metrics are returned and bad requests fail
+    """
+    prices = pd.DataFrame({"AAA": [1.0, 1.1, 1.05, 1.2]})
+
+    result = compute_risk_metrics(prices, metrics=["sortino_ratio", "volatility"])
+    assert list(result.columns) == ["sortino_ratio", "volatility"]
+
+    with pytest.raises(ValueError):
+        compute_risk_metrics(prices, metrics=["volatility", "omega"])
+    with pytest.raises(ValueError):
+        compute_risk_metrics(prices, metrics=["beta"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from portfolio_advisor.utils.rolling import (
+    rolling_correlation, rolling_drawdown, rolling_max, rolling_returns, rolling_volatility
+)
+
+
+def _prices(rows=400, n=5, seed=9):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2023-01-02", periods=rows)
+    prices = pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, (rows, n)), axis=0)),
+        index=dates, columns=[f"T{i}" for i in range(n)]
+    )
+    prices.iloc[50:53, 1] = np.nan
+    prices.iloc[:120, 3] = np.nan
+    return prices
+
+
+def test_rolling_volatility_matches_pandas():
+    """
+    Test the prefix-sum volatility against pandas rolling std, including gaps
+    """
+    prices = _prices()
+    returns = rolling_returns(prices)
+
+    for window in (30, 90, 252):
+        expected = returns.rolling(window).std() * np.sqrt(252)
+        pd.testing.assert_frame_equal(rolling_volatility(returns, window), expected, rtol=1e-8)
+
+
+def test_rolling_correlation_matches_pandas():
+    """
+    Test the chunked prefix cross-products against pandas rolling correlation
+    """
+    prices = _prices()
+    returns = rolling_returns(prices)
+
+    result = rolling_correlation(returns, 60, chunk_rows=37)
+
+    assert result.values.shape == (len(returns), 5, 5)
+    for first, second in (("T0", "T2"), ("T1", "T4"), ("T3", "T0")):
+        expected = returns[first].rolling(60).corr(returns[second])
+        expected[returns[[first, second]].isna().any(axis=1).rolling(60).max() > 0] = np.nan
+        np.testing.assert_allclose(result.pair(first, second), expected, atol=1e-5)
+
+    date = returns.index[-1]
+    np.testing.assert_allclose(result.at(date), returns.iloc[-60:].corr(), atol=1e-5)
+
+
+def test_rolling_max_and_drawdown():
+    """
+    Test the van Herk / Gil-Werman maximum against pandas for several windows
+    """
+    values = np.random.default_rng(1).normal(size=(101, 3))
+    values[10:14, 0] = np.nan
+
+    for window in (1, 2, 7, 30, 101, 150):
+        expected = pd.DataFrame(values).rolling(window, min_periods=1).max().to_numpy()
+        np.testing.assert_allclose(rolling_max(values, window), expected)
+
+    prices = _prices()
+    drawdown = rolling_drawdown(prices, 90)
+    filled = prices.ffill()
+    expected = filled / filled.rolling(90, min_periods=1).max() - 1
+    pd.testing.assert_frame_equal(drawdown, expected)
+    assert (drawdown.fillna(0) <= 0).all().all()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__])
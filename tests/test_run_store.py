@@ -0,0 +1,85 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from portfolio_advisor.utils.run_store import RunStore
+
+
+def test_save_and_load_results(tmp_path):
+    """
+    Test that matrices and JSON results round-trip through a run
+    """
+    store = RunStore(str(tmp_path))
+    run_id = store.new_run("recommendation", {"risk_tolerance": 5, "time_horizon": 10})
+
+    correlation = pd.DataFrame(np.eye(3), index=["A", "B", "C"], columns=["A", "B", "C"])
+    store.save(run_id, "correlation_matrix", correlation)
+    store.save(run_id, "risk_analysis", {"portfolio_strategy": "first"})
+    store.save(run_id, "risk_analysis", {"portfolio_strategy": "second"})
+
+    pd.testing.assert_frame_equal(store.load(run_id, "correlation_matrix"), correlation)
+    assert store.load(run_id, "risk_analysis") == {"portfolio_strategy": "second"}
+    assert store.load(run_id, "recommendation") is None
+
+
+def test_find_runs_by_profile(tmp_path):
+    """
+    Test lookups by kind and profile, newest first
+    """
+    store = RunStore(str(tmp_path))
+    first = store.new_run("recommendation", {"risk_tolerance": 5, "time_horizon": 10})
+    store.new_run("recommendation", {"risk_tolerance": 8, "time_horizon": 10})
+    store.new_run("risk_metrics")
+    last = store.new_run("recommendation", {"risk_tolerance": 5, "time_horizon": 3})
+    store.save(first, "recommendation", {"ok": True})
+
+    runs = store.find_runs(kind="recommendation", risk_tolerance=5)
+    assert [run["run_id"] for run in runs] == [last, first]
+    assert runs[1]["results"] == ["recommendation"]
+    assert runs[1]["profile"]["time_horizon"] == 10
+
+    assert len(store.find_runs(time_horizon=10)) == 2
+    assert len(store.find_runs(limit=1)) == 1
+
+
+def test_concurrent_runs_do_not_collide(tmp_path):
+    """
+    Test that runs started in the same second get distinct ids and results
+    """
+    store = RunStore(str(tmp_path))
+    run_ids = []
+
+    def work(i):
+        run_id = store.new_run("recommendation", {"risk_tolerance": i})
+        store.save(run_id, "risk_metrics", pd.DataFrame({"volatility": [float(i)]}, index=["A"]))
+        run_ids.append((run_id, i))
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({run_id for run_id, _ in run_ids}) == 8
+    for run_id, i in run_ids:
+        assert store.load(run_id, "risk_metrics").at["A", "volatility"] == i
+
+
+def test_no_persistence_writes_nothing(tmp_path):
+    """
+    Test that persist=False leaves the data directory untouched
+    """
+    store = RunStore(str(tmp_path), persist=False)
+    run_id = store.new_run("recommendation", {"risk_tolerance": 5})
+    store.save(run_id, "correlation_matrix", pd.DataFrame(np.eye(2)))
+
+    assert store.path_for(run_id, "chart.png") is None
+    assert store.find_runs() == []
+    assert os.listdir(tmp_path) == []
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__])
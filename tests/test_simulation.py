@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio_advisor.utils.simulation import simulate_wealth
+
+
+def _returns(rows=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.normal(0.0004, 0.01, (rows, 3)), columns=["AAA", "BBB", "CCC"])
+
+
+def test_parametric_median_matches_gbm():
+    """
+    Test the simulated median against the closed-form GBM median
+    """
+    returns = _returns()
+    weights = {"AAA": 0.5, "BBB": 0.3, "CCC": 0.2}
+
+    result = simulate_wealth(returns, weights, 10000, 10, n_paths=40000, seed=7, max_workers=1)
+
+    portfolio = returns.values @ np.array([0.5, 0.3, 0.2])
+    simple = np.expm1(np.log1p(portfolio))
+    drift, volatility = simple.mean() * 252, simple.std(ddof=1) * np.sqrt(252)
+    expected_median = 10000 * np.exp((drift - volatility ** 2 / 2) * 10)
+
+    assert abs(result["percentiles"]["p50"] / expected_median - 1) < 0.01
+    assert len(result["yearly_percentiles"]["p50"]) == 10
+    assert result["percentiles"]["p5"] < result["percentiles"]["p50"] < result["percentiles"]["p95"]
+
+
+def test_bootstrap_of_constant_returns_is_exact():
+    """
+    Test that resampling a constant return history gives deterministic wealth
+    """
+    returns = pd.DataFrame({"AAA": np.full(300, 0.001), "BBB": np.full(300, 0.001)})
+
+    result = simulate_wealth(returns, {"AAA": 0.6, "BBB": 0.4}, 1000, 2, mode="bootstrap", n_paths=500, seed=1)
+
+    expected = 1000 * 1.001 ** (2 * 12 * 21)
+    assert result["percentiles"]["p5"] == pytest.approx(expected)
+    assert result["percentiles"]["p95"] == pytest.approx(expected)
+    assert result["probability_of_loss"] == 0.0
+
+
+def test_results_do_not_depend_on_workers():
+    """
+    Test that chunked in-process and process pool runs agree for one seed
+    """
+    returns = _returns()
+    weights = {"AAA": 1.0}
+
+    serial = simulate_wealth(returns, weights, 1000, 30, mode="bootstrap", n_paths=12000, seed=3, max_workers=1)
+    parallel = simulate_wealth(
+        returns, weights, 1000, 30, mode="bootstrap", n_paths=12000, seed=3, max_workers=2, parallel_threshold=0
+    )
+
+    assert serial == parallel
+
+
+def test_shortfall_probabilities():
+    """
+    Test terminal and path shortfall probabilities for extreme thresholds
+    """
+    result = simulate_wealth(_returns(), {"AAA": 1.0}, 1000, 5, n_paths=2000, seed=2, thresholds=[1e9, 0.0, 1000])
+
+    unreachable, impossible, loss = result["shortfall"]
+    assert unreachable["probability"] == 1.0
+    assert impossible["probability"] == 0.0 and impossible["probability_ever"] == 0.0
+    assert loss["probability"] == result["probability_of_loss"]
+    assert loss["probability_ever"] >= loss["probability"]
+
+
+def test_bootstrap_needs_enough_history():
+    """
+    Test that a history shorter than one block is rejected
+    """
+    with pytest.raises(ValueError):
+        simulate_wealth(_returns(rows=30), {"AAA": 1.0}, 1000, 5, mode="bootstrap")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+
+import portafolio_system
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def test_import_and_construction_stay_light():
+    """
+    Test that starting the system does not import the heavy dependencies
+    """
+    code = (
+        "import sys, tempfile, portafolio_system\n"
+        "portafolio_system.PortfolioAdvisorSystem(data_dir=tempfile.mkdtemp(), persist=False)\n"
+        "print(sorted(m for m in ('pandas', 'numpy', 'matplotlib', 'ollama', 'yfinance') if m in sys.modules))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+
+    assert output.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_cli_profile_writes_json(tmp_path, fake_chat, capsys, recording):
+    """
+    Test a non-interactive run from command line arguments
+    """
+    output = tmp_path / "recommendation.json"
+
+    code = portafolio_system.main([
+        "--risk-tolerance", "6", "--time-horizon", "10", "--amount", "5000",
+        "--data-dir", str(tmp_path), "--replay", recording, "--no-persist", "--output", str(output)
+    ])
+
+    assert code == 0
+    recommendation = json.loads(output.read_text())
+    assert recommendation["user_profile"]["risk_tolerance"] == 6
+    assert set(recommendation["portfolio_allocations"]) == {asset["ticker"] for asset in fake_chat.assets}
+    assert recommendation["wealth_projection"]["investment_amount"] == 5000
+    # The risk analysis matched its schema, no error fallback
+    assert recommendation["strategy"] == fake_chat.risk_analysis["portfolio_strategy"]
+
+    # Progress goes to stdout when the JSON goes to a file
+    assert "Portfolio recommendation completed" in capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__])
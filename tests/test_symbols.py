@@ -0,0 +1,128 @@
+import os
+
+from portfolio_advisor.agents.data_collection import DataCollectorAgent
+from portfolio_advisor.models.base_model import FinancialAdvisorLLM
+from portfolio_advisor.utils.fundamentals import FundamentalsFetcher
+from portfolio_advisor.utils.market_data import ReplayProvider, SyntheticProvider
+from portfolio_advisor.utils.run_store import RunStore
+from portfolio_advisor.utils.symbols import SymbolTable, SymbolVerifier
+
+
+# Tickers as an LLM might propose them: lower case, a typo, a share class and an invented one
+PROPOSED_ASSETS = [
+    {"ticker": "aapl", "name": "Apple Inc.", "type": "stock", "justification": "Quality"},
+    {"ticker": "MSFTT", "name": "Microsoft", "type": "stock", "justification": "Typo"},
+    {"ticker": "BRK.B", "name": "Berkshire Hathaway", "type": "stock", "justification": "Value"},
+    {"ticker": "ZZZQ", "name": "Invented Corp", "type": "stock", "justification": "Made up"},
+    {"ticker": "SPY", "name": "SPDR S&P 500 ETF", "type": "ETF", "justification": "Broad market"}
+]
+
+
+def test_symbol_table_lookups(tmp_path):
+    """
+    Test exact, prefix and fuzzy lookups and reading a symbol file
+    """
+    path = tmp_path / "symbols.txt"
+    path.write_text("# comment\nAAPL Apple Inc.\nAMD\nAMZN\n\nBRK-B\nMSFT\n")
+    table = SymbolTable.load(str(path))
+
+    assert len(table) == 5 and "AAPL" in table and "#" not in table
+    assert table.with_prefix("am") == ["AMD", "AMZN"]
+    assert table.with_prefix("AM", limit=1) == ["AMD"]
+    assert table.with_prefix("X") == []
+
+    assert table.resolve(" $aapl ") == "AAPL"
+    assert table.resolve("BRK.B") == "BRK-B"
+    assert table.resolve("MSFTT") is None
+    assert table.suggest("MSFTT") == ["MSFT"]
+
+    valid, invalid = table.validate(["amzn", "APPL", "QQQQQQ"])
+    assert valid == {"amzn": "AMZN"}
+    assert invalid == {"APPL": ["AAPL"], "QQQQQQ": []}
+
+
+def test_unknown_tickers_never_reach_market_data(tmp_path, fake_chat, recording):
+    """
+    Test that recommended assets are corrected or dropped before the
+    streaming callback sees them, and that rejections are stored with the run
+    """
+    fake_chat.assets = PROPOSED_ASSETS
+    store = RunStore(str(tmp_path))
+    agent = DataCollectorAgent(
+        llm=FinancialAdvisorLLM(), data_dir=str(tmp_path), provider=ReplayProvider(recording), run_store=store
+    )
+
+    prefetched = []
+    run_id = store.new_run("symbols_test")
+    assets = agent.get_recommended_assets(5, 10, on_asset=lambda asset: prefetched.append(asset["ticker"]), run_id=run_id)
+
+    assert [asset["ticker"] for asset in assets] == ["AAPL", "BRK-B", "SPY"]
+    assert prefetched == ["AAPL", "BRK-B", "SPY"]
+    assert store.load(run_id, "rejected_tickers") == {"MSFTT": ["MSFT"], "ZZZQ": []}
+
+    # The non-streaming path applies the same check
+    assert [asset["ticker"] for asset in agent.get_recommended_assets(5, 10)] == ["AAPL", "BRK-B", "SPY"]
+
+
+def test_unknown_tickers_are_checked_once_with_the_provider(tmp_path, fake_chat, recording):
+    """
+    Test that a real ticker outside the symbol list is accepted after one
+    provider lookup, and that verdicts are cached across agents
+    """
+    fake_chat.assets = [
+        {"ticker": "JEPI", "name": "JPMorgan Equity Premium Income ETF", "type": "ETF", "justification": "Income"},
+        {"ticker": "ZZZQ", "name": "Invented Corp", "type": "stock", "justification": "Made up"}
+    ]
+    provider = ReplayProvider(recording, info={"JEPI": {"quoteType": "ETF", "shortName": "JPMorgan Equity Premium"}})
+    lookups = []
+    replay_info = provider.get_info
+    provider.get_info = lambda ticker: lookups.append(ticker) or replay_info(ticker)
+
+    def recommend():
+        agent = DataCollectorAgent(llm=FinancialAdvisorLLM(), data_dir=str(tmp_path), provider=provider)
+        return [asset["ticker"] for asset in agent.get_recommended_assets(5, 10)], agent
+
+    tickers, agent = recommend()
+    assert tickers == ["JEPI"]
+    assert "JEPI" in agent.symbols
+    assert sorted(lookups) == ["JEPI", "ZZZQ"]
+
+    # A new agent reuses both verdicts without asking the provider again
+    tickers, _ = recommend()
+    assert tickers == ["JEPI"]
+    assert sorted(lookups) == ["JEPI", "ZZZQ"]
+
+
+def test_verdicts_skip_failed_lookups_and_are_kept_per_provider(tmp_path, recording):
+    """
+    Test that a failed lookup is retried instead of stored as unlisted, and
+    that verdicts of one provider are not reused for another
+    """
+    provider = ReplayProvider(recording, info={"JEPI": {"quoteType": "ETF", "shortName": "JPMorgan Equity Premium"}})
+    lookups = []
+    replay_info = provider.get_info
+
+    def flaky_info(ticker):
+        lookups.append(ticker)
+        if len(lookups) == 1:
+            raise ConnectionError("timed out")
+        return replay_info(ticker)
+
+    provider.get_info = flaky_info
+    fetcher = FundamentalsFetcher(provider, data_dir=str(tmp_path), requests_per_second=None)
+    verifier = SymbolVerifier(SymbolTable(), fetcher, str(tmp_path))
+
+    assert verifier.verify("JEPI") is None
+    assert not os.path.exists(verifier.path)
+    assert verifier.verify("JEPI") == "JEPI"
+    assert lookups == ["JEPI", "JEPI"]
+    assert os.path.basename(verifier.path) == "symbols_checked_replay.json"
+
+    assert "JEPI" in SymbolVerifier(SymbolTable(), fetcher, str(tmp_path)).table
+    synthetic = FundamentalsFetcher(SyntheticProvider(n_tickers=1, years=1), data_dir=str(tmp_path), requests_per_second=None)
+    assert "JEPI" not in SymbolVerifier(SymbolTable(), synthetic, str(tmp_path)).table
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__])
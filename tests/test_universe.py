@@ -0,0 +1,85 @@
+import numpy as np
+
+from portfolio_advisor.agents.data_collection import DataCollectorAgent
+from portfolio_advisor.models.base_model import FinancialAdvisorLLM
+from portfolio_advisor.utils.fundamentals import FundamentalsFetcher
+from portfolio_advisor.utils.market_data import SyntheticProvider
+from portfolio_advisor.utils.universe import UniverseIndex
+
+INFOS = {
+    "AAPL": {"sector": "Technology", "marketCap": 3.0e12, "beta": 1.2, "trailingPE": 30.0,
+             "dividendYield": 0.5, "averageVolume": 5e7},
+    "MSFT": {"sector": "Technology", "marketCap": 3.1e12, "beta": 0.9, "trailingPE": 35.0,
+             "dividendYield": 0.7, "averageVolume": 2e7},
+    "SMCI": {"sector": "Technology", "marketCap": 2.0e10, "beta": 2.5, "trailingPE": "N/A",
+             "averageVolume": 6e7},
+    "JNJ": {"sector": "Healthcare", "marketCap": 3.7e11, "beta": 0.5, "trailingPE": 15.0,
+            "dividendYield": 3.1, "averageVolume": 7e6},
+    "XOM": {"sector": "Energy", "marketCap": 4.6e11, "beta": 0.8, "trailingPE": 13.0,
+            "dividendYield": 3.4, "averageVolume": 1.5e7},
+    "FAIL": ValueError("lookup failed")
+}
+
+
+def test_universe_queries_and_top_k(tmp_path):
+    """
+    Test compound filters, top-K sorts, missing values and the file round trip
+    """
+    index = UniverseIndex.from_infos(INFOS)
+
+    assert len(index) == 5 and "FAIL" not in index
+    assert index.query(sectors=["technology"], max_beta=1.5) == ["AAPL", "MSFT"]
+    assert index.query(min_dividend_yield=3.0, min_average_volume=1e7) == ["XOM"]
+    # Missing P/E never matches a bound on it
+    assert "SMCI" not in index.query(max_pe_ratio=100)
+
+    assert index.top_k(2) == ["MSFT", "AAPL"]
+    assert index.top_k(3, by="beta", ascending=True) == ["JNJ", "XOM", "MSFT"]
+    assert index.top_k(10, by="dividend_yield", sectors=["Technology"]) == ["MSFT", "AAPL"]
+
+    path = str(tmp_path / "universe.npz")
+    index.save(path)
+    restored = UniverseIndex.load(path)
+    assert restored.tickers.tolist() == index.tickers.tolist()
+    assert restored.sector_of("JNJ") == "Healthcare"
+    np.testing.assert_array_equal(restored.columns["pe_ratio"], index.columns["pe_ratio"])
+
+
+def test_universe_refreshes_incrementally(tmp_path):
+    """
+    Test that a refresh only rewrites changed rows and appends new tickers
+    """
+    index = UniverseIndex.from_infos(INFOS)
+
+    assert index.update({"AAPL": INFOS["AAPL"], "FAIL": ValueError("again")}) == 0
+    assert index.update({"AAPL": {**INFOS["AAPL"], "beta": 1.6}, "NVDA": {"sector": "Technology"}}) == 2
+    assert index.columns["beta"][index.tickers.tolist().index("AAPL")] == 1.6
+    assert index.query(sectors=["Technology"]) == ["AAPL", "MSFT", "SMCI", "NVDA"]
+
+    provider = SyntheticProvider(n_tickers=50, years=1)
+    fetcher = FundamentalsFetcher(provider, data_dir=str(tmp_path), requests_per_second=None)
+    universe = UniverseIndex()
+    assert universe.refresh(fetcher, provider.tickers) == 50
+    assert universe.refresh(fetcher) == 0
+
+
+def test_agent_screens_the_universe(tmp_path):
+    """
+    Test that the agent builds, persists and screens its universe index
+    """
+    provider = SyntheticProvider(n_tickers=30, years=1)
+    agent = DataCollectorAgent(llm=FinancialAdvisorLLM(), data_dir=str(tmp_path), provider=provider)
+
+    universe = agent.refresh_universe(provider.tickers)
+    top = agent.screen_stocks(["Energy"], count=3, min_average_volume=1e5)
+
+    energy = [t for t in provider.tickers if provider.get_info(t)["sector"] == "Energy"]
+    expected = sorted(energy, key=lambda t: -provider.get_info(t)["marketCap"])[:3]
+    assert top == expected
+    assert len(UniverseIndex.load(agent.universe_file)) == len(universe)
+    assert agent.get_stock_info(top[:1])[top[0]]["average_volume"] == 1e6
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__])